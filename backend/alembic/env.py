@@ -7,7 +7,7 @@ from alembic import context
 
 from backend.app.config import settings
 from backend.app.database import Base
-from backend.app.models import user, book, reading_session, highlight
+from backend.app.models import user, book, reading_session, highlight, device_api_key, reading_progress, statistics_archive, reading_aggregate, daily_stats, book_stats
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,80 @@
+"""添加书籍统计汇总表
+
+book_stats 之后由同步刷新，这里由按天汇总（book_daily_stats）为现有书籍一次性回填。
+
+Revision ID: a5d8e3b1f7c4
+Revises: f3a9c2d7e5b1
+Create Date: 2026-10-19 19:58:14.207365
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.services.book_stats_service import build_book_stats
+from backend.app.utils.page_bitmap import bitmap_or
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d8e3b1f7c4'
+down_revision = 'f3a9c2d7e5b1'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _backfill_book_stats(book_stats: sa.Table) -> None:
+    bind = op.get_bind()
+    totals = {
+        row.book_id: row for row in bind.execute(sa.text("""
+            SELECT book_id, sum(duration) AS duration, sum(session_count) AS session_count,
+                   min(first_start) AS first_start, max(last_start) AS last_start
+            FROM book_daily_stats
+            GROUP BY book_id
+        """))
+    }
+    bitmaps = {}
+    result = bind.execution_options(stream_results=True).execute(
+        sa.text("SELECT book_id, pages_bitmap FROM book_daily_stats")
+    )
+    for row in result:
+        bitmaps[row.book_id] = bitmap_or(bitmaps.get(row.book_id), row.pages_bitmap)
+    highlights = dict(bind.execute(sa.text("SELECT book_id, count(*) FROM highlights GROUP BY book_id")).all())
+    
+    rows = []
+    books = bind.execute(sa.text("""
+        SELECT id, user_id, total_pages, total_read_time, total_read_pages, last_open, highlights_count FROM books
+    """))
+    for book in books:
+        rows.append({
+            "book_id": book.id,
+            "user_id": book.user_id,
+            **build_book_stats(book, totals.get(book.id), bitmaps.get(book.id, b""), highlights.get(book.id, 0)),
+        })
+    for offset in range(0, len(rows), BATCH_SIZE):
+        op.bulk_insert(book_stats, rows[offset:offset + BATCH_SIZE])
+
+
+def upgrade() -> None:
+    book_stats = op.create_table('book_stats',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_reading_time', sa.Integer(), nullable=False),
+    sa.Column('read_pages_count', sa.Integer(), nullable=False),
+    sa.Column('reading_progress', sa.Float(), nullable=False),
+    sa.Column('avg_reading_speed', sa.Float(), nullable=False),
+    sa.Column('sessions_count', sa.Integer(), nullable=False),
+    sa.Column('highlights_count', sa.Integer(), nullable=False),
+    sa.Column('first_read_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_read_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('pages_bitmap', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+    _backfill_book_stats(book_stats)
+    op.create_index('idx_book_stats_user_id', 'book_stats', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_book_stats_user_id', table_name='book_stats')
+    op.drop_table('book_stats')
@@ -0,0 +1,40 @@
+"""添加设备API密钥表
+
+Revision ID: b3e1c7d9a2f4
+Revises: 7dab97b77eb5
+Create Date: 2026-10-19 10:12:31.402817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e1c7d9a2f4'
+down_revision = '7dab97b77eb5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('device_api_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('key_prefix', sa.String(length=16), nullable=False),
+    sa.Column('key_hash', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_device_api_keys_hash', 'device_api_keys', ['key_hash'], unique=True)
+    op.create_index('idx_device_api_keys_user_id', 'device_api_keys', ['user_id'], unique=False)
+    op.create_index(op.f('ix_device_api_keys_id'), 'device_api_keys', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_device_api_keys_id'), table_name='device_api_keys')
+    op.drop_index('idx_device_api_keys_user_id', table_name='device_api_keys')
+    op.drop_index('idx_device_api_keys_hash', table_name='device_api_keys')
+    op.drop_table('device_api_keys')
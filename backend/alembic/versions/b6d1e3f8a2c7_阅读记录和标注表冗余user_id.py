@@ -0,0 +1,46 @@
+"""阅读记录和标注表冗余user_id
+
+Revision ID: b6d1e3f8a2c7
+Revises: a8e4f2b6c9d1
+Create Date: 2026-10-19 16:02:21.448179
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.utils.online_ddl import backfill_in_batches, set_not_null, create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d1e3f8a2c7'
+down_revision = 'a8e4f2b6c9d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 回填和并发建索引都需要在事务外逐条提交
+    with op.get_context().autocommit_block():
+        for table in ('reading_sessions', 'highlights'):
+            op.add_column(table, sa.Column('user_id', sa.Integer(), nullable=True))
+            backfill_in_batches(table, f"""
+                UPDATE {table} t SET user_id = b.user_id
+                FROM books b
+                WHERE t.book_id = b.id AND t.id >= :start AND t.id < :end AND t.user_id IS NULL
+            """)
+            set_not_null(table, 'user_id')
+        
+        create_index_concurrently(
+            'idx_sessions_user_time', 'reading_sessions',
+            '(user_id, start_time) INCLUDE (book_id, page, duration, id)', 'user_time_idx'
+        )
+        create_index_concurrently('idx_highlights_user_id', 'highlights', '(user_id)', 'user_id_idx')
+        op.execute("ANALYZE reading_sessions")
+        op.execute("ANALYZE highlights")
+
+
+def downgrade() -> None:
+    op.drop_index('idx_highlights_user_id', table_name='highlights')
+    op.drop_index('idx_sessions_user_time', table_name='reading_sessions')
+    op.drop_column('highlights', 'user_id')
+    op.drop_column('reading_sessions', 'user_id')
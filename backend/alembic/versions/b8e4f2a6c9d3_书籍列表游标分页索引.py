@@ -0,0 +1,37 @@
+"""书籍列表游标分页索引
+
+按书名和最近阅读排序的游标分页分别在 (user_id, title, id) 和
+(user_id, last_read_time DESC NULLS LAST, book_id DESC) 上定位。
+
+Revision ID: b8e4f2a6c9d3
+Revises: a5d8e3b1f7c4
+Create Date: 2026-10-19 21:12:40.518263
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4f2a6c9d3'
+down_revision = 'a5d8e3b1f7c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 并发建索引不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_books_user_title', 'books', ['user_id', 'title', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY idx_book_stats_user_last_read "
+            "ON book_stats (user_id, last_read_time DESC NULLS LAST, book_id DESC)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_book_stats_user_last_read', table_name='book_stats', postgresql_concurrently=True)
+        op.drop_index('idx_books_user_title', table_name='books', postgresql_concurrently=True)
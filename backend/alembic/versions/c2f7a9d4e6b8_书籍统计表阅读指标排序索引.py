@@ -0,0 +1,37 @@
+"""书籍统计表阅读指标排序索引
+
+书籍列表按阅读时长、进度排序（倒序扫描）和按阅读状态筛选使用
+(user_id, total_reading_time, book_id) 和 (user_id, reading_progress, book_id)。
+
+Revision ID: c2f7a9d4e6b8
+Revises: b8e4f2a6c9d3
+Create Date: 2026-10-19 22:03:17.904125
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a9d4e6b8'
+down_revision = 'b8e4f2a6c9d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 并发建索引不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_book_stats_user_time', 'book_stats', ['user_id', 'total_reading_time', 'book_id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_book_stats_user_progress', 'book_stats', ['user_id', 'reading_progress', 'book_id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_book_stats_user_progress', table_name='book_stats', postgresql_concurrently=True)
+        op.drop_index('idx_book_stats_user_time', table_name='book_stats', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""添加kosync阅读进度表
+
+Revision ID: c4f2d8e1b5a3
+Revises: b3e1c7d9a2f4
+Create Date: 2026-10-19 11:03:47.215904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f2d8e1b5a3'
+down_revision = 'b3e1c7d9a2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('kosync_key_hash', sa.String(length=64), nullable=True))
+    op.create_table('reading_progress',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('document', sa.String(length=255), nullable=False),
+    sa.Column('progress', sa.Text(), nullable=True),
+    sa.Column('percentage', sa.Float(), nullable=True),
+    sa.Column('device', sa.String(length=255), nullable=True),
+    sa.Column('device_id', sa.String(length=255), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_progress_user_document', 'reading_progress', ['user_id', 'document'], unique=True)
+    op.create_index('idx_progress_user_updated', 'reading_progress', ['user_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_progress_user_updated', table_name='reading_progress')
+    op.drop_index('idx_progress_user_document', table_name='reading_progress')
+    op.drop_table('reading_progress')
+    op.drop_column('users', 'kosync_key_hash')
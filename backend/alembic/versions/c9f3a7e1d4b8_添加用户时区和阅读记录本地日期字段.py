@@ -0,0 +1,50 @@
+"""添加用户时区和阅读记录本地日期字段
+
+Revision ID: c9f3a7e1d4b8
+Revises: b6d1e3f8a2c7
+Create Date: 2026-10-19 16:48:09.315720
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.config import settings
+from backend.app.utils.online_ddl import backfill_in_batches, set_not_null, create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f3a7e1d4b8'
+down_revision = 'b6d1e3f8a2c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('timezone', sa.String(length=64), nullable=True))
+    
+    # 回填和并发建索引都需要在事务外逐条提交
+    with op.get_context().autocommit_block():
+        op.add_column('reading_sessions', sa.Column('local_date', sa.Date(), nullable=True))
+        op.add_column('reading_sessions', sa.Column('local_hour', sa.SmallInteger(), nullable=True))
+        # 已有用户都没有设置时区，按默认时区换算
+        backfill_in_batches('reading_sessions', f"""
+            UPDATE reading_sessions t
+            SET local_date = (t.start_time AT TIME ZONE '{settings.DEFAULT_TIMEZONE}')::date,
+                local_hour = extract(hour FROM t.start_time AT TIME ZONE '{settings.DEFAULT_TIMEZONE}')
+            WHERE t.id >= :start AND t.id < :end AND t.local_date IS NULL
+        """)
+        set_not_null('reading_sessions', 'local_date')
+        set_not_null('reading_sessions', 'local_hour')
+        
+        create_index_concurrently(
+            'idx_sessions_user_local_date', 'reading_sessions',
+            '(user_id, local_date) INCLUDE (local_hour, book_id, page, duration, id)', 'user_local_date_idx'
+        )
+        op.execute("ANALYZE reading_sessions")
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sessions_user_local_date', table_name='reading_sessions')
+    op.drop_column('reading_sessions', 'local_hour')
+    op.drop_column('reading_sessions', 'local_date')
+    op.drop_column('users', 'timezone')
@@ -0,0 +1,40 @@
+"""书名和作者三元组搜索索引
+
+启用pg_trgm并为 books.title、books.author 建GIN三元组索引，书籍搜索的
+ILIKE '%关键词%' 和相似度匹配（%>）不再顺序扫描整张书籍表。
+
+Revision ID: d4a8c1e7f2b9
+Revises: c2f7a9d4e6b8
+Create Date: 2026-10-19 22:41:05.337816
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8c1e7f2b9'
+down_revision = 'c2f7a9d4e6b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # pg_trgm 是可信扩展（PostgreSQL 13+），数据库所有者即可创建
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # 并发建索引不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_books_title_trgm', 'books', ['title'], unique=False, postgresql_concurrently=True,
+            postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+        )
+        op.create_index(
+            'idx_books_author_trgm', 'books', ['author'], unique=False, postgresql_concurrently=True,
+            postgresql_using='gin', postgresql_ops={'author': 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_books_author_trgm', table_name='books', postgresql_concurrently=True)
+        op.drop_index('idx_books_title_trgm', table_name='books', postgresql_concurrently=True)
+    # pg_trgm 可能被其他对象使用，保留扩展
@@ -0,0 +1,155 @@
+"""阅读记录表精简存储布局
+
+去掉代理主键id及其序列和索引，(book_id, page, start_time) 直接作为主键，
+删除被主键和覆盖索引取代的 book_id / start_time 单列索引，duration 改为SMALLINT，
+字段按对齐宽度重新排列。字段顺序只能通过重建表改变，这里与分区迁移一样新建分区表后整体搬运。
+
+Revision ID: d4e8b2f6a1c3
+Revises: c9f3a7e1d4b8
+Create Date: 2026-10-19 17:20:44.605183
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.config import settings
+from backend.app.utils.page_stats import DURATION_MAX
+from backend.app.utils.partitioning import (
+    iter_partition_ranges, next_partition_start, partition_floor,
+    create_partition_ddl, create_default_partition_ddl,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8b2f6a1c3'
+down_revision = 'c9f3a7e1d4b8'
+branch_labels = None
+depends_on = None
+
+COVERING_INDEXES = (
+    ('idx_sessions_book_time_covering', ['book_id', 'start_time'], ['page', 'duration']),
+    ('idx_sessions_user_time', ['user_id', 'start_time'], ['book_id', 'page', 'duration']),
+    ('idx_sessions_user_local_date', ['user_id', 'local_date'], ['local_hour', 'book_id', 'page', 'duration']),
+)
+
+LEGACY_INDEXES = (
+    ('idx_book_page_time', ['book_id', 'page', 'start_time'], True),
+    ('idx_sessions_book_id', ['book_id'], False),
+    ('idx_sessions_start_time', ['start_time'], False),
+    ('ix_reading_sessions_id', ['id'], False),
+)
+
+COLUMNS = "start_time, book_id, page, user_id, local_date, total_pages_at_time, duration, local_hour"
+
+
+def _rename_to_legacy(index_names) -> None:
+    """旧表及其所有分区改名为 reading_sessions_legacy*，释放表名、分区名和索引名"""
+    bind = op.get_bind()
+    partitions = bind.execute(sa.text("""
+        SELECT relid::regclass::text FROM pg_partition_tree('reading_sessions')
+        WHERE level > 0 ORDER BY level DESC
+    """)).scalars().all()
+    for name in index_names:
+        op.drop_index(name, table_name='reading_sessions')
+    for partition in partitions:
+        legacy_name = partition.replace('reading_sessions_', 'reading_sessions_legacy_', 1)
+        op.execute(f"ALTER TABLE {partition} RENAME TO {legacy_name}")
+    op.execute("ALTER TABLE reading_sessions RENAME TO reading_sessions_legacy")
+    # 父表和各分区上的主键索引（reading_sessions_pkey、reading_sessions_p202401_pkey ...）同样改名
+    pkey_indexes = bind.execute(sa.text("""
+        SELECT indexrelid::regclass::text FROM pg_index
+        WHERE indisprimary AND indrelid IN (SELECT relid FROM pg_partition_tree('reading_sessions_legacy'))
+    """)).scalars().all()
+    for index in pkey_indexes:
+        legacy_name = index.replace('reading_sessions_', 'reading_sessions_legacy_', 1)[:63]
+        op.execute(f"ALTER INDEX {index} RENAME TO {legacy_name}")
+
+
+def _create_partitions() -> None:
+    """为已有数据覆盖的时间段以及未来几个周期创建分区"""
+    interval = settings.READING_SESSIONS_PARTITION_INTERVAL
+    now = datetime.now(timezone.utc)
+    first = op.get_bind().execute(sa.text("SELECT min(start_time) FROM reading_sessions_legacy")).scalar() or now
+    last = partition_floor(now, interval)
+    for _ in range(settings.READING_SESSIONS_PARTITION_PREMAKE):
+        last = next_partition_start(last, interval)
+    
+    op.execute(create_default_partition_ddl())
+    for name, start, end in iter_partition_ranges(first, last, interval):
+        for statement in create_partition_ddl(name, start, end, settings.READING_SESSIONS_HASH_PARTITIONS):
+            op.execute(statement)
+
+
+def _create_covering_indexes(extra_include=()) -> None:
+    for name, columns, include in COVERING_INDEXES:
+        op.create_index(name, 'reading_sessions', columns, postgresql_include=include + list(extra_include))
+
+
+def upgrade() -> None:
+    _rename_to_legacy(
+        [name for name, _, _ in LEGACY_INDEXES] + [name for name, _, _ in COVERING_INDEXES]
+    )
+    
+    # 8字节、4字节、2字节字段依次排列，行内没有对齐填充
+    op.execute("""
+        CREATE TABLE reading_sessions (
+            start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+            book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+            page INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            local_date DATE NOT NULL,
+            total_pages_at_time INTEGER,
+            duration SMALLINT NOT NULL,
+            local_hour SMALLINT NOT NULL
+        ) PARTITION BY RANGE (start_time)
+    """)
+    _create_partitions()
+    
+    # 先搬运数据再建主键和索引，比逐行维护索引快得多
+    op.execute(f"""
+        INSERT INTO reading_sessions ({COLUMNS})
+        SELECT start_time, book_id, page, user_id, local_date, total_pages_at_time,
+               LEAST(duration, {DURATION_MAX}), local_hour
+        FROM reading_sessions_legacy
+    """)
+    op.execute("""
+        ALTER TABLE reading_sessions
+        ADD CONSTRAINT reading_sessions_pkey PRIMARY KEY (book_id, page, start_time)
+    """)
+    _create_covering_indexes()
+    
+    # 删除旧表时一并删除其分区和id序列
+    op.execute("DROP TABLE reading_sessions_legacy")
+    op.execute("ANALYZE reading_sessions")
+
+
+def downgrade() -> None:
+    _rename_to_legacy([name for name, _, _ in COVERING_INDEXES])
+    
+    op.execute("CREATE SEQUENCE reading_sessions_id_seq")
+    op.execute("""
+        CREATE TABLE reading_sessions (
+            id BIGINT NOT NULL DEFAULT nextval('reading_sessions_id_seq'),
+            book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+            page INTEGER NOT NULL,
+            start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+            duration INTEGER NOT NULL,
+            total_pages_at_time INTEGER,
+            user_id INTEGER NOT NULL,
+            local_date DATE NOT NULL,
+            local_hour SMALLINT NOT NULL,
+            CONSTRAINT reading_sessions_pkey PRIMARY KEY (id, start_time)
+        ) PARTITION BY RANGE (start_time)
+    """)
+    op.execute("ALTER SEQUENCE reading_sessions_id_seq OWNED BY reading_sessions.id")
+    _create_partitions()
+    
+    op.execute(f"INSERT INTO reading_sessions ({COLUMNS}) SELECT {COLUMNS} FROM reading_sessions_legacy ORDER BY start_time")
+    for name, columns, unique in LEGACY_INDEXES:
+        op.create_index(name, 'reading_sessions', columns, unique=unique)
+    _create_covering_indexes(extra_include=['id'])
+    
+    op.execute("DROP TABLE reading_sessions_legacy")
+    op.execute("ANALYZE reading_sessions")
@@ -0,0 +1,40 @@
+"""添加统计文件归档表
+
+Revision ID: d7a3e9f2c6b1
+Revises: c4f2d8e1b5a3
+Create Date: 2026-10-19 11:48:05.630271
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3e9f2c6b1'
+down_revision = 'c4f2d8e1b5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('statistics_archives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('source_path', sa.String(length=1024), nullable=True),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('compressed_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_archive_sha256', 'statistics_archives', ['sha256'], unique=False)
+    op.create_index('idx_archive_user_archived_at', 'statistics_archives', ['user_id', 'archived_at'], unique=False)
+    op.create_index('idx_archive_user_sha256', 'statistics_archives', ['user_id', 'sha256'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_archive_user_sha256', table_name='statistics_archives')
+    op.drop_index('idx_archive_user_archived_at', table_name='statistics_archives')
+    op.drop_index('idx_archive_sha256', table_name='statistics_archives')
+    op.drop_table('statistics_archives')
@@ -0,0 +1,52 @@
+"""添加阅读记录按天汇总和页码位图表
+
+Revision ID: e2c5a9f7b3d6
+Revises: d4e8b2f6a1c3
+Create Date: 2026-10-19 18:06:52.913427
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c5a9f7b3d6'
+down_revision = 'd4e8b2f6a1c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reading_day_aggregates',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('local_date', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=False),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.Column('first_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('hour_counts', sa.JSON(), nullable=False),
+    sa.Column('pages_bitmap', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'local_date')
+    )
+    op.create_index('idx_day_aggregates_user_date', 'reading_day_aggregates', ['user_id', 'local_date'],
+                    unique=False, postgresql_include=['book_id', 'duration', 'session_count'])
+    
+    op.create_table('book_page_bitmaps',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('pages_bitmap', sa.LargeBinary(), nullable=False),
+    sa.Column('compacted_before', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+    op.create_index('idx_page_bitmaps_user_id', 'book_page_bitmaps', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    # 降级前应先关闭压缩（READING_SESSIONS_COMPACT_AFTER_MONTHS=0），已压缩的逐页记录无法还原
+    op.drop_index('idx_page_bitmaps_user_id', table_name='book_page_bitmaps')
+    op.drop_table('book_page_bitmaps')
+    op.drop_index('idx_day_aggregates_user_date', table_name='reading_day_aggregates')
+    op.drop_table('reading_day_aggregates')
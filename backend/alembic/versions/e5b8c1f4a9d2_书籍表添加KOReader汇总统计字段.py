@@ -0,0 +1,36 @@
+"""书籍表添加KOReader汇总统计字段
+
+Revision ID: e5b8c1f4a9d2
+Revises: d7a3e9f2c6b1
+Create Date: 2026-10-19 13:20:14.508336
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8c1f4a9d2'
+down_revision = 'd7a3e9f2c6b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('books', sa.Column('series', sa.String(length=255), nullable=True))
+    op.add_column('books', sa.Column('language', sa.String(length=64), nullable=True))
+    op.add_column('books', sa.Column('total_read_time', sa.Integer(), nullable=True))
+    op.add_column('books', sa.Column('total_read_pages', sa.Integer(), nullable=True))
+    op.add_column('books', sa.Column('last_open', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('books', sa.Column('highlights_count', sa.Integer(), nullable=True))
+    op.add_column('books', sa.Column('notes_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('books', 'notes_count')
+    op.drop_column('books', 'highlights_count')
+    op.drop_column('books', 'last_open')
+    op.drop_column('books', 'total_read_pages')
+    op.drop_column('books', 'total_read_time')
+    op.drop_column('books', 'language')
+    op.drop_column('books', 'series')
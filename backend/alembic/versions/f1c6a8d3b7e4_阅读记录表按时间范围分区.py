@@ -0,0 +1,104 @@
+"""阅读记录表按时间范围分区
+
+Revision ID: f1c6a8d3b7e4
+Revises: e5b8c1f4a9d2
+Create Date: 2026-10-19 14:05:37.214906
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.config import settings
+from backend.app.utils.partitioning import (
+    iter_partition_ranges, next_partition_start, partition_floor,
+    create_partition_ddl, create_default_partition_ddl,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6a8d3b7e4'
+down_revision = 'e5b8c1f4a9d2'
+branch_labels = None
+depends_on = None
+
+SESSION_INDEXES = (
+    ('idx_book_page_time', ['book_id', 'page', 'start_time'], True),
+    ('idx_sessions_book_id', ['book_id'], False),
+    ('idx_sessions_start_time', ['start_time'], False),
+    ('ix_reading_sessions_id', ['id'], False),
+)
+
+COLUMNS = "id, book_id, page, start_time, duration, total_pages_at_time"
+
+
+def _rename_to_legacy() -> None:
+    """旧表改名并释放索引名和序列，新表沿用同一个id序列"""
+    for name, _, _ in SESSION_INDEXES:
+        op.drop_index(name, table_name='reading_sessions')
+    op.execute("ALTER TABLE reading_sessions RENAME TO reading_sessions_legacy")
+    op.execute("ALTER TABLE reading_sessions_legacy RENAME CONSTRAINT reading_sessions_pkey TO reading_sessions_legacy_pkey")
+    op.execute("ALTER SEQUENCE reading_sessions_id_seq OWNED BY NONE")
+
+
+def _create_indexes() -> None:
+    for name, columns, unique in SESSION_INDEXES:
+        op.create_index(name, 'reading_sessions', columns, unique=unique)
+
+
+def upgrade() -> None:
+    _rename_to_legacy()
+    
+    # 分区键必须包含在主键中
+    op.execute("""
+        CREATE TABLE reading_sessions (
+            id BIGINT NOT NULL DEFAULT nextval('reading_sessions_id_seq'),
+            book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+            page INTEGER NOT NULL,
+            start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+            duration INTEGER NOT NULL,
+            total_pages_at_time INTEGER,
+            CONSTRAINT reading_sessions_pkey PRIMARY KEY (id, start_time)
+        ) PARTITION BY RANGE (start_time)
+    """)
+    op.execute("ALTER SEQUENCE reading_sessions_id_seq OWNED BY reading_sessions.id")
+    _create_indexes()
+    
+    # 为已有数据覆盖的时间段以及未来几个周期创建分区
+    interval = settings.READING_SESSIONS_PARTITION_INTERVAL
+    now = datetime.now(timezone.utc)
+    first = op.get_bind().execute(sa.text("SELECT min(start_time) FROM reading_sessions_legacy")).scalar() or now
+    last = partition_floor(now, interval)
+    for _ in range(settings.READING_SESSIONS_PARTITION_PREMAKE):
+        last = next_partition_start(last, interval)
+    
+    op.execute(create_default_partition_ddl())
+    for name, start, end in iter_partition_ranges(first, last, interval):
+        for statement in create_partition_ddl(name, start, end, settings.READING_SESSIONS_HASH_PARTITIONS):
+            op.execute(statement)
+    
+    op.execute(f"INSERT INTO reading_sessions ({COLUMNS}) SELECT {COLUMNS} FROM reading_sessions_legacy")
+    op.execute("DROP TABLE reading_sessions_legacy")
+    op.execute("ANALYZE reading_sessions")
+
+
+def downgrade() -> None:
+    _rename_to_legacy()
+    
+    op.create_table('reading_sessions',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('reading_sessions_id_seq')"), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('page', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=False),
+    sa.Column('total_pages_at_time', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER SEQUENCE reading_sessions_id_seq OWNED BY reading_sessions.id")
+    _create_indexes()
+    
+    op.execute(f"INSERT INTO reading_sessions ({COLUMNS}) SELECT {COLUMNS} FROM reading_sessions_legacy")
+    # 删除分区表时一并删除所有分区
+    op.execute("DROP TABLE reading_sessions_legacy")
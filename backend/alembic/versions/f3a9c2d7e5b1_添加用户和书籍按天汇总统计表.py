@@ -0,0 +1,130 @@
+"""添加用户和书籍按天汇总统计表
+
+book_daily_stats / user_daily_stats 之后由同步增量维护，这里从现有的原始记录和
+已压缩的按天汇总一次性回填。
+
+Revision ID: f3a9c2d7e5b1
+Revises: e2c5a9f7b3d6
+Create Date: 2026-10-19 19:12:37.481630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.utils.page_bitmap import pages_to_bitmap, bitmap_or, bitmap_count
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c2d7e5b1'
+down_revision = 'e2c5a9f7b3d6'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _backfill_user(book_daily_stats: sa.Table, user_id: int) -> None:
+    """按 (书籍, 本地日期) 汇总单个用户的原始记录，页码位图在Python中逐页构建，再并入已压缩的汇总"""
+    bind = op.get_bind()
+    params = {"user_id": user_id}
+    days = {}
+    result = bind.execute(sa.text("""
+        SELECT book_id, local_date, sum(duration) AS duration, count(*) AS session_count,
+               min(start_time) AS first_start, max(start_time) AS last_start
+        FROM reading_sessions
+        WHERE user_id = :user_id
+        GROUP BY book_id, local_date
+    """), params)
+    for row in result:
+        days[(row.book_id, row.local_date)] = {
+            "book_id": row.book_id,
+            "local_date": row.local_date,
+            "user_id": user_id,
+            "duration": int(row.duration or 0),
+            "session_count": row.session_count,
+            "first_start": row.first_start,
+            "last_start": row.last_start,
+            "pages": [],
+        }
+    
+    result = bind.execution_options(stream_results=True).execute(
+        sa.text("SELECT DISTINCT book_id, local_date, page FROM reading_sessions WHERE user_id = :user_id"),
+        params
+    )
+    for row in result:
+        days[(row.book_id, row.local_date)]["pages"].append(row.page)
+    for day in days.values():
+        day["pages_bitmap"] = pages_to_bitmap(day.pop("pages"))
+    
+    result = bind.execute(sa.text("""
+        SELECT book_id, local_date, user_id, duration, session_count, first_start, last_start, pages_bitmap
+        FROM reading_day_aggregates
+        WHERE user_id = :user_id
+    """), params)
+    for row in result:
+        day = days.get((row.book_id, row.local_date))
+        if day is None:
+            days[(row.book_id, row.local_date)] = dict(row._mapping)
+            continue
+        day["duration"] += row.duration
+        day["session_count"] += row.session_count
+        day["first_start"] = min(day["first_start"], row.first_start)
+        day["last_start"] = max(day["last_start"], row.last_start)
+        day["pages_bitmap"] = bitmap_or(day["pages_bitmap"], row.pages_bitmap)
+    
+    rows = list(days.values())
+    for day in rows:
+        day["pages_count"] = bitmap_count(day["pages_bitmap"])
+    for offset in range(0, len(rows), BATCH_SIZE):
+        op.bulk_insert(book_daily_stats, rows[offset:offset + BATCH_SIZE])
+
+
+def _backfill_book_daily_stats(book_daily_stats: sa.Table) -> None:
+    """逐个用户回填，内存中只保留一个用户的按天汇总"""
+    user_ids = op.get_bind().execute(sa.text("SELECT id FROM users ORDER BY id")).scalars().all()
+    for user_id in user_ids:
+        _backfill_user(book_daily_stats, user_id)
+
+
+def upgrade() -> None:
+    book_daily_stats = op.create_table('book_daily_stats',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('local_date', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=False),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.Column('pages_count', sa.Integer(), nullable=False),
+    sa.Column('first_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('pages_bitmap', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'local_date')
+    )
+    op.create_table('user_daily_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('local_date', sa.Date(), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=False),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.Column('pages_count', sa.Integer(), nullable=False),
+    sa.Column('books_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'local_date')
+    )
+    
+    _backfill_book_daily_stats(book_daily_stats)
+    op.execute("""
+        INSERT INTO user_daily_stats (user_id, local_date, duration, session_count, pages_count, books_count)
+        SELECT user_id, local_date, sum(duration), sum(session_count), sum(pages_count), count(*)
+        FROM book_daily_stats
+        GROUP BY user_id, local_date
+    """)
+    
+    # 回填之后再建索引
+    op.create_index('idx_book_daily_stats_user_date', 'book_daily_stats', ['user_id', 'local_date'], unique=False,
+                    postgresql_include=['book_id', 'duration', 'session_count', 'pages_count'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_book_daily_stats_user_date', table_name='book_daily_stats')
+    op.drop_table('user_daily_stats')
+    op.drop_table('book_daily_stats')
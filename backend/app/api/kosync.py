@@ -0,0 +1,98 @@
+"""
+KOReader kosync兼容接口
+
+挂载在 /kosync 下，KOReader"进度同步"插件中自定义服务器填写 http(s)://<host>/kosync 即可。
+认证使用协议自带的 x-auth-user / x-auth-key 请求头，错误响应沿用kosync的错误码。
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.database import get_db
+from backend.app.schemas.kosync import KosyncProgressUpdate
+from backend.app.services.kosync_service import KosyncService
+
+router = APIRouter()
+
+
+def kosync_error(status_code: int, code: int, message: str) -> JSONResponse:
+    """构造kosync协议格式的错误响应"""
+    return JSONResponse(status_code=status_code, content={"code": code, "message": message})
+
+
+def unauthorized() -> JSONResponse:
+    return kosync_error(401, 2001, "Unauthorized")
+
+
+@router.post("/users/create", summary="注册（不支持）")
+async def kosync_register():
+    """账号由Reading Insights统一管理，请在设置页面中配置kosync同步密码"""
+    return kosync_error(402, 2002, "Registration is disabled, set the sync password in ReadingInsights settings.")
+
+
+@router.get("/users/auth", summary="验证kosync凭证")
+async def kosync_auth(
+    x_auth_user: Optional[str] = Header(None),
+    x_auth_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """KOReader登录时调用，验证用户名和md5(密码)"""
+    kosync_service = KosyncService(db)
+    if await kosync_service.authenticate(x_auth_user, x_auth_key) is None:
+        return unauthorized()
+    return {"authorized": "OK"}
+
+
+@router.put("/syncs/progress", summary="上报阅读进度")
+async def kosync_update_progress(
+    progress_data: KosyncProgressUpdate,
+    x_auth_user: Optional[str] = Header(None),
+    x_auth_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """保存文档的最新阅读进度"""
+    kosync_service = KosyncService(db)
+    user_id = await kosync_service.authenticate(x_auth_user, x_auth_key)
+    if user_id is None:
+        return unauthorized()
+    
+    if not progress_data.document:
+        return kosync_error(403, 2004, "Field 'document' not provided.")
+    if progress_data.progress is None or progress_data.percentage is None:
+        return kosync_error(403, 2003, "Invalid request")
+    
+    timestamp = await kosync_service.upsert_progress(user_id, progress_data.model_dump())
+    return {"document": progress_data.document, "timestamp": timestamp}
+
+
+@router.get("/syncs/progress/{document}", summary="获取阅读进度")
+async def kosync_get_progress(
+    document: str,
+    x_auth_user: Optional[str] = Header(None),
+    x_auth_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取文档在其他设备上的最新进度，没有记录时返回空对象"""
+    kosync_service = KosyncService(db)
+    user_id = await kosync_service.authenticate(x_auth_user, x_auth_key)
+    if user_id is None:
+        return unauthorized()
+    
+    progress = await kosync_service.get_progress(user_id, document)
+    if progress is None:
+        return {}
+    
+    return {
+        "document": progress.document,
+        "progress": progress.progress,
+        "percentage": progress.percentage,
+        "device": progress.device,
+        "device_id": progress.device_id,
+        "timestamp": int(progress.updated_at.timestamp()),
+    }
+
+
+@router.get("/healthcheck", summary="kosync健康检查")
+async def kosync_healthcheck():
+    return {"state": "OK"}
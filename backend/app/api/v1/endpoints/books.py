@@ -3,9 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.database import get_db
-from backend.app.schemas.book import BookResponse, BookDetail, BookList
+from backend.app.schemas.book import BookResponse, BookDetail, BookList, BookSuggestList
 from backend.app.services.auth_service import AuthService
 from backend.app.services.book_service import BookService
+from backend.app.services.book_suggest_service import BookSuggestService
 
 router = APIRouter()
 
@@ -14,21 +15,48 @@ router = APIRouter()
 async def get_books(
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
-    search: Optional[str] = Query(None, description="搜索关键词"),
+    search: Optional[str] = Query(None, description="搜索关键词（匹配书名或作者）"),
+    sort: str = Query(
+        "id",
+        pattern="^(id|title|last_read|total_time|progress|relevance)$",
+        description="排序方式：id（最近添加）、title（书名）、last_read（最近阅读）、total_time（阅读时长）、progress（阅读进度）、relevance（与搜索关键词的相关度，需配合search）"
+    ),
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(unread|reading|finished)$", description="阅读状态：unread（未读）、reading（在读）、finished（读完）"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor，传入时忽略skip"),
+    include_total: bool = Query(True, description="是否计算总数，游标翻页时可关闭"),
     current_user: dict = Depends(AuthService.get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取用户的书籍列表，支持搜索和分页"""
+    """获取用户的书籍列表，支持搜索、按阅读指标排序、按阅读状态筛选，以及skip或游标分页"""
     book_service = BookService(db)
-    books_data = await book_service.get_user_books(
-        user_id=current_user["user_id"],
-        skip=skip,
-        limit=limit,
-        search=search
-    )
+    try:
+        books_data = await book_service.get_user_books(
+            user_id=current_user["user_id"],
+            skip=skip,
+            limit=limit,
+            search=search,
+            sort=sort,
+            cursor=cursor,
+            include_total=include_total,
+            status=status_filter
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return books_data
 
 
+@router.get("/suggest", response_model=BookSuggestList, summary="书籍搜索建议")
+async def suggest_books(
+    q: str = Query(..., min_length=1, max_length=100, description="输入中的搜索关键词"),
+    limit: int = Query(10, ge=1, le=50, description="返回的建议数"),
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """按书名、作者、系列给出输入时的搜索建议，由进程内的n-gram索引直接返回"""
+    suggest_service = BookSuggestService(db)
+    return await suggest_service.suggest(current_user["user_id"], q, limit)
+
+
 @router.get("/{book_id}", response_model=BookDetail, summary="获取书籍详情")
 async def get_book_detail(
     book_id: int,
@@ -0,0 +1,61 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.database import get_db
+from backend.app.schemas.device import DeviceKeyCreate, DeviceKeyResponse, DeviceKeyCreated
+from backend.app.services.auth_service import AuthService
+from backend.app.services.device_key_service import DeviceKeyService
+
+router = APIRouter()
+
+
+@router.post("/keys", response_model=DeviceKeyCreated, summary="创建设备API密钥")
+async def create_device_key(
+    key_data: DeviceKeyCreate,
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """为阅读设备或同步脚本创建API密钥，明文密钥只在此时返回一次"""
+    device_key_service = DeviceKeyService(db)
+    device_key, api_key = await device_key_service.create_key(
+        user_id=current_user["user_id"],
+        name=key_data.name
+    )
+    return DeviceKeyCreated(
+        id=device_key.id,
+        name=device_key.name,
+        key_prefix=device_key.key_prefix,
+        created_at=device_key.created_at,
+        last_used_at=device_key.last_used_at,
+        api_key=api_key
+    )
+
+
+@router.get("/keys", response_model=List[DeviceKeyResponse], summary="获取设备API密钥列表")
+async def list_device_keys(
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取当前用户的所有设备密钥（不包含明文）"""
+    device_key_service = DeviceKeyService(db)
+    return await device_key_service.list_keys(current_user["user_id"])
+
+
+@router.delete("/keys/{key_id}", summary="吊销设备API密钥")
+async def revoke_device_key(
+    key_id: int,
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """吊销指定的设备密钥；多进程部署时其他进程最多在 DEVICE_KEY_REVALIDATE_SECONDS 秒后生效"""
+    device_key_service = DeviceKeyService(db)
+    success = await device_key_service.revoke_key(current_user["user_id"], key_id)
+    
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="设备密钥不存在"
+        )
+    
+    return {"message": "设备密钥已吊销"}
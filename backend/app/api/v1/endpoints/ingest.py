@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.database import get_db
+from backend.app.schemas.ingest import PageStatsIngestResponse
+from backend.app.services.device_key_service import DeviceKeyService
+from backend.app.services.ingest_service import IngestService
+
+router = APIRouter()
+
+
+@router.post("/page-stats", response_model=PageStatsIngestResponse, summary="增量推送阅读记录")
+async def ingest_page_stats(
+    request: Request,
+    device: dict = Depends(DeviceKeyService.get_device_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    接收NDJSON格式的page_stat记录（每行一条）
+    
+    每行格式: {"md5": "...", "page": 12, "start_time": 1700000000, "duration": 35, "total_pages": 320}
+    
+    使用 X-API-Key 请求头进行设备认证。已存在的记录会被忽略，可以安全地重复推送。
+    """
+    ingest_service = IngestService(db)
+    
+    try:
+        result = await ingest_service.ingest_page_stats(device["user_id"], request.stream())
+        return PageStatsIngestResponse(**result)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"导入阅读记录失败: {str(e)}"
+        )
@@ -0,0 +1,46 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.database import get_db
+from backend.app.schemas.kosync import KosyncCredentials, ReadingProgressResponse
+from backend.app.services.auth_service import AuthService
+from backend.app.services.kosync_service import KosyncService
+
+router = APIRouter()
+
+
+@router.put("/kosync", summary="设置kosync同步密码")
+async def set_kosync_credentials(
+    credentials: KosyncCredentials,
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """设置KOReader进度同步使用的密码（用户名与登录用户名相同）"""
+    kosync_service = KosyncService(db)
+    await kosync_service.set_credentials(current_user["user_id"], credentials.password)
+    return {"message": "kosync同步密码设置成功", "username": current_user["username"]}
+
+
+@router.get("/kosync", summary="获取kosync配置状态")
+async def get_kosync_status(
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取当前用户是否已设置kosync同步密码"""
+    kosync_service = KosyncService(db)
+    return {
+        "configured": await kosync_service.is_configured(current_user["user_id"]),
+        "username": current_user["username"]
+    }
+
+
+@router.get("/kosync/progress", response_model=List[ReadingProgressResponse], summary="获取最近阅读进度")
+async def list_kosync_progress(
+    limit: int = Query(20, ge=1, le=100, description="返回条数"),
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取设备最近上报的阅读进度（正在阅读）"""
+    kosync_service = KosyncService(db)
+    return await kosync_service.list_progress(current_user["user_id"], limit)
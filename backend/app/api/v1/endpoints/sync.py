@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Optional, List
 
 from backend.app.database import get_db
 from backend.app.services.auth_service import AuthService
+from backend.app.services.archive_service import ArchiveService
 from backend.app.services.data_sync_service import DataSyncService
-from backend.app.schemas.sync import SyncRequest, SyncResponse, SyncStatusResponse
+from backend.app.services.maintenance_service import MaintenanceService
+from backend.app.services.partition_service import PartitionService
+from backend.app.schemas.sync import SyncRequest, SyncResponse, SyncStatusResponse, ReplayRequest, ArchiveResponse
+from backend.app.utils.host_throttle import get_all_host_status
 
 router = APIRouter()
 
@@ -70,6 +74,45 @@ async def background_sync(
     return {"message": "后台同步任务已启动"}
 
 
+@router.post("/replay", response_model=SyncResponse, summary="从归档重放数据")
+async def replay_sync(
+    replay_request: ReplayRequest = None,
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """使用本地归档的统计文件重新导入数据，不访问WebDAV"""
+    sync_service = DataSyncService(db)
+    
+    result = await sync_service.replay_user_data(
+        user_id=current_user["user_id"],
+        sha256=replay_request.sha256 if replay_request else None
+    )
+    
+    if not result['success']:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result['error']
+        )
+    
+    return SyncResponse(
+        success=True,
+        message="归档数据重放成功",
+        books_synced=result['books_synced'],
+        sessions_synced=result['sessions_synced'],
+        remote_path=result.get('remote_path')
+    )
+
+
+@router.get("/archives", response_model=List[ArchiveResponse], summary="获取统计文件归档")
+async def list_archives(
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取当前用户已归档的统计文件（最新的在前）"""
+    archive_service = ArchiveService(db)
+    return await archive_service.list_archives(current_user["user_id"])
+
+
 @router.get("/status", response_model=SyncStatusResponse, summary="获取同步状态")
 async def get_sync_status(
     current_user: dict = Depends(AuthService.get_current_user),
@@ -152,4 +195,26 @@ async def find_statistics_file(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"查找统计文件失败: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+
+@router.get("/hosts", summary="WebDAV主机限流状态")
+async def get_webdav_hosts_status(
+    current_user: dict = Depends(AuthService.get_current_user)
+):
+    """查看各WebDAV主机的限流、重试和熔断指标"""
+    return {"hosts": get_all_host_status()}
+
+
+@router.get("/maintenance", summary="数据库维护指标")
+async def get_maintenance_status(
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """查看阅读记录相关表的死元组、索引大小、最近一次VACUUM情况以及reading_sessions的分区"""
+    maintenance_service = MaintenanceService(db)
+    status = await maintenance_service.get_status()
+    
+    partition_service = PartitionService(db)
+    status["partitions"] = await partition_service.list_partitions() if await partition_service.is_partitioned() else []
+    return status
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.database import get_db
+from backend.app.schemas.timezone import TimezoneUpdate, TimezoneResponse
+from backend.app.services.auth_service import AuthService
+from backend.app.services.timezone_service import TimezoneService
+
+router = APIRouter()
+
+
+@router.get("/timezone", response_model=TimezoneResponse, summary="获取时区设置")
+async def get_timezone(
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取用户设置的时区（用于按本地日期和时段统计阅读数据）"""
+    timezone_service = TimezoneService(db)
+    return await timezone_service.get_timezone(current_user["user_id"])
+
+
+@router.put("/timezone", response_model=TimezoneResponse, summary="设置时区")
+async def set_timezone(
+    timezone_update: TimezoneUpdate,
+    current_user: dict = Depends(AuthService.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    设置用户时区，并按新时区重新计算已有阅读记录的本地日期和小时
+    
+    已有压缩的历史阅读记录（READING_SESSIONS_COMPACT_AFTER_MONTHS）时，压缩数据无法换算到其他时区，
+    修改为不同的时区返回400。
+    """
+    timezone_service = TimezoneService(db)
+    try:
+        return await timezone_service.set_timezone(current_user["user_id"], timezone_update.timezone)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from backend.app.api.v1.endpoints import auth, webdav, dashboard, books, highlights, sync, debug, statistics, public
+from backend.app.api.v1.endpoints import auth, webdav, dashboard, books, highlights, sync, debug, statistics, public, devices, ingest, kosync, timezone
 
 api_router = APIRouter()
 
@@ -10,11 +10,15 @@ api_router.include_router(public.router, prefix="/public", tags=["公共接口"]
 # 注册各个模块的路由
 api_router.include_router(auth.router, prefix="/auth", tags=["认证"])
 api_router.include_router(webdav.router, prefix="/settings", tags=["设置"])
+api_router.include_router(kosync.router, prefix="/settings", tags=["设置"])
+api_router.include_router(timezone.router, prefix="/settings", tags=["设置"])
 api_router.include_router(sync.router, prefix="/sync", tags=["数据同步"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["仪表盘"])
 api_router.include_router(statistics.router, prefix="/statistics", tags=["统计分析"])
 api_router.include_router(books.router, prefix="/books", tags=["书籍"])
 api_router.include_router(highlights.router, prefix="/highlights", tags=["标注"])
+api_router.include_router(devices.router, prefix="/devices", tags=["设备"])
+api_router.include_router(ingest.router, prefix="/ingest", tags=["数据推送"])
 
 # 调试端点 - 仅在开发环境中启用
 # api_router.include_router(debug.router, prefix="/debug", tags=["调试"]) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -12,6 +12,7 @@ class Settings(BaseSettings):
     DEBUG: bool = Field(default=True, description="调试模式")
     SECRET_KEY: str = Field(default="your-secret-key-change-this", description="密钥")
     ALLOWED_HOSTS: List[str] = Field(default=["*"], description="允许的主机")
+    DEFAULT_TIMEZONE: str = Field(default="Asia/Shanghai", description="用户未设置时区时使用的默认时区(IANA名称)")
     
     # 数据库配置
     DB_HOST: str = Field(default="localhost", description="数据库主机")
@@ -43,14 +44,82 @@ class Settings(BaseSettings):
     WEBDAV_PASSWORD: Optional[str] = Field(default=None, description="WebDAV密码")
     WEBDAV_BASE_PATH: str = Field(default="/koreader", description="WebDAV基础路径")
     
+    # WebDAV主机限流配置（同一主机的所有用户共享）
+    WEBDAV_RATE_LIMIT_PER_SECOND: float = Field(default=2.0, description="每个WebDAV主机每秒允许的请求数")
+    WEBDAV_RATE_LIMIT_BURST: int = Field(default=5, description="每个WebDAV主机允许的突发请求数")
+    WEBDAV_MAX_RETRIES: int = Field(default=3, description="WebDAV请求被限流或失败时的最大重试次数")
+    WEBDAV_RETRY_BACKOFF_SECONDS: float = Field(default=1.0, description="WebDAV重试的初始退避时间(秒)")
+    WEBDAV_RETRY_MAX_BACKOFF_SECONDS: float = Field(default=60.0, description="WebDAV重试的最大退避时间(秒)")
+    WEBDAV_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5, description="连续失败多少次后暂停该WebDAV主机")
+    WEBDAV_CIRCUIT_RECOVERY_SECONDS: int = Field(default=300, description="WebDAV主机熔断后的暂停时间(秒)")
+    
+    # WebDAV下载配置
+    WEBDAV_DOWNLOAD_MAX_RESUMES: int = Field(default=5, description="下载中断后的最大续传次数")
+    WEBDAV_DOWNLOAD_SEGMENTS: int = Field(default=4, description="大文件并行下载的分段数，1表示不分段")
+    WEBDAV_PARALLEL_DOWNLOAD_MIN_BYTES: int = Field(default=8 * 1024 * 1024, description="启用分段并行下载的最小文件大小(字节)")
+    
+    # 本地目录监听配置（Syncthing等工具镜像的KOReader目录）
+    LOCAL_WATCH_ENABLED: bool = Field(default=False, description="是否启用本地目录监听同步")
+    LOCAL_WATCH_PATHS: Dict[str, str] = Field(default={}, description="用户名到本地监听目录的映射")
+    LOCAL_WATCH_DEBOUNCE_SECONDS: float = Field(default=5.0, description="统计文件停止写入多久后开始导入(秒)")
+    LOCAL_WATCH_POLL_INTERVAL_SECONDS: float = Field(default=10.0, description="轮询模式下的检查间隔(秒)")
+    LOCAL_WATCH_FORCE_POLLING: bool = Field(default=False, description="是否强制使用轮询代替inotify")
+    
+    # 增量推送配置
+    INGEST_BATCH_SIZE: int = Field(default=1000, description="增量推送每批写入的记录数")
+    INGEST_MAX_LINE_BYTES: int = Field(default=64 * 1024, description="增量推送单行NDJSON的最大字节数")
+    DEVICE_KEY_CACHE_TTL_SECONDS: int = Field(default=300, description="设备API密钥认证缓存时间(秒)")
+    DEVICE_KEY_REVALIDATE_SECONDS: float = Field(default=5.0, description="缓存的设备密钥超过此时间(秒)后重新确认未被吊销")
+    
+    # KOReader kosync进度同步配置
+    KOSYNC_ENABLED: bool = Field(default=True, description="是否启用kosync兼容的进度同步接口")
+    KOSYNC_AUTH_CACHE_TTL_SECONDS: int = Field(default=300, description="kosync认证缓存时间(秒)")
+    KOSYNC_AUTH_REVALIDATE_SECONDS: float = Field(default=5.0, description="缓存的kosync认证超过此时间(秒)后重新确认密码未修改")
+    
+    # 书籍搜索建议配置（进程内n-gram索引）
+    BOOK_SUGGEST_CACHE_MAX_MB: int = Field(default=64, description="搜索建议索引缓存的内存上限(MB)，超出时淘汰最久未用的用户")
+    BOOK_SUGGEST_CACHE_TTL_SECONDS: int = Field(default=3600, description="搜索建议索引的过期时间(秒)，多进程部署时其他进程在此之后看到同步结果")
+    
     # 文件存储配置
     UPLOAD_DIR: str = Field(default="./uploads", description="上传目录")
     MAX_FILE_SIZE: int = Field(default=10 * 1024 * 1024, description="最大文件大小(字节)")
     
+    # 统计文件归档配置（按内容哈希保存每次导入的原始文件，用于离线重放）
+    ARCHIVE_ENABLED: bool = Field(default=True, description="是否归档导入的统计文件")
+    ARCHIVE_DIR: str = Field(default="./uploads/archive", description="统计文件归档目录，默认放在上传目录下（容器中为持久化卷）")
+    ARCHIVE_COMPRESSION_LEVEL: int = Field(default=6, description="归档gzip压缩级别(1-9)")
+    ARCHIVE_KEEP_PER_USER: int = Field(default=10, description="每个用户保留的归档文件数量")
+    ARCHIVE_RETENTION_DAYS: int = Field(default=90, description="归档文件保留天数（每个用户最新的文件始终保留）")
+    ARCHIVE_CLEANUP_INTERVAL_HOURS: int = Field(default=24, description="归档清理任务间隔(小时)")
+    
     # 数据同步配置
     SYNC_INTERVAL_MINUTES: int = Field(default=60, description="同步间隔(分钟)")
     SYNC_INTERVAL_HOURS: int = Field(default=6, description="同步间隔(小时)")
     AUTO_SYNC_ENABLED: bool = Field(default=True, description="是否启用自动同步")
+    SYNC_INCREMENTAL_ENABLED: bool = Field(default=False, description="是否增量同步（只导入水位线之后的阅读记录，不处理已删除的书籍）")
+    SYNC_WATERMARK_OVERLAP_SECONDS: int = Field(default=86400, description="增量同步水位线的重叠窗口(秒)")
+    
+    # 数据库维护配置（PostgreSQL）
+    MAINTENANCE_ENABLED: bool = Field(default=True, description="是否启用定期VACUUM/ANALYZE维护任务")
+    MAINTENANCE_INTERVAL_MINUTES: int = Field(default=30, description="维护检查间隔(分钟)")
+    MAINTENANCE_VACUUM_MIN_CHURN_ROWS: int = Field(default=100000, description="同步写入/删除多少行后执行VACUUM")
+    MAINTENANCE_VACUUM_MIN_DEAD_TUPLES: int = Field(default=10000, description="触发VACUUM的最少死元组数")
+    MAINTENANCE_DEAD_TUPLE_RATIO: float = Field(default=0.1, description="触发VACUUM的死元组比例")
+    
+    # 阅读记录分区配置（PostgreSQL，reading_sessions 按 start_time 范围分区）
+    READING_SESSIONS_PARTITION_INTERVAL: str = Field(default="month", description="分区间隔: month 或 year")
+    READING_SESSIONS_PARTITION_PREMAKE: int = Field(default=3, description="提前创建未来多少个分区")
+    READING_SESSIONS_HASH_PARTITIONS: int = Field(default=0, description="每个范围分区再按book_id哈希拆分的子分区数(0或1表示不拆分)")
+    READING_SESSIONS_RETENTION_MONTHS: int = Field(default=0, description="保留最近多少个月的阅读记录，更早的分区整体删除(0表示不删除)")
+    PARTITION_MAINTENANCE_INTERVAL_HOURS: int = Field(default=24, description="分区维护任务执行间隔(小时)")
+    READING_SESSIONS_COMPACT_AFTER_MONTHS: int = Field(default=0, description="早于多少个月的逐页阅读记录压缩为按天汇总和页码位图(0表示不压缩，最少2个月，应小于RETENTION_MONTHS)")
+    READING_SESSIONS_COMPACT_BATCH_SIZE: int = Field(default=20000, description="压缩时每批处理的阅读记录数(按整天划分批次)")
+    
+    # 批量重算配置
+    REPROCESS_WORKERS: int = Field(default=4, description="批量重算并发数（不超过数据库连接池大小）")
+    REPROCESS_MAX_JOBS_PER_MINUTE: float = Field(default=0, description="批量重算每分钟最多开始的用户数(0为不限)")
+    REPROCESS_MAX_ROWS_PER_SECOND: float = Field(default=20000, description="批量重算每秒最多写入的阅读记录数(0为不限)")
+    REPROCESS_CHECKPOINT_PATH: str = Field(default="./data/reprocess_checkpoint.json", description="批量重算检查点文件")
     
     # 加密配置
     ENCRYPTION_KEY: str = Field(default="encryption-key-32-bytes-long!!!", description="加密密钥")
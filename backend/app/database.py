@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from typing import AsyncGenerator
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Any, AsyncGenerator, Dict, List, Sequence
 
 from backend.app.config import settings
 
@@ -28,6 +29,40 @@ class Base(DeclarativeBase):
     pass
 
 
+def dialect_insert(db: AsyncSession):
+    """
+    返回当前数据库方言的insert构造
+    
+    PostgreSQL和SQLite（测试环境）的insert都支持 on_conflict_do_nothing / on_conflict_do_update。
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+# upsert_rows 每条语句写入的行数，避免超出数据库的参数个数上限
+ROWS_PER_UPSERT = 1000
+
+
+async def upsert_rows(
+    db: AsyncSession,
+    model,
+    rows: List[Dict[str, Any]],
+    keys: Sequence[str],
+    columns: Sequence[str]
+) -> None:
+    """按主键批量写入，已存在的行把columns覆盖为新值"""
+    insert = dialect_insert(db)
+    for offset in range(0, len(rows), ROWS_PER_UPSERT):
+        statement = insert(model).values(rows[offset:offset + ROWS_PER_UPSERT])
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={column: statement.excluded[column] for column in columns}
+            )
+        )
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """获取数据库会话 - 依赖注入版本"""
     async with AsyncSessionLocal() as session:
@@ -8,7 +8,9 @@ from pathlib import Path
 
 from backend.app.config import settings
 from backend.app.api.v1.router import api_router
+from backend.app.api.kosync import router as kosync_router
 from backend.app.tasks.scheduler import sync_scheduler
+from backend.app.tasks.local_watcher import local_watcher
 
 
 @asynccontextmanager
@@ -35,12 +37,17 @@ async def lifespan(app: FastAPI):
     if not settings.DEBUG:  # 仅在生产环境启动定时任务
         sync_scheduler.start()
     
+    if settings.LOCAL_WATCH_ENABLED and settings.LOCAL_WATCH_PATHS:
+        local_watcher.start()
+        print(f"📂 本地目录监听已启动 ({local_watcher.mode})")
+    
     print("✅ 应用启动完成")
     yield
     
     # 关闭时执行
     print("🛑 正在关闭应用...")
     sync_scheduler.stop()
+    await local_watcher.stop()
     print("✅ 应用已关闭")
 
 
@@ -76,6 +83,10 @@ app.add_middleware(
 # 注册API路由
 app.include_router(api_router, prefix="/api/v1")
 
+# KOReader kosync兼容的进度同步接口
+if settings.KOSYNC_ENABLED:
+    app.include_router(kosync_router, prefix="/kosync", tags=["kosync进度同步"])
+
 # 获取前端文件路径
 frontend_path = Path(__file__).parent.parent.parent / "frontend"
 
@@ -102,5 +113,6 @@ async def scheduler_status():
     
     return {
         "running": sync_scheduler.is_running,
-        "jobs": sync_scheduler.get_jobs_status()
+        "jobs": sync_scheduler.get_jobs_status(),
+        "local_watcher": local_watcher.get_status()
     } 
\ No newline at end of file
@@ -2,5 +2,12 @@ from .user import User
 from .book import Book
 from .reading_session import ReadingSession
 from .highlight import Highlight
+from .device_api_key import DeviceApiKey
+from .reading_progress import ReadingProgress
+from .statistics_archive import StatisticsArchive
+from .reading_aggregate import ReadingDayAggregate, BookPageBitmap
+from .daily_stats import BookDailyStats, UserDailyStats
+from .book_stats import BookStats
 
-__all__ = ["User", "Book", "ReadingSession", "Highlight"] 
\ No newline at end of file
+__all__ = ["User", "Book", "ReadingSession", "Highlight", "DeviceApiKey", "ReadingProgress", "StatisticsArchive",
+           "ReadingDayAggregate", "BookPageBitmap", "BookDailyStats", "UserDailyStats", "BookStats"] 
\ No newline at end of file
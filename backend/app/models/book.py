@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import String, Integer, ForeignKey, Index
+from sqlalchemy import String, Integer, ForeignKey, Index, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.app.database import Base
@@ -17,6 +18,15 @@ class Book(Base):
     md5: Mapped[Optional[str]] = mapped_column(String(32))  # 用于唯一识别书籍
     total_pages: Mapped[Optional[int]] = mapped_column(Integer)
     cover_image_url: Mapped[Optional[str]] = mapped_column(String(255))
+    series: Mapped[Optional[str]] = mapped_column(String(255))
+    language: Mapped[Optional[str]] = mapped_column(String(64))
+    
+    # KOReader book表中预先汇总的统计（同步时写入，书籍列表和详情直接使用）
+    total_read_time: Mapped[Optional[int]] = mapped_column(Integer)  # 总阅读时长（秒）
+    total_read_pages: Mapped[Optional[int]] = mapped_column(Integer)  # 已读页数
+    last_open: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))  # 最后打开时间
+    highlights_count: Mapped[Optional[int]] = mapped_column(Integer)  # KOReader中的标注数
+    notes_count: Mapped[Optional[int]] = mapped_column(Integer)  # KOReader中的笔记数
     
     # 关系映射
     user: Mapped["User"] = relationship("User", back_populates="books")
@@ -31,6 +41,17 @@ class Book(Base):
     __table_args__ = (
         Index('idx_user_md5', 'user_id', 'md5', unique=True),
         Index('idx_books_user_id', 'user_id'),
+        # 统计查询通过 user_id 关联书籍并按书名/作者分组
+        Index('idx_books_user_covering', 'user_id', 'id', postgresql_include=['title', 'author']),
+        # 书籍列表按书名排序的游标分页
+        Index('idx_books_user_title', 'user_id', 'title', 'id'),
+        # 书名、作者搜索（包含匹配和相似度）使用pg_trgm的三元组GIN索引，只在PostgreSQL上创建
+        Index(
+            'idx_books_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
+        Index(
+            'idx_books_author_trgm', 'author', postgresql_using='gin', postgresql_ops={'author': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
     )
     
     def __repr__(self) -> str:
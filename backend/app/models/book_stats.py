@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, Float, DateTime, ForeignKey, Index, LargeBinary, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.database import Base
+
+
+class BookStats(Base):
+    """每本书的统计汇总，同步涉及的书籍写入后刷新，书籍列表和详情直接关联读取"""
+    
+    __tablename__ = "book_stats"
+    
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # 时长、已读页数、进度和最后阅读时间优先取KOReader book表的汇总值，与书籍列表一致
+    total_reading_time: Mapped[int] = mapped_column(Integer, nullable=False)  # 总阅读时长（秒）
+    read_pages_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    reading_progress: Mapped[float] = mapped_column(Float, nullable=False)  # 阅读进度百分比
+    avg_reading_speed: Mapped[float] = mapped_column(Float, nullable=False)  # 页/小时
+    sessions_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    highlights_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    first_read_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    last_read_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    # 读过的全部页码（各天位图的并集），书籍详情的已读页码直接由此展开
+    pages_bitmap: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_book_stats_user_id', 'user_id'),
+        # 书籍列表按最近阅读排序的游标分页；SQLite的索引不支持 NULLS LAST，只在PostgreSQL上创建
+        Index(
+            'idx_book_stats_user_last_read', 'user_id', text('last_read_time DESC NULLS LAST'), text('book_id DESC')
+        ).ddl_if(dialect='postgresql'),
+        # 按阅读时长、进度排序（倒序扫描）和按阅读状态筛选
+        Index('idx_book_stats_user_time', 'user_id', 'total_reading_time', 'book_id'),
+        Index('idx_book_stats_user_progress', 'user_id', 'reading_progress', 'book_id'),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<BookStats(book_id={self.book_id}, total_reading_time={self.total_reading_time})>"
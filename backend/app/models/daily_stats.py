@@ -0,0 +1,46 @@
+from datetime import date, datetime
+from sqlalchemy import Integer, Date, DateTime, ForeignKey, Index, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.database import Base
+
+
+class BookDailyStats(Base):
+    """按 (书籍, 本地日期) 汇总的阅读统计，同步写入阅读记录时按涉及的日期增量更新"""
+    
+    __tablename__ = "book_daily_stats"
+    
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    local_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    duration: Mapped[int] = mapped_column(Integer, nullable=False)  # 当天阅读时长（秒）
+    session_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    pages_count: Mapped[int] = mapped_column(Integer, nullable=False)  # 当天读过的不同页数
+    first_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # 当天读过的页码位图，跨多天的去重页数取各天位图的并集
+    pages_bitmap: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_book_daily_stats_user_date', 'user_id', 'local_date',
+              postgresql_include=['book_id', 'duration', 'session_count', 'pages_count']),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<BookDailyStats(book_id={self.book_id}, local_date={self.local_date}, duration={self.duration})>"
+
+
+class UserDailyStats(Base):
+    """按 (用户, 本地日期) 汇总的阅读统计，由当天各书籍的 book_daily_stats 相加得到"""
+    
+    __tablename__ = "user_daily_stats"
+    
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    local_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    duration: Mapped[int] = mapped_column(Integer, nullable=False)
+    session_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    pages_count: Mapped[int] = mapped_column(Integer, nullable=False)  # 当天读过的不同 (书籍, 页码) 数
+    books_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<UserDailyStats(user_id={self.user_id}, local_date={self.local_date}, duration={self.duration})>"
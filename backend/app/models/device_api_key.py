@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
+
+from backend.app.database import Base
+
+
+class DeviceApiKey(Base):
+    """设备API密钥模型（用于阅读设备和脚本推送数据）"""
+    
+    __tablename__ = "device_api_keys"
+    
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)  # 设备名称，例如 Kindle / 脚本
+    key_prefix: Mapped[str] = mapped_column(String(16), nullable=False)  # 密钥前几位，便于用户辨认
+    key_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # 密钥的SHA-256，不保存明文
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    
+    # 关系映射
+    user: Mapped["User"] = relationship("User", back_populates="device_api_keys")
+    
+    __table_args__ = (
+        Index('idx_device_api_keys_hash', 'key_hash', unique=True),
+        Index('idx_device_api_keys_user_id', 'user_id'),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<DeviceApiKey(id={self.id}, user_id={self.user_id}, name='{self.name}')>"
@@ -13,6 +13,7 @@ class Highlight(Base):
     
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
     book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)  # 冗余自books.user_id，按用户统计时无需关联books
     text: Mapped[str] = mapped_column(Text, nullable=False)  # 高亮内容
     note: Mapped[Optional[str]] = mapped_column(Text)  # 笔记内容，可以为空
     chapter: Mapped[Optional[str]] = mapped_column(String(255))
@@ -26,6 +27,7 @@ class Highlight(Base):
     __table_args__ = (
         Index('idx_book_page_created', 'book_id', 'page', 'created_time', unique=True),
         Index('idx_highlights_book_id', 'book_id'),
+        Index('idx_highlights_user_id', 'user_id'),
     )
     
     def __repr__(self) -> str:
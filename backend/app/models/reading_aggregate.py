@@ -0,0 +1,49 @@
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import Integer, Date, DateTime, ForeignKey, Index, JSON, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.database import Base
+
+
+class ReadingDayAggregate(Base):
+    """按 (书籍, 本地日期) 汇总的历史阅读记录，由超过保留期的 reading_sessions 压缩而来"""
+    
+    __tablename__ = "reading_day_aggregates"
+    
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    local_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    duration: Mapped[int] = mapped_column(Integer, nullable=False)  # 当天总阅读时长（秒）
+    session_count: Mapped[int] = mapped_column(Integer, nullable=False)  # 压缩前的记录数
+    first_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    hour_counts: Mapped[List[int]] = mapped_column(JSON, nullable=False)  # 按本地小时的记录数，长度24
+    pages_bitmap: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)  # 当天读过的页码位图
+    
+    __table_args__ = (
+        Index('idx_day_aggregates_user_date', 'user_id', 'local_date',
+              postgresql_include=['book_id', 'duration', 'session_count']),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<ReadingDayAggregate(book_id={self.book_id}, local_date={self.local_date}, duration={self.duration})>"
+
+
+class BookPageBitmap(Base):
+    """每本书在压缩截止日期之前读过的全部页码（各天位图的并集），书籍地图和已读页数直接使用"""
+    
+    __tablename__ = "book_page_bitmaps"
+    
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    pages_bitmap: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # 早于该本地日期的阅读记录都已压缩，之后再收到这些日期的记录直接丢弃
+    compacted_before: Mapped[Optional[date]] = mapped_column(Date)
+    
+    __table_args__ = (
+        Index('idx_page_bitmaps_user_id', 'user_id'),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<BookPageBitmap(book_id={self.book_id}, compacted_before={self.compacted_before})>"
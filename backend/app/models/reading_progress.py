@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Text, Float, ForeignKey, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.database import Base
+
+
+class ReadingProgress(Base):
+    """阅读进度模型（KOReader kosync协议同步的最新进度，每个用户每个文档一行）"""
+    
+    __tablename__ = "reading_progress"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    document: Mapped[str] = mapped_column(String(255), nullable=False)  # KOReader文档标识（通常为md5）
+    progress: Mapped[Optional[str]] = mapped_column(Text)  # 页码或xpointer
+    percentage: Mapped[Optional[float]] = mapped_column(Float)
+    device: Mapped[Optional[str]] = mapped_column(String(255))
+    device_id: Mapped[Optional[str]] = mapped_column(String(255))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_progress_user_document', 'user_id', 'document', unique=True),
+        Index('idx_progress_user_updated', 'user_id', 'updated_at'),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<ReadingProgress(user_id={self.user_id}, document='{self.document}', percentage={self.percentage})>"
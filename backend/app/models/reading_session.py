@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
-from sqlalchemy import Integer, ForeignKey, DateTime, Index, BigInteger
+from sqlalchemy import Integer, SmallInteger, Date, ForeignKey, DateTime, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.app.database import Base
@@ -11,22 +11,33 @@ class ReadingSession(Base):
     
     __tablename__ = "reading_sessions"
     
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
+    # 字段按对齐宽度从大到小排列（8/4/2字节），避免行内填充
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), nullable=False)
     page: Mapped[int] = mapped_column(Integer, nullable=False)
-    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
-    duration: Mapped[int] = mapped_column(Integer, nullable=False)  # 阅读持续时长（秒）
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)  # 冗余自books.user_id，按用户统计时无需关联books
+    # 按用户时区换算的本地日期和小时，写入时计算，按天/按小时统计时直接分组
+    local_date: Mapped[date] = mapped_column(Date, nullable=False)
     total_pages_at_time: Mapped[Optional[int]] = mapped_column(Integer)  # 阅读时书籍的总页数
+    duration: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # 阅读持续时长（秒），写入时截断到SMALLINT范围
+    local_hour: Mapped[int] = mapped_column(SmallInteger, nullable=False)
     
     # 关系映射
     book: Mapped["Book"] = relationship("Book", back_populates="reading_sessions")
     
-    # 创建联合唯一索引防止重复记录
     __table_args__ = (
-        Index('idx_book_page_time', 'book_id', 'page', 'start_time', unique=True),
-        Index('idx_sessions_book_id', 'book_id'),
-        Index('idx_sessions_start_time', 'start_time'),
+        # 没有代理主键：(book_id, page, start_time) 本身唯一，直接作为主键（包含分区键start_time），
+        # 同时用于防止重复记录、按book_id查找和外键级联删除
+        PrimaryKeyConstraint('book_id', 'page', 'start_time', name='reading_sessions_pkey'),
+        # 统计查询按书籍和时间范围聚合时长/页码，覆盖索引使其可以只扫描索引
+        Index('idx_sessions_book_time_covering', 'book_id', 'start_time',
+              postgresql_include=['page', 'duration']),
+        Index('idx_sessions_user_time', 'user_id', 'start_time',
+              postgresql_include=['book_id', 'page', 'duration']),
+        Index('idx_sessions_user_local_date', 'user_id', 'local_date',
+              postgresql_include=['local_hour', 'book_id', 'page', 'duration']),
+        {'postgresql_partition_by': 'RANGE (start_time)'},
     )
     
     def __repr__(self) -> str:
-        return f"<ReadingSession(id={self.id}, book_id={self.book_id}, page={self.page}, duration={self.duration})>" 
\ No newline at end of file
+        return f"<ReadingSession(book_id={self.book_id}, page={self.page}, start_time={self.start_time}, duration={self.duration})>" 
\ No newline at end of file
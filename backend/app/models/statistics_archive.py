@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, BigInteger, ForeignKey, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from backend.app.database import Base
+
+
+class StatisticsArchive(Base):
+    """统计文件归档记录（文件内容按SHA-256存放在本地归档目录，同一内容只存一份）"""
+    
+    __tablename__ = "statistics_archives"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)  # 原始文件内容哈希，即归档文件名
+    source_path: Mapped[Optional[str]] = mapped_column(String(1024))  # WebDAV远程路径或本地监听路径
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    compressed_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    
+    __table_args__ = (
+        Index('idx_archive_user_sha256', 'user_id', 'sha256', unique=True),
+        Index('idx_archive_user_archived_at', 'user_id', 'archived_at'),
+        Index('idx_archive_sha256', 'sha256'),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<StatisticsArchive(user_id={self.user_id}, sha256='{self.sha256[:12]}')>"
@@ -21,6 +21,12 @@ class User(Base):
     webdav_user_encrypted: Mapped[Optional[str]] = mapped_column(String(255))
     webdav_password_encrypted: Mapped[Optional[str]] = mapped_column(String(255))
     
+    # KOReader kosync认证密钥（md5(密码)的SHA-256）
+    kosync_key_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    
+    # IANA时区名称（例如 Asia/Shanghai），为空时使用 DEFAULT_TIMEZONE
+    timezone: Mapped[Optional[str]] = mapped_column(String(64))
+    
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
         server_default=func.now(),
@@ -29,6 +35,9 @@ class User(Base):
     
     # 关系映射
     books: Mapped[List["Book"]] = relationship("Book", back_populates="user", cascade="all, delete-orphan")
+    device_api_keys: Mapped[List["DeviceApiKey"]] = relationship(
+        "DeviceApiKey", back_populates="user", cascade="all, delete-orphan"
+    )
     
     def __repr__(self) -> str:
         return f"<User(id={self.id}, username='{self.username}')>" 
\ No newline at end of file
@@ -13,25 +13,46 @@ class BookResponse(BaseModel):
     reading_progress: float = Field(0.0, description="阅读进度百分比", ge=0, le=100)
     total_reading_time: int = Field(0, description="总阅读时长（秒）", ge=0)
     last_read_time: Optional[datetime] = Field(None, description="最后阅读时间")
+    first_read_time: Optional[datetime] = Field(None, description="首次阅读时间")
+    avg_reading_speed: float = Field(0.0, description="平均阅读速度（页/小时）", ge=0)
     md5: Optional[str] = Field(None, description="文件MD5标识符")
+    series: Optional[str] = Field(None, description="系列")
+    language: Optional[str] = Field(None, description="语言")
+    read_pages_count: int = Field(0, description="已读页数", ge=0)
+    highlights_count: int = Field(0, description="标注数量", ge=0)
+    notes_count: int = Field(0, description="笔记数量", ge=0)
 
 
 class BookDetail(BookResponse):
     """书籍详情模型"""
     read_pages: List[int] = Field(default=[], description="已读页码数组")
-    read_pages_count: int = Field(0, description="已读页数", ge=0)
     reading_sessions_count: int = Field(0, description="阅读会话数量", ge=0)
-    highlights_count: int = Field(0, description="标注数量", ge=0)
     created_at: Optional[datetime] = Field(None, description="创建时间")
 
 
 class BookList(BaseModel):
     """书籍列表响应模型"""
     books: List[BookResponse] = Field(default=[], description="书籍列表")
-    total: int = Field(0, description="总数量", ge=0)
-    page: int = Field(1, description="当前页码", ge=1)
+    total: Optional[int] = Field(0, description="总数量（不要求计数时为空）", ge=0)
+    page: Optional[int] = Field(1, description="当前页码（游标分页时为空）", ge=1)
     page_size: int = Field(10, description="每页数量", ge=1)
-    total_pages: int = Field(0, description="总页数", ge=0)
+    total_pages: Optional[int] = Field(0, description="总页数（不要求计数时为空）", ge=0)
+    next_cursor: Optional[str] = Field(None, description="下一页的游标，没有下一页时为空")
+    has_more: bool = Field(False, description="是否还有下一页")
+
+
+class BookSuggestion(BaseModel):
+    """书籍搜索建议"""
+    id: int = Field(..., description="书籍ID")
+    title: str = Field(..., description="书籍标题")
+    author: Optional[str] = Field(None, description="作者")
+    series: Optional[str] = Field(None, description="系列")
+
+
+class BookSuggestList(BaseModel):
+    """书籍搜索建议列表响应模型"""
+    query: str = Field(..., description="搜索关键词")
+    suggestions: List[BookSuggestion] = Field(default=[], description="匹配的书籍")
 
 
 class BookCreate(BaseModel):
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class DeviceKeyCreate(BaseModel):
+    """设备密钥创建模型"""
+    name: str = Field(..., min_length=1, max_length=100, description="设备名称")
+
+
+class DeviceKeyResponse(BaseModel):
+    """设备密钥响应模型（不包含明文密钥）"""
+    id: int = Field(..., description="密钥ID")
+    name: str = Field(..., description="设备名称")
+    key_prefix: str = Field(..., description="密钥前缀")
+    created_at: datetime = Field(..., description="创建时间")
+    last_used_at: Optional[datetime] = Field(None, description="最后使用时间")
+    
+    class Config:
+        from_attributes = True
+
+
+class DeviceKeyCreated(DeviceKeyResponse):
+    """设备密钥创建结果（明文密钥只返回这一次）"""
+    api_key: str = Field(..., description="明文API密钥，请妥善保存")
@@ -0,0 +1,13 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class PageStatsIngestResponse(BaseModel):
+    """增量推送结果模型"""
+    received: int = Field(..., description="收到的记录数", ge=0)
+    inserted: int = Field(..., description="新写入的记录数", ge=0)
+    duplicates: int = Field(..., description="已存在而被忽略的记录数", ge=0)
+    invalid: int = Field(..., description="格式无效的记录数", ge=0)
+    unknown_book: int = Field(..., description="找不到对应书籍(md5)的记录数", ge=0)
+    expired: int = Field(default=0, description="早于保留期(READING_SESSIONS_RETENTION_MONTHS)而被丢弃的记录数", ge=0)
+    errors: List[str] = Field(default=[], description="部分错误明细")
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class KosyncCredentials(BaseModel):
+    """kosync同步密码设置模型"""
+    password: str = Field(..., min_length=1, max_length=255, description="KOReader进度同步使用的密码")
+
+
+class KosyncProgressUpdate(BaseModel):
+    """KOReader上报的阅读进度（kosync协议格式）"""
+    document: Optional[str] = Field(None, max_length=255, description="文档标识")
+    progress: Optional[str] = Field(None, description="页码或xpointer")
+    percentage: Optional[float] = Field(None, description="阅读百分比(0-1)")
+    device: Optional[str] = Field(None, max_length=255, description="设备名称")
+    device_id: Optional[str] = Field(None, max_length=255, description="设备ID")
+
+
+class ReadingProgressResponse(BaseModel):
+    """阅读进度响应模型"""
+    document: str = Field(..., description="文档标识")
+    progress: Optional[str] = Field(None, description="页码或xpointer")
+    percentage: Optional[float] = Field(None, description="阅读百分比(0-1)")
+    device: Optional[str] = Field(None, description="设备名称")
+    device_id: Optional[str] = Field(None, description="设备ID")
+    updated_at: datetime = Field(..., description="更新时间")
+    book_id: Optional[int] = Field(None, description="匹配到的书籍ID")
+    book_title: Optional[str] = Field(None, description="匹配到的书名")
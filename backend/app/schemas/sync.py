@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
@@ -16,6 +17,23 @@ class SyncResponse(BaseModel):
     remote_path: Optional[str] = Field(None, description="使用的远程文件路径")
 
 
+class ReplayRequest(BaseModel):
+    """归档重放请求模型"""
+    sha256: Optional[str] = Field(None, min_length=64, max_length=64, description="归档文件哈希，如果为空则使用最新归档")
+
+
+class ArchiveResponse(BaseModel):
+    """统计文件归档响应模型"""
+    sha256: str = Field(..., description="文件内容SHA-256")
+    source_path: Optional[str] = Field(None, description="文件来源路径")
+    size_bytes: int = Field(..., description="原始文件大小")
+    compressed_bytes: int = Field(..., description="压缩后大小")
+    archived_at: datetime = Field(..., description="归档时间")
+    
+    class Config:
+        from_attributes = True
+
+
 class SyncStatusResponse(BaseModel):
     """同步状态响应模型"""
     total_books: int = Field(..., description="总书籍数量")
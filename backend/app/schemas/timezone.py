@@ -0,0 +1,14 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class TimezoneUpdate(BaseModel):
+    """用户时区设置模型"""
+    timezone: Optional[str] = Field(None, max_length=64, description="IANA时区名称，例如 Asia/Shanghai；为空表示使用默认时区")
+
+
+class TimezoneResponse(BaseModel):
+    """用户时区响应模型"""
+    timezone: Optional[str] = Field(None, description="用户设置的时区")
+    effective_timezone: str = Field(..., description="实际生效的时区")
+    sessions_updated: Optional[int] = Field(None, description="重新计算本地日期的阅读记录数")
@@ -0,0 +1,206 @@
+"""
+统计文件归档服务
+
+每次导入的statistics.sqlite3按内容SHA-256压缩保存到本地归档目录（同一内容只存一份），
+数据库中记录 用户 → 文件哈希 的对应关系。修改派生表或修复解析问题后，
+可以直接从归档重放导入，无需重新从WebDAV下载。
+"""
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+
+from backend.app.config import settings
+from backend.app.database import dialect_insert
+from backend.app.models.statistics_archive import StatisticsArchive
+from backend.app.services.webdav_service import file_sha256
+
+ARCHIVE_SUFFIX = ".sqlite3.gz"
+
+# 清理时跳过最近写入的归档文件，避免删除尚未写入数据库记录的新文件
+ORPHAN_GRACE_SECONDS = 3600
+
+
+def get_blob_path(sha256: str) -> str:
+    """归档文件路径: <ARCHIVE_DIR>/<哈希前两位>/<哈希>.sqlite3.gz"""
+    return os.path.join(settings.ARCHIVE_DIR, sha256[:2], sha256 + ARCHIVE_SUFFIX)
+
+
+def _store_blob(local_path: str, sha256: str) -> int:
+    """压缩写入归档文件（已存在时直接复用），返回压缩后大小"""
+    blob_path = get_blob_path(sha256)
+    if os.path.exists(blob_path):
+        return os.path.getsize(blob_path)
+    
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as raw, open(local_path, 'rb') as src:
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=settings.ARCHIVE_COMPRESSION_LEVEL, mtime=0) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        # 原子替换，读取方不会看到写了一半的归档
+        os.replace(tmp_path, blob_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return os.path.getsize(blob_path)
+
+
+def _restore_blob(sha256: str, local_path: str) -> None:
+    """解压归档文件到指定路径，并校验内容哈希"""
+    with gzip.open(get_blob_path(sha256), 'rb') as src, open(local_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    if file_sha256(local_path) != sha256:
+        raise ValueError(f"归档文件 {sha256[:12]} 校验失败")
+
+
+def _remove_orphan_blobs(referenced: set) -> Dict[str, int]:
+    """删除不再被任何归档记录引用的文件"""
+    blobs_deleted = 0
+    bytes_freed = 0
+    if not os.path.isdir(settings.ARCHIVE_DIR):
+        return {'blobs_deleted': 0, 'bytes_freed': 0}
+    
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    for entry in os.scandir(settings.ARCHIVE_DIR):
+        if not entry.is_dir():
+            continue
+        for blob in os.scandir(entry.path):
+            if not blob.name.endswith(ARCHIVE_SUFFIX):
+                continue
+            sha256 = blob.name[:-len(ARCHIVE_SUFFIX)]
+            stat = blob.stat()
+            if sha256 in referenced or stat.st_mtime > cutoff:
+                continue
+            os.remove(blob.path)
+            blobs_deleted += 1
+            bytes_freed += stat.st_size
+    return {'blobs_deleted': blobs_deleted, 'bytes_freed': bytes_freed}
+
+
+class ArchiveService:
+    """统计文件归档服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def archive_file(
+        self,
+        user_id: int,
+        local_path: str,
+        source_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        归档一个统计文件
+        
+        Args:
+            user_id: 用户ID
+            local_path: 本地文件路径（调用方负责其生命周期）
+            source_path: 文件来源路径
+        
+        Returns:
+            归档信息: sha256 / size_bytes / compressed_bytes
+        """
+        sha256 = await asyncio.to_thread(file_sha256, local_path)
+        compressed_bytes = await asyncio.to_thread(_store_blob, local_path, sha256)
+        size_bytes = os.path.getsize(local_path)
+        
+        # 同一用户重复导入相同内容时只刷新归档时间
+        insert = dialect_insert(self.db)
+        stmt = insert(StatisticsArchive).values(
+            user_id=user_id,
+            sha256=sha256,
+            source_path=source_path,
+            size_bytes=size_bytes,
+            compressed_bytes=compressed_bytes,
+            archived_at=datetime.now(timezone.utc)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "sha256"],
+            set_={"source_path": source_path, "archived_at": stmt.excluded.archived_at}
+        )
+        await self.db.execute(stmt)
+        await self.db.commit()
+        
+        return {
+            'sha256': sha256,
+            'size_bytes': size_bytes,
+            'compressed_bytes': compressed_bytes
+        }
+    
+    async def list_archives(self, user_id: int, limit: int = 50) -> List[StatisticsArchive]:
+        """获取用户的归档记录（最新的在前）"""
+        result = await self.db.execute(
+            select(StatisticsArchive)
+            .where(StatisticsArchive.user_id == user_id)
+            .order_by(StatisticsArchive.archived_at.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def get_archive(self, user_id: int, sha256: Optional[str] = None) -> Optional[StatisticsArchive]:
+        """获取用户指定哈希的归档记录，未指定时返回最新一条"""
+        query = select(StatisticsArchive).where(StatisticsArchive.user_id == user_id)
+        if sha256:
+            query = query.where(StatisticsArchive.sha256 == sha256)
+        result = await self.db.execute(query.order_by(StatisticsArchive.archived_at.desc()).limit(1))
+        return result.scalar_one_or_none()
+    
+    async def restore_to_temp(self, sha256: str) -> str:
+        """
+        把归档文件解压到临时文件
+        
+        Returns:
+            临时文件路径，调用方负责删除
+        """
+        if not os.path.exists(get_blob_path(sha256)):
+            raise FileNotFoundError(f"归档文件不存在: {sha256}")
+        
+        fd, local_path = tempfile.mkstemp(prefix="statistics_replay_", suffix=".sqlite3")
+        os.close(fd)
+        try:
+            await asyncio.to_thread(_restore_blob, sha256, local_path)
+        except Exception:
+            os.remove(local_path)
+            raise
+        return local_path
+    
+    async def apply_retention(self) -> Dict[str, int]:
+        """
+        按保留策略清理归档
+        
+        每个用户保留最新的 ARCHIVE_KEEP_PER_USER 个文件，并删除超过 ARCHIVE_RETENTION_DAYS 的文件，
+        但每个用户最新的一个文件始终保留。不再被引用的归档文件随后从磁盘删除。
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+        ranked = select(
+            StatisticsArchive.id,
+            StatisticsArchive.archived_at,
+            func.row_number().over(
+                partition_by=StatisticsArchive.user_id,
+                order_by=StatisticsArchive.archived_at.desc()
+            ).label("rank")
+        ).subquery()
+        result = await self.db.execute(
+            select(ranked.c.id).where(
+                (ranked.c.rank > settings.ARCHIVE_KEEP_PER_USER)
+                | ((ranked.c.rank > 1) & (ranked.c.archived_at < cutoff))
+            )
+        )
+        expired_ids = [row.id for row in result]
+        
+        if expired_ids:
+            await self.db.execute(delete(StatisticsArchive).where(StatisticsArchive.id.in_(expired_ids)))
+            await self.db.commit()
+        
+        result = await self.db.execute(select(StatisticsArchive.sha256).distinct())
+        referenced = {row.sha256 for row in result}
+        blob_stats = await asyncio.to_thread(_remove_orphan_blobs, referenced)
+        
+        return {'records_deleted': len(expired_ids), **blob_stats}
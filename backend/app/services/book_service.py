@@ -1,12 +1,35 @@
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, and_, or_, tuple_, case, Float
 from sqlalchemy.orm import joinedload
 
 from backend.app.models.book import Book
 from backend.app.models.reading_session import ReadingSession
 from backend.app.models.highlight import Highlight
+from backend.app.models.book_stats import BookStats
+from backend.app.models.daily_stats import BookDailyStats
 from backend.app.schemas.book import BookResponse, BookDetail, BookList
+from backend.app.services.book_stats_service import build_book_stats
+from backend.app.services.book_suggest_service import invalidate_book_suggestions
+from backend.app.services.daily_stats_service import DailyStatsService
+from backend.app.utils.cursor import encode_cursor, decode_cursor
+from backend.app.utils.page_bitmap import bitmap_to_pages
+
+# 书籍列表支持的排序方式及排序键所在的列（按ID排序时为空）；
+# 除书名升序外都是降序，排序键相同时按书籍ID同向排序
+BOOK_SORT_COLUMNS = {
+    "id": None,
+    "title": Book.title,
+    "last_read": BookStats.last_read_time,
+    "total_time": BookStats.total_reading_time,
+    "progress": BookStats.reading_progress,
+}
+# relevance 按与搜索关键词的相似度排序，只能和搜索一起使用
+BOOK_SORTS = (*BOOK_SORT_COLUMNS, "relevance")
+# 书籍列表支持的阅读状态筛选
+BOOK_STATUSES = ("unread", "reading", "finished")
+# 进度达到该百分比视为读完（与首页的完成统计一致）
+FINISHED_PROGRESS = 85.0
 
 
 class BookService:
@@ -20,45 +43,79 @@ class BookService:
         user_id: int, 
         skip: int = 0, 
         limit: int = 100,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        sort: str = "id",
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        status: Optional[str] = None
     ) -> BookList:
-        """获取用户书籍列表"""
+        """
+        获取用户书籍列表
+        
+        每页的书籍、统计和总数由同一条语句取得：统计关联book_stats，总数用窗口函数
+        COUNT(*) OVER () 在分页之前计算，整个列表只有一次数据库往返。
+        
+        除skip分页外支持游标分页：每页返回next_cursor，传回cursor时从上一页最后一本书之后
+        继续（此时忽略skip），直接在 (user_id, 排序键, id) 索引上定位，深翻页不再逐行跳过。
+        游标分页只在传入include_total时单独计数；翻页时不需要总数应传include_total=False。
+        按阅读指标排序和按阅读状态筛选都在SQL中基于book_stats完成，只返回当前页的书籍。
+        
+        Args:
+            sort: 排序方式，id（最近添加在前）、title（书名升序）、last_read（最近阅读在前，未读过的在后）、
+                total_time（阅读时长最多在前）、progress（进度最高在前）、relevance（与搜索关键词最相关的在前）
+            status: 阅读状态筛选，unread（未读）、reading（在读）、finished（读完），为空时不筛选
+        
+        Raises:
+            ValueError: 排序方式或阅读状态不支持，或游标无效、与排序方式不一致
+        """
+        if sort not in BOOK_SORTS:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        if status is not None and status not in BOOK_STATUSES:
+            raise ValueError(f"不支持的阅读状态: {status}")
+        term = search.strip() if search and search.strip() else None
+        if sort == "relevance" and term is None:
+            raise ValueError("按相关度排序需要搜索关键词")
+        after = decode_cursor(cursor, sort) if cursor else None
+        
         try:
-            # 构建查询条件
-            query = select(Book).where(Book.user_id == user_id)
+            conditions = [Book.user_id == user_id]
             
             # 添加搜索条件
-            if search and search.strip():
-                search_term = f"%{search.strip()}%"
-                query = query.where(
-                    (Book.title.ilike(search_term)) | 
-                    (Book.author.ilike(search_term))
-                )
-            
-            # 获取总数
-            count_query = select(func.count(Book.id)).where(Book.user_id == user_id)
-            if search and search.strip():
-                search_term = f"%{search.strip()}%"
-                count_query = count_query.where(
-                    (Book.title.ilike(search_term)) | 
-                    (Book.author.ilike(search_term))
-                )
-            
-            total_result = await self.db.execute(count_query)
-            total = total_result.scalar() or 0
+            if term:
+                conditions.append(self._search_condition(term, fuzzy=sort == "relevance"))
+            rank = self._search_rank(term) if sort == "relevance" else None
             
-            # 添加排序、分页
-            query = query.order_by(desc(Book.id)).offset(skip).limit(limit)
+            # 书籍、统计和总数，排序后分页；多取一行判断是否还有下一页
+            columns = [Book, BookStats]
+            if rank is not None:
+                columns.append(rank.label('rank'))
+            if include_total and after is None:
+                columns.append(func.count().over().label('total'))
+            query = self._order_books(self._books_query(columns, sort, user_id, status), sort, rank).where(*conditions)
+            if after is not None:
+                query = query.where(self._after_cursor(sort, *after, rank=rank))
+            else:
+                query = query.offset(skip)
+            rows = (await self.db.execute(query.limit(limit + 1))).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
             
-            # 执行查询
-            result = await self.db.execute(query)
-            books = result.scalars().all()
+            total = None
+            if include_total:
+                if rows and after is None:
+                    total = rows[0].total
+                elif after is None and skip == 0:
+                    total = 0
+                else:
+                    # 游标分页，或超出最后一页时没有行承载窗口函数的结果，单独计数
+                    total_result = await self.db.execute(
+                        self._books_query([func.count(Book.id)], sort, user_id, status).where(*conditions)
+                    )
+                    total = total_result.scalar() or 0
             
-            # 为每本书计算统计信息
             book_responses = []
-            for book in books:
-                # 计算阅读进度和统计信息
-                stats = await self._calculate_book_stats(book.id, user_id)
+            for book, stats, *_ in rows:
+                stats = stats or self._empty_book_stats(book)
                 
                 book_response = BookResponse(
                     id=book.id,
@@ -67,24 +124,41 @@ class BookService:
                     total_pages=book.total_pages,
                     cover_image_url=book.cover_image_url,
                     md5=book.md5,
-                    reading_progress=stats["reading_progress"],
-                    total_reading_time=stats["total_reading_time"],
-                    last_read_time=stats["last_read_time"]
+                    series=book.series,
+                    language=book.language,
+                    reading_progress=stats.reading_progress,
+                    total_reading_time=stats.total_reading_time,
+                    last_read_time=stats.last_read_time,
+                    first_read_time=stats.first_read_time,
+                    avg_reading_speed=stats.avg_reading_speed,
+                    read_pages_count=stats.read_pages_count,
+                    highlights_count=stats.highlights_count,
+                    notes_count=book.notes_count or 0
                 )
                 book_responses.append(book_response)
             
-            # 计算分页信息
-            total_pages = (total + limit - 1) // limit if limit > 0 else 1
-            current_page = (skip // limit) + 1 if limit > 0 else 1
+            next_cursor = None
+            if has_more:
+                next_cursor = encode_cursor(sort, self._sort_key(sort, rows[-1]), rows[-1][0].id)
+            
+            # 计算分页信息，游标分页没有页码
+            total_pages = None
+            if total is not None:
+                total_pages = (total + limit - 1) // limit if limit > 0 else 1
+            current_page = None
+            if after is None:
+                current_page = (skip // limit) + 1 if limit > 0 else 1
             
             return BookList(
                 books=book_responses,
                 total=total,
                 page=current_page,
                 page_size=limit,
-                total_pages=total_pages
+                total_pages=total_pages,
+                next_cursor=next_cursor,
+                has_more=has_more
             )
-            
+        
         except Exception as e:
             print(f"获取用户书籍列表失败: {e}")
             return BookList(
@@ -95,43 +169,121 @@ class BookService:
                 total_pages=0
             )
     
+    def _books_query(self, columns: list, sort: str, user_id: int, status: Optional[str]):
+        """按排序方式和阅读状态关联统计"""
+        column = BOOK_SORT_COLUMNS.get(sort)
+        query = select(*columns)
+        if status or (column is not None and column.class_ is BookStats):
+            # 每本书在创建的同一事务中写入book_stats，按统计排序或筛选时内连接并按
+            # book_stats.user_id 过滤，以便从 (user_id, 指标, book_id) 索引按顺序读取
+            query = query.join(BookStats, BookStats.book_id == Book.id).where(BookStats.user_id == user_id)
+            if status:
+                query = query.where(self._status_condition(status))
+        else:
+            query = query.outerjoin(BookStats, BookStats.book_id == Book.id)
+        return query
+    
+    def _order_books(self, query, sort: str, rank=None):
+        """按排序方式排序，排序键最后都以书籍ID区分先后，保证顺序唯一"""
+        if sort == "relevance":
+            return query.order_by(rank.desc(), desc(Book.id))
+        column = BOOK_SORT_COLUMNS[sort]
+        if column is None:
+            return query.order_by(desc(Book.id))
+        if sort == "title":
+            return query.order_by(Book.title, Book.id)
+        if sort == "last_read":
+            return query.order_by(column.desc().nulls_last(), desc(Book.id))
+        return query.order_by(column.desc(), desc(Book.id))
+    
+    def _status_condition(self, status: str):
+        """阅读状态：进度达到FINISHED_PROGRESS为读完，其余按有无阅读时长分为在读和未读"""
+        if status == "finished":
+            return BookStats.reading_progress >= FINISHED_PROGRESS
+        if status == "reading":
+            return and_(BookStats.reading_progress < FINISHED_PROGRESS, BookStats.total_reading_time > 0)
+        return and_(BookStats.reading_progress < FINISHED_PROGRESS, BookStats.total_reading_time == 0)
+    
+    def _search_condition(self, term: str, fuzzy: bool):
+        """
+        书名或作者包含关键词（不区分大小写，% 和 _ 按字面匹配）
+        
+        PostgreSQL上由书名、作者的pg_trgm GIN索引加速（关键词不少于3个字符时）；
+        按相关度排序时还匹配与关键词相似的书名和作者（容许错字），SQLite只做包含匹配。
+        """
+        condition = or_(Book.title.icontains(term, autoescape=True), Book.author.icontains(term, autoescape=True))
+        if fuzzy and self._is_postgresql():
+            condition = or_(condition, Book.title.op('%>')(term), Book.author.op('%>')(term))
+        return condition
+    
+    def _search_rank(self, term: str):
+        """
+        书籍与搜索关键词的相关度
+        
+        PostgreSQL用pg_trgm的word_similarity（关键词与书名/作者中最相似的一段的三元组相似度），
+        中文书名没有空格也能按子串计算；SQLite依次按书名相同、书名开头、书名包含、作者包含给出固定分值。
+        """
+        if self._is_postgresql():
+            return func.greatest(
+                func.word_similarity(term, Book.title),
+                func.word_similarity(term, func.coalesce(Book.author, '')),
+                type_=Float
+            )
+        return case(
+            (func.lower(Book.title) == term.lower(), 1.0),
+            (Book.title.istartswith(term, autoescape=True), 0.75),
+            (Book.title.icontains(term, autoescape=True), 0.5),
+            else_=0.25
+        )
+    
+    def _is_postgresql(self) -> bool:
+        """是否为PostgreSQL（可使用pg_trgm）"""
+        return self.db.get_bind().dialect.name == "postgresql"
+    
+    def _after_cursor(self, sort: str, key, book_id: int, rank=None):
+        """游标之后的行：与排序方向一致的 (排序键, ID) 行值比较"""
+        if sort == "relevance":
+            return tuple_(rank, Book.id) < tuple_(key, book_id)
+        column = BOOK_SORT_COLUMNS[sort]
+        if column is None:
+            return Book.id < book_id
+        if sort == "title":
+            return tuple_(column, Book.id) > tuple_(key, book_id)
+        if sort == "last_read":
+            if key is None:
+                # 已进入末尾未读过的部分
+                return and_(column.is_(None), Book.id < book_id)
+            return or_(tuple_(column, Book.id) < tuple_(key, book_id), column.is_(None))
+        return tuple_(column, Book.id) < tuple_(key, book_id)
+    
+    def _sort_key(self, sort: str, row):
+        """一行的排序键（按ID排序时只用ID）"""
+        if sort == "relevance":
+            return row.rank
+        column = BOOK_SORT_COLUMNS[sort]
+        if column is None:
+            return None
+        owner = row[0] if column.class_ is Book else row[1]
+        return getattr(owner, column.key) if owner is not None else None
+    
     async def get_book_detail(self, book_id: int, user_id: int) -> Optional[BookDetail]:
         """获取书籍详情"""
         try:
-            # 查询书籍信息并验证权限
+            # 查询书籍信息并验证权限，统计直接关联book_stats
             result = await self.db.execute(
-                select(Book).where(Book.id == book_id, Book.user_id == user_id)
+                select(Book, BookStats)
+                .outerjoin(BookStats, BookStats.book_id == Book.id)
+                .where(Book.id == book_id, Book.user_id == user_id)
             )
-            book = result.scalar_one_or_none()
+            row = result.first()
             
-            if not book:
+            if not row:
                 return None
+            book, stats = row
+            stats = stats or self._empty_book_stats(book)
             
-            # 获取已读页码数组（去重并排序）
-            pages_result = await self.db.execute(
-                select(ReadingSession.page)
-                .where(ReadingSession.book_id == book_id)
-                .distinct()
-                .order_by(ReadingSession.page)
-            )
-            read_pages = [row.page for row in pages_result]
-            
-            # 计算基础统计信息
-            stats = await self._calculate_book_stats(book_id, user_id)
-            
-            # 获取阅读会话数量
-            sessions_result = await self.db.execute(
-                select(func.count(ReadingSession.id))
-                .where(ReadingSession.book_id == book_id)
-            )
-            sessions_count = sessions_result.scalar() or 0
-            
-            # 获取标注数量
-            highlights_result = await self.db.execute(
-                select(func.count(Highlight.id))
-                .where(Highlight.book_id == book_id)
-            )
-            highlights_count = highlights_result.scalar() or 0
+            # 已读页码数组（升序）
+            read_pages = bitmap_to_pages(stats.pages_bitmap)
             
             return BookDetail(
                 id=book.id,
@@ -140,16 +292,20 @@ class BookService:
                 total_pages=book.total_pages,
                 cover_image_url=book.cover_image_url,
                 md5=book.md5,
-                reading_progress=stats["reading_progress"],
-                total_reading_time=stats["total_reading_time"],
-                last_read_time=stats["last_read_time"],
+                series=book.series,
+                language=book.language,
+                reading_progress=stats.reading_progress,
+                total_reading_time=stats.total_reading_time,
+                last_read_time=stats.last_read_time,
+                first_read_time=stats.first_read_time,
+                avg_reading_speed=stats.avg_reading_speed,
                 read_pages=read_pages,
                 read_pages_count=len(read_pages),
-                reading_sessions_count=sessions_count,
-                highlights_count=highlights_count,
-                created_at=book.created_at
+                reading_sessions_count=stats.sessions_count,
+                highlights_count=stats.highlights_count,
+                notes_count=book.notes_count or 0
             )
-            
+        
         except Exception as e:
             print(f"获取书籍详情失败: {e}")
             return None
@@ -185,64 +341,27 @@ class BookService:
                 await self.db.delete(session)
             
             # 3. 删除书籍记录
+            result = await self.db.execute(
+                select(BookDailyStats.local_date).where(BookDailyStats.book_id == book_id)
+            )
+            book_days = {(book_id, local_date) for local_date in result.scalars()}
             await self.db.delete(book)
+            await self.db.flush()
+            
+            # 4. 重算这本书读过的日期的按天汇总
+            await DailyStatsService(self.db).refresh_days(user_id, book_days)
             
             # 提交事务
             await self.db.commit()
+            invalidate_book_suggestions(user_id)
             
             return True
-            
+        
         except Exception as e:
             print(f"删除书籍失败: {e}")
             await self.db.rollback()
             return False
     
-    async def _calculate_book_stats(self, book_id: int, user_id: int) -> dict:
-        """计算单本书籍的统计信息"""
-        try:
-            # 计算总阅读时长
-            duration_result = await self.db.execute(
-                select(func.sum(ReadingSession.duration))
-                .where(ReadingSession.book_id == book_id)
-            )
-            total_reading_time = int(duration_result.scalar() or 0)
-            
-            # 计算已读页数（去重）
-            pages_result = await self.db.execute(
-                select(func.count(func.distinct(ReadingSession.page)))
-                .where(ReadingSession.book_id == book_id)
-            )
-            read_pages_count = int(pages_result.scalar() or 0)
-            
-            # 获取总页数计算进度
-            book_result = await self.db.execute(
-                select(Book.total_pages).where(Book.id == book_id)
-            )
-            total_pages = book_result.scalar() or 0
-            
-            # 计算阅读进度
-            reading_progress = 0.0
-            if total_pages and total_pages > 0:
-                reading_progress = (read_pages_count / total_pages) * 100
-                reading_progress = min(100.0, max(0.0, reading_progress))  # 限制在0-100之间
-            
-            # 获取最后阅读时间
-            last_read_result = await self.db.execute(
-                select(func.max(ReadingSession.start_time))
-                .where(ReadingSession.book_id == book_id)
-            )
-            last_read_time = last_read_result.scalar()
-            
-            return {
-                "total_reading_time": total_reading_time,
-                "reading_progress": round(reading_progress, 2),
-                "last_read_time": last_read_time
-            }
-            
-        except Exception as e:
-            print(f"计算书籍统计信息失败: {e}")
-            return {
-                "total_reading_time": 0,
-                "reading_progress": 0.0,
-                "last_read_time": None
-            } 
\ No newline at end of file
+    def _empty_book_stats(self, book: Book) -> BookStats:
+        """尚未生成统计汇总的书籍（手动创建、从未同步）按没有阅读记录计算，不写入数据库"""
+        return BookStats(book_id=book.id, user_id=book.user_id, **build_book_stats(book, None, b"", 0))
@@ -0,0 +1,125 @@
+"""
+书籍统计汇总服务
+
+book_stats 为每本书保存总时长、已读页数、进度、记录数、标注数、首末阅读时间和平均速度，
+书籍列表和详情直接关联读取，不再逐本扫描阅读记录。写入阅读记录后按涉及的书籍
+从按天汇总（book_daily_stats）重新计算，每本书的耗时只与读过的天数有关。
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from backend.app.database import upsert_rows
+from backend.app.models.book import Book
+from backend.app.models.book_stats import BookStats
+from backend.app.models.daily_stats import BookDailyStats
+from backend.app.models.highlight import Highlight
+from backend.app.utils.page_bitmap import bitmap_or, bitmap_count
+
+# 每次刷新查询覆盖的书籍数
+BOOKS_PER_QUERY = 500
+
+BOOK_STATS_COLUMNS = (
+    "user_id", "total_reading_time", "read_pages_count", "reading_progress", "avg_reading_speed",
+    "sessions_count", "highlights_count", "first_read_time", "last_read_time", "pages_bitmap",
+)
+
+
+def build_book_stats(book: Any, totals: Optional[Any], pages_bitmap: bytes, highlights: int) -> Dict[str, Any]:
+    """
+    由书籍、按天汇总的合计和已读页码位图计算一本书的统计
+    
+    时长、已读页数和最后阅读时间优先使用同步时写入的KOReader汇总值（Book.total_read_time 等），
+    手动创建或旧数据没有汇总值时使用阅读记录的合计。
+    """
+    total_reading_time = int(totals.duration or 0) if totals else 0
+    read_pages_count = bitmap_count(pages_bitmap)
+    last_read_time = totals.last_start if totals else None
+    if book.total_read_time is not None:
+        total_reading_time = max(book.total_read_time, 0)
+        read_pages_count = book.total_read_pages or 0
+        last_read_time = book.last_open
+    
+    reading_progress = 0.0
+    if book.total_pages and book.total_pages > 0:
+        reading_progress = (read_pages_count / book.total_pages) * 100
+        reading_progress = min(100.0, max(0.0, reading_progress))  # 限制在0-100之间
+    
+    total_hours = total_reading_time / 3600.0
+    return {
+        "total_reading_time": total_reading_time,
+        "read_pages_count": read_pages_count,
+        "reading_progress": round(reading_progress, 2),
+        "avg_reading_speed": round(read_pages_count / total_hours, 2) if total_hours > 0 else 0.0,
+        "sessions_count": int(totals.session_count or 0) if totals else 0,
+        # 没有导入标注内容时使用KOReader记录的标注数
+        "highlights_count": highlights or book.highlights_count or 0,
+        "first_read_time": totals.first_start if totals else None,
+        "last_read_time": last_read_time,
+        "pages_bitmap": pages_bitmap,
+    }
+
+
+class BookStatsService:
+    """书籍统计汇总服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def refresh_books(self, user_id: int, book_ids: Iterable[int]) -> int:
+        """
+        重新计算用户指定书籍的统计汇总（调用方负责提交）
+        
+        Returns:
+            刷新的书籍数
+        """
+        book_ids = sorted(set(book_ids))
+        for offset in range(0, len(book_ids), BOOKS_PER_QUERY):
+            await self._refresh_chunk(user_id, book_ids[offset:offset + BOOKS_PER_QUERY])
+        return len(book_ids)
+    
+    async def _refresh_chunk(self, user_id: int, book_ids: List[int]) -> None:
+        """刷新一批书籍的统计汇总"""
+        result = await self.db.execute(
+            select(Book).where(Book.user_id == user_id, Book.id.in_(book_ids))
+        )
+        books = result.scalars().all()
+        
+        result = await self.db.execute(
+            select(
+                BookDailyStats.book_id,
+                func.sum(BookDailyStats.duration).label('duration'),
+                func.sum(BookDailyStats.session_count).label('session_count'),
+                func.min(BookDailyStats.first_start).label('first_start'),
+                func.max(BookDailyStats.last_start).label('last_start')
+            )
+            .where(BookDailyStats.book_id.in_(book_ids))
+            .group_by(BookDailyStats.book_id)
+        )
+        totals = {row.book_id: row for row in result}
+        
+        # 各天的页码位图按书取并集
+        result = await self.db.execute(
+            select(BookDailyStats.book_id, BookDailyStats.pages_bitmap)
+            .where(BookDailyStats.book_id.in_(book_ids))
+        )
+        bitmaps: Dict[int, bytes] = {}
+        for row in result:
+            bitmaps[row.book_id] = bitmap_or(bitmaps.get(row.book_id), row.pages_bitmap)
+        
+        result = await self.db.execute(
+            select(Highlight.book_id, func.count(Highlight.id).label('highlights'))
+            .where(Highlight.book_id.in_(book_ids))
+            .group_by(Highlight.book_id)
+        )
+        highlights = {row.book_id: row.highlights for row in result}
+        
+        rows = [
+            {
+                "book_id": book.id,
+                "user_id": user_id,
+                **build_book_stats(book, totals.get(book.id), bitmaps.get(book.id, b""), highlights.get(book.id, 0)),
+            }
+            for book in books
+        ]
+        await upsert_rows(self.db, BookStats, rows, ["book_id"], BOOK_STATS_COLUMNS)
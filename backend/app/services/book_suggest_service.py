@@ -0,0 +1,116 @@
+"""
+书籍搜索建议服务
+
+输入时的搜索建议不经过数据库：每个用户的书名、作者、系列在第一次请求时载入并建立
+n-gram索引（见 utils/ngram_index.py），之后的请求直接在进程内存中查找。
+索引按最近使用顺序保留，总占用超过 BOOK_SUGGEST_CACHE_MAX_MB 时淘汰最久未用的用户；
+同步或删除书籍后失效，下次请求时重建。
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from backend.app.config import settings
+from backend.app.models.book import Book
+from backend.app.schemas.book import BookSuggestion, BookSuggestList
+from backend.app.utils.ngram_index import IndexedBook, NgramIndex
+
+
+class SuggestIndexCache:
+    """
+    按用户缓存n-gram索引，按估算的内存占用做LRU淘汰
+    
+    多个worker进程各自缓存，其他进程的同步只能靠过期时间感知，因此条目另有TTL。
+    只在事件循环线程中使用，不做加锁。
+    """
+    
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.total_bytes = 0
+        self._data: "OrderedDict[int, Tuple[NgramIndex, float]]" = OrderedDict()
+        # 每次失效加一；建索引期间发生失效时丢弃建好的旧索引
+        self._generations: Dict[int, int] = {}
+    
+    def get(self, user_id: int) -> Optional[NgramIndex]:
+        entry = self._data.get(user_id)
+        if entry is None:
+            return None
+        index, expires_at = entry
+        if expires_at < time.monotonic():
+            self._remove(user_id)
+            return None
+        self._data.move_to_end(user_id)
+        return index
+    
+    def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, 0)
+    
+    def set(self, user_id: int, index: NgramIndex, generation: int) -> None:
+        """保存索引；取数据之后已失效的不保存，单个超过上限的也不保存"""
+        if generation != self.generation(user_id) or index.size_bytes > self.max_bytes:
+            return
+        self._remove(user_id)
+        self._data[user_id] = (index, time.monotonic() + self.ttl_seconds)
+        self.total_bytes += index.size_bytes
+        while self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+    
+    def invalidate(self, user_id: int) -> None:
+        self._generations[user_id] = self.generation(user_id) + 1
+        self._remove(user_id)
+    
+    def clear(self) -> None:
+        self._data.clear()
+        self.total_bytes = 0
+    
+    def _remove(self, user_id: int) -> None:
+        entry = self._data.pop(user_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[0].size_bytes
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_suggest_cache = SuggestIndexCache(
+    settings.BOOK_SUGGEST_CACHE_MAX_MB * 1024 * 1024,
+    settings.BOOK_SUGGEST_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_book_suggestions(user_id: int) -> None:
+    """用户的书籍变化（同步、删除）后使搜索建议索引失效"""
+    _suggest_cache.invalidate(user_id)
+
+
+class BookSuggestService:
+    """书籍搜索建议服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def suggest(self, user_id: int, query: str, limit: int = 10) -> BookSuggestList:
+        """按书名、作者、系列查找搜索建议，索引不在缓存中时先载入用户书籍建立索引"""
+        index = _suggest_cache.get(user_id)
+        if index is None:
+            index = await self._build_index(user_id)
+        
+        suggestions = [
+            BookSuggestion(id=book.id, title=book.title, author=book.author, series=book.series)
+            for book in index.search(query, limit)
+        ]
+        return BookSuggestList(query=query, suggestions=suggestions)
+    
+    async def _build_index(self, user_id: int) -> NgramIndex:
+        """载入用户全部书籍的书名、作者、系列并建立索引"""
+        generation = _suggest_cache.generation(user_id)
+        result = await self.db.execute(
+            select(Book.id, Book.title, Book.author, Book.series).where(Book.user_id == user_id)
+        )
+        index = NgramIndex(IndexedBook(*row) for row in result)
+        _suggest_cache.set(user_id, index, generation)
+        return index
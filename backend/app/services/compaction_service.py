@@ -0,0 +1,235 @@
+"""
+阅读记录压缩服务
+
+多年的逐页记录中，早于去年的部分除书籍地图外几乎不再按页读取。早于
+READING_SESSIONS_COMPACT_AFTER_MONTHS 的记录按 (书籍, 本地日期) 汇总到 reading_day_aggregates，
+读过的页码并入 book_page_bitmaps，然后分批删除原始记录，热表只保留近期数据。
+统计接口同时读取原始记录和汇总，结果与压缩前一致。
+
+同一本书同一天的记录总是整体压缩：每批由若干个完整的本地日期组成，
+汇总写入和原始记录删除在同一个事务中提交，任何时刻 (书籍, 日期) 只存在于其中一边。
+"""
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+
+from backend.app.config import settings
+from backend.app.models.reading_aggregate import ReadingDayAggregate, BookPageBitmap
+from backend.app.models.reading_session import ReadingSession
+from backend.app.models.user import User
+from backend.app.services.maintenance_service import record_table_churn
+from backend.app.utils.page_bitmap import pages_to_bitmap, bitmap_or
+from backend.app.utils.partitioning import add_months, partition_floor
+
+
+# 至少保留两个整月的原始记录：压缩后再收到的这些日期的记录会被丢弃，给晚同步的设备留出足够的时间
+MIN_COMPACT_AFTER_MONTHS = 2
+
+
+def compaction_cutoff(now: Optional[datetime] = None) -> Optional[date]:
+    """压缩截止日期：早于该本地日期的记录需要压缩，未启用时返回None"""
+    months = settings.READING_SESSIONS_COMPACT_AFTER_MONTHS
+    if months <= 0:
+        return None
+    months = max(months, MIN_COMPACT_AFTER_MONTHS)
+    now = now or datetime.now(timezone.utc)
+    return add_months(partition_floor(now, "month"), -months).date()
+
+
+def iter_day_batches(day_counts: Sequence[Tuple[date, int]], batch_size: int) -> Iterator[Tuple[date, date]]:
+    """把 (日期, 记录数) 按整天划分为记录数约为batch_size的批次，返回每批的首末日期"""
+    first, rows = None, 0
+    for day, count in day_counts:
+        if first is None:
+            first = day
+        rows += count
+        if rows >= batch_size:
+            yield first, day
+            first, rows = None, 0
+    if first is not None:
+        yield first, day_counts[-1][0]
+
+
+def drop_compacted_rows(rows: List[Dict[str, Any]], compacted_before: Dict[int, date]) -> List[Dict[str, Any]]:
+    """丢弃落在已压缩日期内的待写入记录（这些记录已经计入汇总）"""
+    if not compacted_before:
+        return rows
+    return [
+        row for row in rows
+        if row["book_id"] not in compacted_before or row["local_date"] >= compacted_before[row["book_id"]]
+    ]
+
+
+def fold_sessions(rows) -> Dict[date, Dict[str, Any]]:
+    """把一本书的逐页记录按本地日期汇总"""
+    days: Dict[date, Dict[str, Any]] = {}
+    for row in rows:
+        day = days.get(row.local_date)
+        if day is None:
+            day = days[row.local_date] = {
+                "duration": 0,
+                "session_count": 0,
+                "first_start": row.start_time,
+                "last_start": row.start_time,
+                "hour_counts": [0] * 24,
+                "pages": set(),
+            }
+        day["duration"] += row.duration
+        day["session_count"] += 1
+        day["first_start"] = min(day["first_start"], row.start_time)
+        day["last_start"] = max(day["last_start"], row.start_time)
+        day["hour_counts"][row.local_hour] += 1
+        day["pages"].add(row.page)
+    return days
+
+
+class CompactionService:
+    """阅读记录压缩服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def run_compaction(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """压缩所有用户超过保留期的阅读记录"""
+        cutoff = compaction_cutoff(now)
+        summary = {"enabled": cutoff is not None, "cutoff": cutoff.isoformat() if cutoff else None,
+                   "users": 0, "books": 0, "days": 0, "rows_compacted": 0}
+        if cutoff is None:
+            return summary
+        
+        user_ids = (await self.db.execute(select(User.id).order_by(User.id))).scalars().all()
+        for user_id in user_ids:
+            result = await self.compact_user(user_id, cutoff)
+            if result["rows_compacted"]:
+                summary["users"] += 1
+                for key in ("books", "days", "rows_compacted"):
+                    summary[key] += result[key]
+        
+        record_table_churn('reading_sessions', summary["rows_compacted"])
+        return summary
+    
+    async def compact_user(self, user_id: int, cutoff: date) -> Dict[str, int]:
+        """压缩单个用户本地日期早于cutoff的阅读记录"""
+        result = await self.db.execute(
+            select(ReadingSession.book_id)
+            .where(ReadingSession.user_id == user_id, ReadingSession.local_date < cutoff)
+            .distinct()
+        )
+        book_ids = result.scalars().all()
+        
+        summary = {"books": len(book_ids), "days": 0, "rows_compacted": 0}
+        for book_id in book_ids:
+            days, rows = await self._compact_book(user_id, book_id, cutoff)
+            summary["days"] += days
+            summary["rows_compacted"] += rows
+        return summary
+    
+    async def _compact_book(self, user_id: int, book_id: int, cutoff: date) -> Tuple[int, int]:
+        """按整天分批压缩一本书的记录，返回 (压缩的天数, 删除的记录数)"""
+        # 先登记截止日期：之后同步/推送进来的更早记录直接丢弃，避免与汇总重复计算
+        await self._get_book_bitmap(user_id, book_id, cutoff)
+        await self.db.commit()
+        
+        result = await self.db.execute(
+            select(ReadingSession.local_date, func.count())
+            .where(ReadingSession.book_id == book_id, ReadingSession.local_date < cutoff)
+            .group_by(ReadingSession.local_date)
+            .order_by(ReadingSession.local_date)
+        )
+        day_counts = [tuple(row) for row in result]
+        
+        days_compacted = rows_compacted = 0
+        for first_day, last_day in iter_day_batches(day_counts, settings.READING_SESSIONS_COMPACT_BATCH_SIZE):
+            in_batch = (
+                ReadingSession.book_id == book_id,
+                ReadingSession.local_date >= first_day,
+                ReadingSession.local_date <= last_day,
+            )
+            try:
+                result = await self.db.execute(
+                    select(
+                        ReadingSession.start_time, ReadingSession.page, ReadingSession.duration,
+                        ReadingSession.local_date, ReadingSession.local_hour
+                    ).where(*in_batch)
+                )
+                days = fold_sessions(result)
+                await self._merge_day_aggregates(user_id, book_id, days)
+                
+                book_bitmap = await self._get_book_bitmap(user_id, book_id, cutoff)
+                book_bitmap.pages_bitmap = bitmap_or(
+                    book_bitmap.pages_bitmap, *(pages_to_bitmap(day["pages"]) for day in days.values())
+                )
+                
+                result = await self.db.execute(delete(ReadingSession).where(*in_batch))
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            days_compacted += len(days)
+            rows_compacted += max(result.rowcount or 0, 0)
+        return days_compacted, rows_compacted
+    
+    async def _get_book_bitmap(self, user_id: int, book_id: int, cutoff: date) -> BookPageBitmap:
+        """获取（不存在时创建）书籍的页码位图，并把压缩截止日期推进到cutoff"""
+        book_bitmap = await self.db.get(BookPageBitmap, book_id)
+        if book_bitmap is None:
+            book_bitmap = BookPageBitmap(book_id=book_id, user_id=user_id, pages_bitmap=b"")
+            self.db.add(book_bitmap)
+        if book_bitmap.compacted_before is None or book_bitmap.compacted_before < cutoff:
+            book_bitmap.compacted_before = cutoff
+        return book_bitmap
+    
+    async def _merge_day_aggregates(self, user_id: int, book_id: int, days: Dict[date, Dict[str, Any]]) -> None:
+        """写入按天汇总，已有同一天的汇总（截止日期登记前到达的记录）时合并"""
+        result = await self.db.execute(
+            select(ReadingDayAggregate).where(
+                ReadingDayAggregate.book_id == book_id,
+                ReadingDayAggregate.local_date.in_(list(days))
+            )
+        )
+        existing = {aggregate.local_date: aggregate for aggregate in result.scalars()}
+        
+        for local_date, day in days.items():
+            pages_bitmap = pages_to_bitmap(day["pages"])
+            aggregate = existing.get(local_date)
+            if aggregate is None:
+                self.db.add(ReadingDayAggregate(
+                    book_id=book_id,
+                    local_date=local_date,
+                    user_id=user_id,
+                    duration=day["duration"],
+                    session_count=day["session_count"],
+                    first_start=day["first_start"],
+                    last_start=day["last_start"],
+                    hour_counts=day["hour_counts"],
+                    pages_bitmap=pages_bitmap,
+                ))
+                continue
+            aggregate.duration += day["duration"]
+            aggregate.session_count += day["session_count"]
+            aggregate.first_start = min(aggregate.first_start, day["first_start"])
+            aggregate.last_start = max(aggregate.last_start, day["last_start"])
+            aggregate.hour_counts = [a + b for a, b in zip(aggregate.hour_counts, day["hour_counts"])]
+            aggregate.pages_bitmap = bitmap_or(aggregate.pages_bitmap, pages_bitmap)
+    
+    async def get_compacted_before(self, book_ids: List[int]) -> Dict[int, date]:
+        """各书籍的压缩截止日期，写入新记录时用于丢弃已压缩日期的记录"""
+        if not book_ids:
+            return {}
+        result = await self.db.execute(
+            select(BookPageBitmap.book_id, BookPageBitmap.compacted_before).where(
+                BookPageBitmap.book_id.in_(book_ids),
+                BookPageBitmap.compacted_before.isnot(None)
+            )
+        )
+        return {row.book_id: row.compacted_before for row in result}
+    
+    async def get_compacted_totals(self, user_id: int) -> Tuple[int, Optional[datetime]]:
+        """用户已压缩的记录数和其中最晚一条记录的时间"""
+        result = await self.db.execute(
+            select(func.sum(ReadingDayAggregate.session_count), func.max(ReadingDayAggregate.last_start))
+            .where(ReadingDayAggregate.user_id == user_id)
+        )
+        sessions, latest = result.one()
+        return int(sessions or 0), latest
@@ -0,0 +1,247 @@
+"""
+按天汇总统计服务
+
+user_daily_stats / book_daily_stats 按本地日期保存阅读时长、记录数、去重页数和书籍数，
+热力图、趋势、连续天数、时间范围统计直接读取汇总，耗时只与天数有关，与翻页记录数无关。
+
+写入阅读记录（同步、推送）时按涉及的 (书籍, 日期) 增量重算：每个 (书籍, 日期) 从原始记录和
+已压缩的按天汇总（reading_day_aggregates）重新汇总，用户当天的汇总再由当天各书籍的汇总相加。
+重算结果只取决于当前数据，重复同步同一批记录不会重复计数。
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, tuple_
+
+from backend.app.database import upsert_rows
+from backend.app.models.daily_stats import BookDailyStats, UserDailyStats
+from backend.app.models.reading_aggregate import ReadingDayAggregate
+from backend.app.models.reading_session import ReadingSession
+from backend.app.services.book_stats_service import BookStatsService
+from backend.app.utils.page_bitmap import pages_to_bitmap, bitmap_or, bitmap_count
+from backend.app.utils.timezones import start_time_bounds
+
+# 每次重算查询覆盖的日期数
+DAYS_PER_QUERY = 92
+
+BOOK_DAY_COLUMNS = ("user_id", "duration", "session_count", "pages_count", "first_start", "last_start", "pages_bitmap")
+USER_DAY_COLUMNS = ("duration", "session_count", "pages_count", "books_count")
+
+
+def touched_days(rows: Iterable[Dict[str, Any]]) -> Set[Tuple[int, date]]:
+    """待写入的阅读记录涉及的 (书籍ID, 本地日期)"""
+    return {(row["book_id"], row["local_date"]) for row in rows}
+
+
+def iter_date_chunks(book_days: Iterable[Tuple[int, date]], size: int) -> Iterator[Tuple[List[date], Set[Tuple[int, date]]]]:
+    """按日期升序把 (书籍, 日期) 划分为每批最多size个日期，返回 (本批日期, 本批的 (书籍, 日期))"""
+    by_date: Dict[date, Set[Tuple[int, date]]] = defaultdict(set)
+    for book_id, local_date in book_days:
+        by_date[local_date].add((book_id, local_date))
+    dates = sorted(by_date)
+    for offset in range(0, len(dates), size):
+        chunk = dates[offset:offset + size]
+        yield chunk, set().union(*(by_date[day] for day in chunk))
+
+
+class DailyStatsService:
+    """按天汇总统计服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def refresh_days(self, user_id: int, book_days: Iterable[Tuple[int, date]]) -> int:
+        """
+        重算指定 (书籍, 日期) 的书籍汇总以及这些日期的用户汇总（调用方负责提交）
+        
+        Returns:
+            重算的日期数
+        """
+        refreshed = 0
+        for dates, chunk_days in iter_date_chunks(book_days, DAYS_PER_QUERY):
+            await self._refresh_book_days(user_id, chunk_days, dates[0], dates[-1])
+            await self._refresh_user_days(user_id, dates)
+            refreshed += len(dates)
+        return refreshed
+    
+    async def rebuild_user(self, user_id: int) -> int:
+        """丢弃并重建用户的全部按天汇总（修改时区后本地日期整体变化时使用，调用方负责提交）"""
+        await self.clear_user(user_id)
+        raw = await self.db.execute(
+            select(ReadingSession.book_id, ReadingSession.local_date)
+            .where(ReadingSession.user_id == user_id)
+            .distinct()
+        )
+        compacted = await self.db.execute(
+            select(ReadingDayAggregate.book_id, ReadingDayAggregate.local_date)
+            .where(ReadingDayAggregate.user_id == user_id)
+        )
+        book_days = {tuple(row) for row in raw} | {tuple(row) for row in compacted}
+        return await self.refresh_days(user_id, book_days)
+    
+    async def refresh_compacted(self, user_id: int, book_ids: Iterable[int]) -> int:
+        """重算指定书籍所有已压缩日期的汇总（全量同步保留已压缩书籍时使用，调用方负责提交）"""
+        result = await self.db.execute(
+            select(ReadingDayAggregate.book_id, ReadingDayAggregate.local_date)
+            .where(ReadingDayAggregate.user_id == user_id, ReadingDayAggregate.book_id.in_(list(book_ids)))
+        )
+        return await self.refresh_days(user_id, {tuple(row) for row in result})
+    
+    async def refresh_before(self, cutoff: datetime) -> int:
+        """重算当天第一条记录早于cutoff的汇总及相应书籍的统计（删除过期分区之后使用，调用方负责提交）"""
+        result = await self.db.execute(
+            select(BookDailyStats.user_id, BookDailyStats.book_id, BookDailyStats.local_date)
+            .where(BookDailyStats.first_start < cutoff)
+        )
+        by_user: Dict[int, Set[Tuple[int, date]]] = defaultdict(set)
+        for row in result:
+            by_user[row.user_id].add((row.book_id, row.local_date))
+        
+        refreshed = 0
+        for user_id, book_days in by_user.items():
+            refreshed += await self.refresh_days(user_id, book_days)
+            await BookStatsService(self.db).refresh_books(user_id, {book_id for book_id, _ in book_days})
+        return refreshed
+    
+    async def clear_user(self, user_id: int) -> None:
+        """删除用户的全部按天汇总（调用方负责提交）"""
+        await self.db.execute(delete(BookDailyStats).where(BookDailyStats.user_id == user_id))
+        await self.db.execute(delete(UserDailyStats).where(UserDailyStats.user_id == user_id))
+    
+    async def _refresh_book_days(
+        self,
+        user_id: int,
+        book_days: Set[Tuple[int, date]],
+        first_day: date,
+        last_day: date
+    ) -> None:
+        """从原始记录和已压缩的汇总重算一批 (书籍, 日期)，已没有任何记录的直接删除"""
+        book_ids = sorted({book_id for book_id, _ in book_days})
+        start_bound, end_bound = start_time_bounds(first_day, last_day)
+        in_scope = (
+            ReadingSession.user_id == user_id,
+            ReadingSession.book_id.in_(book_ids),
+            ReadingSession.local_date >= first_day,
+            ReadingSession.local_date <= last_day,
+            ReadingSession.start_time >= start_bound,
+            ReadingSession.start_time < end_bound,
+        )
+        
+        days: Dict[Tuple[int, date], Dict[str, Any]] = {}
+        result = await self.db.execute(
+            select(
+                ReadingSession.book_id,
+                ReadingSession.local_date,
+                func.sum(ReadingSession.duration).label('duration'),
+                func.count().label('session_count'),
+                func.min(ReadingSession.start_time).label('first_start'),
+                func.max(ReadingSession.start_time).label('last_start')
+            )
+            .where(*in_scope)
+            .group_by(ReadingSession.book_id, ReadingSession.local_date)
+        )
+        for row in result:
+            key = (row.book_id, row.local_date)
+            if key in book_days:
+                days[key] = {
+                    "duration": int(row.duration or 0),
+                    "session_count": int(row.session_count),
+                    "first_start": row.first_start,
+                    "last_start": row.last_start,
+                    "pages_bitmap": b"",
+                }
+        
+        result = await self.db.execute(
+            select(ReadingSession.book_id, ReadingSession.local_date, ReadingSession.page)
+            .where(*in_scope)
+            .distinct()
+        )
+        pages = defaultdict(list)
+        for row in result:
+            pages[(row.book_id, row.local_date)].append(row.page)
+        for key, day in days.items():
+            day["pages_bitmap"] = pages_to_bitmap(pages[key])
+        
+        # 已压缩的日期；压缩和写入交错时同一 (书籍, 日期) 可能两边都有，直接相加
+        result = await self.db.execute(
+            select(ReadingDayAggregate).where(
+                ReadingDayAggregate.book_id.in_(book_ids),
+                ReadingDayAggregate.local_date >= first_day,
+                ReadingDayAggregate.local_date <= last_day
+            )
+        )
+        for aggregate in result.scalars():
+            key = (aggregate.book_id, aggregate.local_date)
+            if key not in book_days:
+                continue
+            day = days.get(key)
+            if day is None:
+                days[key] = {
+                    "duration": aggregate.duration,
+                    "session_count": aggregate.session_count,
+                    "first_start": aggregate.first_start,
+                    "last_start": aggregate.last_start,
+                    "pages_bitmap": aggregate.pages_bitmap,
+                }
+                continue
+            day["duration"] += aggregate.duration
+            day["session_count"] += aggregate.session_count
+            day["first_start"] = min(day["first_start"], aggregate.first_start)
+            day["last_start"] = max(day["last_start"], aggregate.last_start)
+            day["pages_bitmap"] = bitmap_or(day["pages_bitmap"], aggregate.pages_bitmap)
+        
+        rows = [
+            {
+                "book_id": book_id,
+                "local_date": local_date,
+                "user_id": user_id,
+                "pages_count": bitmap_count(day["pages_bitmap"]),
+                **day,
+            }
+            for (book_id, local_date), day in days.items()
+        ]
+        await upsert_rows(self.db, BookDailyStats, rows, ["book_id", "local_date"], BOOK_DAY_COLUMNS)
+        
+        stale = book_days - set(days)
+        if stale:
+            await self.db.execute(
+                delete(BookDailyStats).where(
+                    tuple_(BookDailyStats.book_id, BookDailyStats.local_date).in_(list(stale))
+                )
+            )
+    
+    async def _refresh_user_days(self, user_id: int, dates: List[date]) -> None:
+        """由当天各书籍的汇总相加得到用户的按天汇总"""
+        result = await self.db.execute(
+            select(
+                BookDailyStats.local_date,
+                func.sum(BookDailyStats.duration).label('duration'),
+                func.sum(BookDailyStats.session_count).label('session_count'),
+                func.sum(BookDailyStats.pages_count).label('pages_count'),
+                func.count().label('books_count')
+            )
+            .where(BookDailyStats.user_id == user_id, BookDailyStats.local_date.in_(dates))
+            .group_by(BookDailyStats.local_date)
+        )
+        rows = [
+            {
+                "user_id": user_id,
+                "local_date": row.local_date,
+                "duration": int(row.duration or 0),
+                "session_count": int(row.session_count or 0),
+                "pages_count": int(row.pages_count or 0),
+                "books_count": int(row.books_count),
+            }
+            for row in result
+        ]
+        await upsert_rows(self.db, UserDailyStats, rows, ["user_id", "local_date"], USER_DAY_COLUMNS)
+        
+        stale = set(dates) - {row["local_date"] for row in rows}
+        if stale:
+            await self.db.execute(
+                delete(UserDailyStats).where(
+                    UserDailyStats.user_id == user_id,
+                    UserDailyStats.local_date.in_(list(stale))
+                )
+            )
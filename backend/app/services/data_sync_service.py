@@ -1,16 +1,59 @@
 import os
 import sqlite3
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, List, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, and_, func, delete
 
 from backend.app.models.user import User
 from backend.app.models.book import Book
 from backend.app.models.reading_session import ReadingSession
+from backend.app.models.reading_aggregate import ReadingDayAggregate, BookPageBitmap
+from backend.app.config import settings
+from backend.app.database import dialect_insert
+from backend.app.services.archive_service import ArchiveService
+from backend.app.services.book_stats_service import BookStatsService
+from backend.app.services.book_suggest_service import invalidate_book_suggestions
+from backend.app.services.maintenance_service import record_table_churn
+from backend.app.services.timezone_service import TimezoneService
+from backend.app.services.compaction_service import CompactionService, drop_compacted_rows
+from backend.app.services.daily_stats_service import DailyStatsService, touched_days
+from backend.app.services.partition_service import drop_expired_rows, retention_cutoff
 from backend.app.services.webdav_service import WebDAVService
+from backend.app.utils.page_stats import PageStatColumns, page_stat_query
+
+
+def parse_start_time(value: Any) -> datetime:
+    """
+    将KOReader的start_time（Unix时间戳或ISO字符串）转换为带时区的datetime
+    
+    WebDAV同步和增量推送共用此转换，保证 (book_id, page, start_time) 主键能正确去重。
+    
+    Raises:
+        ValueError: 无法解析时
+    """
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, timezone.utc)
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        # 不带时区的时间按UTC处理，与Unix时间戳一致
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    except (ValueError, TypeError, OSError) as e:
+        raise ValueError(f"无效的时间戳: {value}") from e
+
+
+# book表中可能缺失的字段（依KOReader版本而定），按此顺序读取
+BOOK_OPTIONAL_COLUMNS = (
+    'series', 'language', 'total_read_time', 'total_read_pages', 'last_open', 'highlights', 'notes'
+)
+
+
+def _koreader_text(value: Any) -> Optional[str]:
+    """KOReader用"N/A"表示缺失的系列/语言"""
+    if not value or value == 'N/A':
+        return None
+    return str(value)
 
 
 class DataSyncService:
@@ -20,26 +63,35 @@ class DataSyncService:
         self.db = db
         self.webdav_service = WebDAVService(db)
     
-    def _parse_sqlite_file(self, sqlite_path: str) -> Dict[str, List[Dict[str, Any]]]:
+    def _parse_sqlite_file(self, sqlite_path: str, since: Optional[int] = None) -> Dict[str, Any]:
         """
         解析KOReader的SQLite统计文件
         
+        书籍ID到md5的关联和无效记录的过滤都在SQLite查询中完成，只返回需要写入的阅读记录。
+        
         Args:
             sqlite_path: SQLite文件路径
-            
+            since: 只读取start_time大于该Unix时间戳的阅读记录（增量同步水位线）
+        
         Returns:
-            解析后的数据，包含books和page_stats两个列表
+            解析后的数据: books为书籍列表，page_stats为列式的PageStatColumns
         """
         try:
             conn = sqlite3.connect(sqlite_path)
             cursor = conn.cursor()
             
-            # 解析书籍数据
+            # 解析书籍数据（包括KOReader预先汇总的阅读统计，旧版本文件中缺少的字段按NULL读取）
             books_data = []
             try:
-                cursor.execute("""
-                    SELECT id, title, authors, pages, md5, series, language
+                available_columns = {row[1] for row in cursor.execute("PRAGMA table_info(book)")}
+                optional_columns = ", ".join(
+                    column if column in available_columns else f"NULL AS {column}"
+                    for column in BOOK_OPTIONAL_COLUMNS
+                )
+                cursor.execute(f"""
+                    SELECT id, title, authors, pages, md5, {optional_columns}
                     FROM book
+                    WHERE md5 IS NOT NULL AND md5 <> ''
                 """)
                 for row in cursor.fetchall():
                     books_data.append({
@@ -48,45 +100,30 @@ class DataSyncService:
                         'authors': row[2] or 'Unknown Author',
                         'pages': row[3] or 0,
                         'md5': row[4],
-                        'series': row[5],
-                        'language': row[6]
+                        'series': _koreader_text(row[5]),
+                        'language': _koreader_text(row[6]),
+                        'total_read_time': row[7],
+                        'total_read_pages': row[8],
+                        'last_open': row[9],
+                        'highlights': row[10],
+                        'notes': row[11]
                     })
             except sqlite3.OperationalError as e:
                 print(f"解析book表时出错: {e}")
             
-            # 解析阅读统计数据 - 尝试不同的表名和字段名
-            page_stats_data = []
+            # 解析阅读统计数据 - 按列读取，尝试不同的表名和字段名
+            page_stats_data = PageStatColumns()
             
             # 首先尝试page_stat_data表（真实的KOReader格式）
             try:
-                cursor.execute("""
-                    SELECT id_book, page, start_time, duration, total_pages
-                    FROM page_stat_data
-                """)
-                for row in cursor.fetchall():
-                    page_stats_data.append({
-                        'id_book': row[0],
-                        'page': row[1],
-                        'start_time': row[2],
-                        'duration': row[3],  # 真实KOReader使用duration字段
-                        'total_pages': row[4]
-                    })
+                cursor.execute(*page_stat_query("page_stat_data", "duration", since))
+                page_stats_data = PageStatColumns.from_cursor(cursor)
                 print(f"✅ 从page_stat_data表解析了 {len(page_stats_data)} 条阅读记录")
             except sqlite3.OperationalError:
-                # 如果page_stat_data不存在，尝试page_stat表（旧格式或其他格式）
+                # 如果page_stat_data不存在，尝试page_stat表（旧格式或其他格式，period即duration）
                 try:
-                    cursor.execute("""
-                        SELECT id_book, page, start_time, period, total_pages
-                        FROM page_stat
-                    """)
-                    for row in cursor.fetchall():
-                        page_stats_data.append({
-                            'id_book': row[0],
-                            'page': row[1],
-                            'start_time': row[2],
-                            'duration': row[3],  # 转换period为duration
-                            'total_pages': row[4]
-                        })
+                    cursor.execute(*page_stat_query("page_stat", "period", since))
+                    page_stats_data = PageStatColumns.from_cursor(cursor)
                     print(f"✅ 从page_stat表解析了 {len(page_stats_data)} 条阅读记录")
                 except sqlite3.OperationalError as e:
                     print(f"❌ 解析阅读统计表时出错: {e}")
@@ -99,10 +136,10 @@ class DataSyncService:
                 'books': books_data,
                 'page_stats': page_stats_data
             }
-            
+        
         except Exception as e:
             print(f"解析SQLite文件时出错: {e}")
-            return {'books': [], 'page_stats': []}
+            return {'books': [], 'page_stats': PageStatColumns()}
     
     async def _sync_books(self, user_id: int, books_data: List[Dict[str, Any]]) -> Dict[str, int]:
         """
@@ -111,7 +148,7 @@ class DataSyncService:
         Args:
             user_id: 用户ID
             books_data: 书籍数据列表
-            
+        
         Returns:
             md5到book_id的映射字典
         """
@@ -120,14 +157,29 @@ class DataSyncService:
         for book_data in books_data:
             try:
                 # 提取书籍信息
-                title = book_data.get('title', 'Unknown Title')
-                author = book_data.get('authors', 'Unknown Author')
                 md5 = book_data.get('md5')
-                total_pages = book_data.get('pages')
-                
                 if not md5:
                     continue
                 
+                last_open = book_data.get('last_open')
+                try:
+                    last_open = parse_start_time(last_open) if last_open else None
+                except ValueError:
+                    last_open = None
+                
+                book_fields = {
+                    'title': book_data.get('title', 'Unknown Title'),
+                    'author': book_data.get('authors', 'Unknown Author'),
+                    'series': book_data.get('series'),
+                    'language': book_data.get('language'),
+                    'total_read_time': book_data.get('total_read_time'),
+                    'total_read_pages': book_data.get('total_read_pages'),
+                    'last_open': last_open,
+                    'highlights_count': book_data.get('highlights'),
+                    'notes_count': book_data.get('notes'),
+                }
+                total_pages = book_data.get('pages')
+                
                 # 检查书籍是否已存在
                 result = await self.db.execute(
                     select(Book).where(
@@ -138,8 +190,8 @@ class DataSyncService:
                 
                 if existing_book:
                     # 更新现有书籍信息
-                    existing_book.title = title
-                    existing_book.author = author
+                    for field, value in book_fields.items():
+                        setattr(existing_book, field, value)
                     if total_pages:
                         existing_book.total_pages = total_pages
                     md5_to_book_id[md5] = existing_book.id
@@ -147,15 +199,14 @@ class DataSyncService:
                     # 创建新书籍
                     new_book = Book(
                         user_id=user_id,
-                        title=title,
-                        author=author,
                         md5=md5,
-                        total_pages=total_pages
+                        total_pages=total_pages,
+                        **book_fields
                     )
                     self.db.add(new_book)
                     await self.db.flush()  # 获取生成的ID
                     md5_to_book_id[md5] = new_book.id
-                    
+            
             except Exception as e:
                 print(f"同步书籍数据时出错: {e}")
                 continue
@@ -163,54 +214,89 @@ class DataSyncService:
         # 事务管理由调用方统一处理，这里不进行提交
         return md5_to_book_id
     
-    async def _clear_user_data(self, user_id: int) -> Dict[str, int]:
+    async def _clear_user_data(self, user_id: int, keep_md5s: Optional[set] = None) -> Dict[str, Any]:
         """
         清理用户的所有阅读数据
         
+        已压缩的书籍如果仍在新文件中则保留：只删除其原始阅读记录，书籍ID、按天汇总、页码位图和
+        压缩截止日期不变，重新导入时已压缩日期的记录照常被丢弃。压缩数据在统计文件之外没有副本，
+        删除书籍会连同汇总一起丢失（SQLite不执行外键级联时还会留下孤立的汇总，被复用ID的新书误用）。
+        
         Args:
             user_id: 用户ID
-            
+            keep_md5s: 新文件中的书籍md5，其中已压缩的书籍予以保留
+        
         Returns:
-            清理统计信息
+            清理统计信息，kept_book_ids为保留的已压缩书籍ID
         """
         try:
             # 统计清理前的数据量
-            books_count_result = await self.db.execute(
-                select(func.count(Book.id)).where(Book.user_id == user_id)
+            sessions_count_result = await self.db.execute(
+                select(func.count()).select_from(ReadingSession)
+                .where(ReadingSession.user_id == user_id)
             )
-            books_count = books_count_result.scalar() or 0
+            sessions_count = sessions_count_result.scalar() or 0
             
-            sessions_count_result = await self.db.execute(
-                select(func.count(ReadingSession.id))
-                .join(Book)
+            compacted_result = await self.db.execute(
+                select(Book.id, Book.md5)
+                .join(BookPageBitmap, BookPageBitmap.book_id == Book.id)
                 .where(Book.user_id == user_id)
             )
-            sessions_count = sessions_count_result.scalar() or 0
+            kept_book_ids = [row.id for row in compacted_result if row.md5 in (keep_md5s or ())]
             
-            # 删除用户的所有书籍（reading_sessions会通过外键级联删除）
+            # 删除其余书籍（reading_sessions会通过外键级联删除）
             books_to_delete = await self.db.execute(
-                select(Book).where(Book.user_id == user_id)
+                select(Book).where(Book.user_id == user_id, Book.id.not_in(kept_book_ids))
             )
             books = books_to_delete.scalars().all()
             
             for book in books:
                 await self.db.delete(book)
+            if kept_book_ids:
+                await self.db.execute(delete(ReadingSession).where(ReadingSession.book_id.in_(kept_book_ids)))
+            # 不依赖外键级联，被删除书籍的压缩数据显式删除
+            for model in (ReadingDayAggregate, BookPageBitmap):
+                await self.db.execute(
+                    delete(model).where(model.user_id == user_id, model.book_id.not_in(kept_book_ids))
+                )
+            await DailyStatsService(self.db).clear_user(user_id)
             
-            print(f"🗑️ 清理用户数据: {books_count} 本书籍, {sessions_count} 条阅读记录")
+            print(f"🗑️ 清理用户数据: {len(books)} 本书籍, {sessions_count} 条阅读记录"
+                  f"（保留 {len(kept_book_ids)} 本已压缩的书籍）")
             
             return {
-                'books_cleared': books_count,
-                'sessions_cleared': sessions_count
+                'books_cleared': len(books),
+                'sessions_cleared': sessions_count,
+                'kept_book_ids': kept_book_ids
             }
-            
+        
         except Exception as e:
             print(f"清理用户数据时出错: {e}")
             raise
     
+    async def _get_sessions_watermark(self, user_id: int) -> Optional[int]:
+        """
+        获取增量同步水位线（用户最新阅读记录的Unix时间戳）
+        
+        减去 SYNC_WATERMARK_OVERLAP_SECONDS 的重叠窗口，避免时区或时钟差异漏掉记录；
+        重叠部分由唯一索引去重。
+        """
+        result = await self.db.execute(
+            select(func.max(ReadingSession.start_time))
+            .where(ReadingSession.user_id == user_id)
+        )
+        latest = result.scalar()
+        if latest is None:
+            # 近期记录都已压缩时以汇总中最晚的记录为准
+            _, latest = await CompactionService(self.db).get_compacted_totals(user_id)
+        if latest is None:
+            return None
+        return int(latest.timestamp()) - settings.SYNC_WATERMARK_OVERLAP_SECONDS
+    
     async def _sync_reading_sessions(
         self, 
         user_id: int,
-        page_stats_data: List[Dict[str, Any]], 
+        page_stats_data: PageStatColumns, 
         books_data: List[Dict[str, Any]]
     ) -> int:
         """
@@ -218,89 +304,164 @@ class DataSyncService:
         
         Args:
             user_id: 用户ID
-            page_stats_data: 页面统计数据列表
+            page_stats_data: 列式的页面统计数据
             books_data: 书籍数据列表（包含KOReader原始ID和md5）
-            
+        
         Returns:
             新增的阅读会话数量
         """
-        new_sessions_count = 0
-        
-        # 创建KOReader book_id到md5的映射
-        koreader_id_to_md5 = {}
-        for book_data in books_data:
-            koreader_id = book_data.get('id')
-            md5 = book_data.get('md5')
-            if koreader_id and md5:
-                koreader_id_to_md5[koreader_id] = md5
-        
         # 获取用户当前的所有书籍（新同步的），建立md5到database_book_id的映射
         books_result = await self.db.execute(
-            select(Book).where(Book.user_id == user_id)
+            select(Book.md5, Book.id).where(Book.user_id == user_id, Book.md5.isnot(None))
         )
-        books = books_result.scalars().all()
+        md5_to_book_id = {row.md5: row.id for row in books_result}
         
-        md5_to_book_id = {}
-        for book in books:
-            if book.md5:
-                md5_to_book_id[book.md5] = book.id
+        # KOReader book_id直接映射到数据库book_id
+        koreader_id_to_book_id = {}
+        for book_data in books_data:
+            book_id = md5_to_book_id.get(book_data.get('md5'))
+            if book_data.get('id') is not None and book_id:
+                koreader_id_to_book_id[book_data['id']] = book_id
         
         print(f"📖 准备同步 {len(page_stats_data)} 条阅读记录")
-        processed_count = 0
         
-        for stat in page_stats_data:
-            try:
-                # 提取阅读会话信息
-                koreader_book_id = stat.get('id_book')
-                page = stat.get('page')
-                start_time_timestamp = stat.get('start_time')
-                duration = stat.get('duration', 0)
-                total_pages_at_time = stat.get('total_pages')
-                
-                if not all([koreader_book_id is not None, page is not None, start_time_timestamp]):
-                    continue
-                
-                # 通过KOReader book_id找到对应的数据库book_id
-                md5 = koreader_id_to_md5.get(koreader_book_id)
-                if not md5:
-                    continue
-                    
-                book_id = md5_to_book_id.get(md5)
-                if not book_id:
-                    continue
-                
-                # 解析时间戳
-                try:
-                    if isinstance(start_time_timestamp, (int, float)):
-                        start_time = datetime.fromtimestamp(start_time_timestamp)
-                    else:
-                        start_time = datetime.fromisoformat(str(start_time_timestamp).replace('Z', '+00:00'))
-                except (ValueError, TypeError, OSError) as e:
-                    print(f"时间戳解析失败: {start_time_timestamp}, 错误: {e}")
-                    continue
-                
-                # 创建新的阅读会话（全量替换，不检查重复）
-                new_session = ReadingSession(
-                    book_id=book_id,
-                    page=page,
-                    start_time=start_time,
-                    duration=duration,
-                    total_pages_at_time=total_pages_at_time
-                )
-                self.db.add(new_session)
-                new_sessions_count += 1
-                
-                processed_count += 1
-                if processed_count % 100 == 0:
-                    print(f"  已处理 {processed_count}/{len(page_stats_data)} 条记录")
-                    
-            except Exception as e:
-                print(f"同步阅读会话数据时出错: {e}, 数据: {stat}")
+        # 解析时已在SQLite中过滤，这里只剩书籍同步失败的极少数记录需要排除
+        indices = page_stats_data.valid_indices(koreader_id_to_book_id)
+        skipped = len(page_stats_data) - len(indices)
+        if skipped:
+            print(f"  跳过 {skipped} 条无法关联书籍的记录")
+        
+        zone = await TimezoneService(self.db).get_user_zone(user_id)
+        compacted_before = await CompactionService(self.db).get_compacted_before(
+            list(set(koreader_id_to_book_id.values()))
+        )
+        # 早于保留期的记录所在分区已被删除，再写入会落到默认分区
+        expired_before = retention_cutoff()
+        new_sessions_count = 0
+        book_days = set()
+        insert = dialect_insert(self.db)
+        for rows in page_stats_data.iter_session_rows(
+            indices, koreader_id_to_book_id, user_id, zone, settings.INGEST_BATCH_SIZE
+        ):
+            rows = drop_compacted_rows(drop_expired_rows(rows, expired_before), compacted_before)
+            if not rows:
                 continue
+            book_days |= touched_days(rows)
+            result = await self.db.execute(
+                insert(ReadingSession)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["book_id", "page", "start_time"])
+            )
+            new_sessions_count += max(result.rowcount or 0, 0)
+            print(f"  已处理 {new_sessions_count}/{len(indices)} 条记录")
+        
+        # 按天汇总只重算本次同步涉及的日期
+        days_refreshed = await DailyStatsService(self.db).refresh_days(user_id, book_days)
+        print(f"  已更新 {days_refreshed} 天的按天汇总")
         
         print(f"✅ 成功同步 {new_sessions_count} 条新的阅读记录")
         return new_sessions_count
     
+    async def ingest_statistics_file(
+        self,
+        user_id: int,
+        local_path: str,
+        source_path: Optional[str] = None,
+        archive: bool = True,
+        incremental: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        解析本地statistics.sqlite3文件并导入用户数据
+        
+        WebDAV同步和本地目录监听共用这一解析/导入流程。调用方负责本地文件的生命周期。
+        
+        Args:
+            user_id: 用户ID
+            local_path: 本地SQLite文件路径
+            source_path: 文件来源路径（WebDAV远程路径或本地监听路径），仅用于结果展示
+            archive: 是否在解析前归档文件（从归档重放时为False）
+            incremental: 是否增量同步（不清理现有数据，只导入水位线之后的阅读记录），
+                默认读取 SYNC_INCREMENTAL_ENABLED
+        
+        Returns:
+            同步结果统计
+        """
+        # 0. 解析前先归档，即使本次解析失败，修复后也能离线重放
+        file_sha256 = None
+        if archive and settings.ARCHIVE_ENABLED:
+            try:
+                archive_info = await ArchiveService(self.db).archive_file(user_id, local_path, source_path)
+                file_sha256 = archive_info['sha256']
+            except Exception as e:
+                await self.db.rollback()
+                print(f"⚠️ 归档统计文件失败（不影响本次同步）: {e}")
+        
+        if incremental is None:
+            incremental = settings.SYNC_INCREMENTAL_ENABLED
+        since = await self._get_sessions_watermark(user_id) if incremental else None
+        
+        # 1. 解析SQLite文件（在线程中执行，不阻塞事件循环）
+        parsed_data = await asyncio.to_thread(self._parse_sqlite_file, local_path, since)
+        
+        try:
+            # 2. 开始同步（在单个事务中完成）
+            if incremental:
+                print(f"🔄 开始增量同步用户数据 (用户ID: {user_id}, 水位线: {since})")
+                clear_stats = {'books_cleared': 0, 'sessions_cleared': 0, 'kept_book_ids': []}
+            else:
+                print(f"🔄 开始全量同步用户数据 (用户ID: {user_id})")
+                # 2.1 清理现有数据（保留仍在文件中的已压缩书籍）
+                clear_stats = await self._clear_user_data(
+                    user_id, {book['md5'] for book in parsed_data['books']}
+                )
+            
+            # 2.2 同步书籍数据
+            md5_to_book_id = await self._sync_books(user_id, parsed_data['books'])
+            books_synced = len(md5_to_book_id)
+            
+            # 2.3 同步阅读会话数据
+            sessions_synced = await self._sync_reading_sessions(
+                user_id,
+                parsed_data['page_stats'], 
+                parsed_data['books']
+            )
+            
+            # 2.4 保留的书籍已压缩的日期不会再写入记录，按压缩汇总重建这些日期的按天汇总
+            if clear_stats['kept_book_ids']:
+                await DailyStatsService(self.db).refresh_compacted(user_id, clear_stats['kept_book_ids'])
+            
+            # 2.5 刷新本次同步涉及书籍的统计汇总
+            await BookStatsService(self.db).refresh_books(user_id, md5_to_book_id.values())
+            
+            # 2.6 提交所有更改
+            await self.db.commit()
+            invalidate_book_suggestions(user_id)
+            
+            # 登记写入量，由维护任务决定是否需要VACUUM
+            record_table_churn('reading_sessions', clear_stats['sessions_cleared'] + sessions_synced)
+            record_table_churn('books', clear_stats['books_cleared'] + books_synced)
+            
+            print(f"✅ {'增量' if incremental else '全量'}同步完成!")
+            print(f"📚 清理书籍: {clear_stats['books_cleared']} → 新增书籍: {books_synced}")
+            print(f"📊 清理阅读记录: {clear_stats['sessions_cleared']} → 新增阅读记录: {sessions_synced}")
+            
+            return {
+                'success': True,
+                'error': None,
+                'books_synced': books_synced,
+                'sessions_synced': sessions_synced,
+                'books_cleared': clear_stats['books_cleared'],
+                'sessions_cleared': clear_stats['sessions_cleared'],
+                'remote_path': source_path,
+                'file_sha256': file_sha256
+            }
+        
+        except Exception as sync_error:
+            # 同步过程中出错，回滚事务
+            await self.db.rollback()
+            print(f"❌ 同步过程中出错，已回滚所有更改: {sync_error}")
+            raise sync_error
+    
     async def sync_user_data(self, user_id: int, remote_path: str = None) -> Dict[str, Any]:
         """
         同步用户的阅读数据
@@ -308,7 +469,7 @@ class DataSyncService:
         Args:
             user_id: 用户ID
             remote_path: 远程SQLite文件路径，如果为None则自动查找
-            
+        
         Returns:
             同步结果统计
         """
@@ -334,55 +495,14 @@ class DataSyncService:
                 }
             
             try:
-                # 2. 解析SQLite文件
-                parsed_data = self._parse_sqlite_file(local_path)
-                
-                try:
-                    # 3. 开始全量替换同步（在单个事务中完成）
-                    print(f"🔄 开始全量同步用户数据 (用户ID: {user_id})")
-                    
-                    # 3.1 清理现有数据
-                    clear_stats = await self._clear_user_data(user_id)
-                    
-                    # 3.2 同步书籍数据
-                    md5_to_book_id = await self._sync_books(user_id, parsed_data['books'])
-                    books_synced = len(md5_to_book_id)
-                    
-                    # 3.3 同步阅读会话数据
-                    sessions_synced = await self._sync_reading_sessions(
-                        user_id,
-                        parsed_data['page_stats'], 
-                        parsed_data['books']
-                    )
-                    
-                    # 3.4 提交所有更改
-                    await self.db.commit()
-                    
-                    print(f"✅ 全量同步完成!")
-                    print(f"📚 清理书籍: {clear_stats['books_cleared']} → 新增书籍: {books_synced}")
-                    print(f"📊 清理阅读记录: {clear_stats['sessions_cleared']} → 新增阅读记录: {sessions_synced}")
-                    
-                    return {
-                        'success': True,
-                        'error': None,
-                        'books_synced': books_synced,
-                        'sessions_synced': sessions_synced,
-                        'books_cleared': clear_stats['books_cleared'],
-                        'sessions_cleared': clear_stats['sessions_cleared'],
-                        'remote_path': remote_path
-                    }
-                    
-                except Exception as sync_error:
-                    # 同步过程中出错，回滚事务
-                    await self.db.rollback()
-                    print(f"❌ 同步过程中出错，已回滚所有更改: {sync_error}")
-                    raise sync_error
-                
+                # 2. 解析并导入
+                return await self.ingest_statistics_file(user_id, local_path, remote_path)
+            
             finally:
                 # 清理临时文件
                 if os.path.exists(local_path):
                     os.remove(local_path)
-                    
+        
         except Exception as e:
             return {
                 'success': False,
@@ -391,13 +511,54 @@ class DataSyncService:
                 'sessions_synced': 0
             }
     
+    async def replay_user_data(self, user_id: int, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        从本地归档重放导入用户数据（不访问WebDAV）
+        
+        Args:
+            user_id: 用户ID
+            sha256: 归档文件哈希，如果为None则使用该用户最新的归档
+        
+        Returns:
+            同步结果统计
+        """
+        archive_service = ArchiveService(self.db)
+        try:
+            archive = await archive_service.get_archive(user_id, sha256)
+            if not archive:
+                return {
+                    'success': False,
+                    'error': '未找到归档的统计文件',
+                    'books_synced': 0,
+                    'sessions_synced': 0
+                }
+            
+            local_path = await archive_service.restore_to_temp(archive.sha256)
+            try:
+                result = await self.ingest_statistics_file(
+                    user_id, local_path, archive.source_path, archive=False, incremental=False
+                )
+                result['file_sha256'] = archive.sha256
+                return result
+            finally:
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'重放归档数据时出错: {str(e)}',
+                'books_synced': 0,
+                'sessions_synced': 0
+            }
+    
     async def get_sync_status(self, user_id: int) -> Dict[str, Any]:
         """
         获取用户的同步状态
         
         Args:
             user_id: 用户ID
-            
+        
         Returns:
             同步状态信息
         """
@@ -410,22 +571,25 @@ class DataSyncService:
             
             # 获取用户的阅读会话数量 - 使用COUNT查询
             sessions_count_result = await self.db.execute(
-                select(func.count(ReadingSession.id))
-                .join(Book)
-                .where(Book.user_id == user_id)
+                select(func.count()).select_from(ReadingSession)
+                .where(ReadingSession.user_id == user_id)
             )
             total_sessions = sessions_count_result.scalar() or 0
             
             # 获取最后一次阅读时间
             last_session_result = await self.db.execute(
                 select(ReadingSession.start_time)
-                .join(Book)
-                .where(Book.user_id == user_id)
+                .where(ReadingSession.user_id == user_id)
                 .order_by(ReadingSession.start_time.desc())
                 .limit(1)
             )
             last_reading_time = last_session_result.scalar_one_or_none()
             
+            # 加上已压缩为按天汇总的记录
+            compacted_sessions, compacted_latest = await CompactionService(self.db).get_compacted_totals(user_id)
+            total_sessions += compacted_sessions
+            last_reading_time = last_reading_time or compacted_latest
+            
             # 检查WebDAV配置
             has_webdav = await self.webdav_service.get_webdav_config(user_id) is not None
             
@@ -435,7 +599,7 @@ class DataSyncService:
                 'last_reading_time': last_reading_time.isoformat() if last_reading_time else None,
                 'has_webdav_config': has_webdav
             }
-            
+        
         except Exception as e:
             print(f"获取同步状态失败: {e}")
             return {
@@ -0,0 +1,166 @@
+import hashlib
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+from fastapi import Depends, HTTPException, status
+from fastapi.security import APIKeyHeader
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.app.config import settings
+from backend.app.models.device_api_key import DeviceApiKey
+from backend.app.models.user import User
+from backend.app.utils.ttl_cache import TTLCache
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+# 密钥哈希 -> (设备身份, 上次确认未吊销的时间)；无效密钥缓存为False，防止错误密钥反复查询数据库
+_device_key_cache: TTLCache = TTLCache(settings.DEVICE_KEY_CACHE_TTL_SECONDS)
+INVALID_KEY_CACHE_SECONDS = 30
+
+API_KEY_PREFIX = "ri_"
+
+
+def hash_api_key(api_key: str) -> str:
+    """计算API密钥的SHA-256（密钥本身是高熵随机串，无需bcrypt）"""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class DeviceKeyService:
+    """设备API密钥服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_key(self, user_id: int, name: str) -> Tuple[DeviceApiKey, str]:
+        """
+        为用户创建设备API密钥
+        
+        Returns:
+            (密钥记录, 明文密钥)；明文只在创建时返回一次
+        """
+        api_key = API_KEY_PREFIX + secrets.token_urlsafe(32)
+        device_key = DeviceApiKey(
+            user_id=user_id,
+            name=name,
+            key_prefix=api_key[:10],
+            key_hash=hash_api_key(api_key)
+        )
+        self.db.add(device_key)
+        await self.db.commit()
+        await self.db.refresh(device_key)
+        return device_key, api_key
+    
+    async def list_keys(self, user_id: int) -> List[DeviceApiKey]:
+        """获取用户的所有设备密钥"""
+        result = await self.db.execute(
+            select(DeviceApiKey)
+            .where(DeviceApiKey.user_id == user_id)
+            .order_by(DeviceApiKey.id)
+        )
+        return list(result.scalars().all())
+    
+    async def revoke_key(self, user_id: int, key_id: int) -> bool:
+        """
+        吊销设备密钥
+        
+        当前进程立即从认证缓存中移除；其他worker进程在缓存条目超过
+        DEVICE_KEY_REVALIDATE_SECONDS 后重新查询时发现密钥已删除。
+        """
+        result = await self.db.execute(
+            select(DeviceApiKey).where(
+                DeviceApiKey.id == key_id,
+                DeviceApiKey.user_id == user_id
+            )
+        )
+        device_key = result.scalar_one_or_none()
+        if not device_key:
+            return False
+        
+        _device_key_cache.pop(device_key.key_hash)
+        await self.db.delete(device_key)
+        await self.db.commit()
+        return True
+    
+    @staticmethod
+    async def get_device_user(
+        api_key: Optional[str] = Depends(api_key_header)
+    ) -> Dict[str, Any]:
+        """
+        通过X-API-Key获取设备所属用户（依赖注入）
+        
+        命中缓存时不访问数据库，缓存超过 DEVICE_KEY_REVALIDATE_SECONDS 时按主键确认密钥仍存在
+        （其他进程吊销的密钥由此失效）；未命中时查询一次并顺带更新last_used_at。
+        """
+        from backend.app.database import AsyncSessionLocal
+        
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的设备API密钥",
+            headers={"WWW-Authenticate": "ApiKey"},
+        )
+        
+        if not api_key:
+            raise credentials_exception
+        
+        key_hash = hash_api_key(api_key)
+        cached = _device_key_cache.get(key_hash)
+        if cached is False:
+            raise credentials_exception
+        if cached is not None:
+            device, checked_at = cached
+            if time.monotonic() - checked_at < settings.DEVICE_KEY_REVALIDATE_SECONDS:
+                return device
+            try:
+                exists = await DeviceKeyService._key_exists(device["device_key_id"])
+            except SQLAlchemyError as e:
+                print(f"验证设备密钥失败: {e}")
+                raise credentials_exception
+            if not exists:
+                _device_key_cache.set(key_hash, False, INVALID_KEY_CACHE_SECONDS)
+                raise credentials_exception
+            _device_key_cache.set(key_hash, (device, time.monotonic()))
+            return device
+        
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(DeviceApiKey.id, DeviceApiKey.user_id, User.username)
+                    .join(User, DeviceApiKey.user_id == User.id)
+                    .where(DeviceApiKey.key_hash == key_hash)
+                )
+                row = result.first()
+                if row is None:
+                    _device_key_cache.set(key_hash, False, INVALID_KEY_CACHE_SECONDS)
+                    raise credentials_exception
+                
+                await session.execute(
+                    update(DeviceApiKey)
+                    .where(DeviceApiKey.id == row.id)
+                    .values(last_used_at=datetime.now(timezone.utc))
+                )
+                await session.commit()
+        except SQLAlchemyError as e:
+            print(f"验证设备密钥失败: {e}")
+            raise credentials_exception
+        
+        device = {
+            "device_key_id": row.id,
+            "user_id": row.user_id,
+            "username": row.username
+        }
+        _device_key_cache.set(key_hash, (device, time.monotonic()))
+        return device
+    
+    @staticmethod
+    async def _key_exists(device_key_id: int) -> bool:
+        """确认设备密钥仍存在（未被吊销）"""
+        from backend.app.database import AsyncSessionLocal
+        
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(DeviceApiKey.id).where(DeviceApiKey.id == device_key_id)
+            )
+            return result.first() is not None
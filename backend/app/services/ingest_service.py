@@ -0,0 +1,220 @@
+"""
+增量推送导入服务
+
+接收设备或脚本推送的NDJSON格式page_stat记录，流式解析并批量写入reading_sessions，
+已存在的记录依靠 (book_id, page, start_time) 主键忽略。
+"""
+import json
+from datetime import date
+from typing import Dict, Any, List, AsyncIterator, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from backend.app.config import settings
+from backend.app.database import dialect_insert
+from backend.app.models.book import Book
+from backend.app.models.reading_session import ReadingSession
+from backend.app.services.data_sync_service import parse_start_time
+from backend.app.services.book_stats_service import BookStatsService
+from backend.app.services.compaction_service import CompactionService, drop_compacted_rows
+from backend.app.services.daily_stats_service import DailyStatsService, touched_days
+from backend.app.services.partition_service import drop_expired_rows, retention_cutoff
+from backend.app.services.timezone_service import TimezoneService
+from backend.app.utils.timezones import local_date_hour
+from backend.app.utils.page_bitmap import PAGE_MAX
+from backend.app.utils.page_stats import DURATION_MAX
+
+# 响应中最多返回的错误明细条数
+MAX_REPORTED_ERRORS = 10
+
+
+class IngestLineError(ValueError):
+    """单行NDJSON数据无效"""
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """把请求体的字节块流式切分为NDJSON行，不把整个请求体读入内存"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > settings.INGEST_MAX_LINE_BYTES:
+            raise IngestLineError(f"单行数据超过 {settings.INGEST_MAX_LINE_BYTES} 字节")
+    if buffer:
+        yield buffer
+
+
+def parse_page_stat_line(line: bytes) -> Dict[str, Any]:
+    """
+    解析一行page_stat数据
+    
+    格式: {"md5": "...", "page": 12, "start_time": 1700000000, "duration": 35, "total_pages": 320}
+    """
+    try:
+        data = json.loads(line)
+    except ValueError as e:
+        raise IngestLineError(f"JSON格式错误: {e}")
+    if not isinstance(data, dict):
+        raise IngestLineError("每行必须是JSON对象")
+    
+    md5 = data.get("md5")
+    if not isinstance(md5, str) or not md5 or len(md5) > 32:
+        raise IngestLineError("md5无效")
+    
+    try:
+        page = int(data["page"])
+        duration = int(data.get("duration") or 0)
+        total_pages = data.get("total_pages")
+        total_pages = int(total_pages) if total_pages is not None else None
+    except (KeyError, TypeError, ValueError):
+        raise IngestLineError("page/duration/total_pages必须是整数")
+    if page < 0 or duration < 0:
+        raise IngestLineError("page和duration不能为负数")
+    if page > PAGE_MAX:
+        raise IngestLineError(f"page不能超过{PAGE_MAX}")
+    
+    start_time = data.get("start_time")
+    if not start_time:
+        raise IngestLineError("缺少start_time")
+    try:
+        start_time = parse_start_time(start_time)
+    except ValueError as e:
+        raise IngestLineError(str(e))
+    
+    return {
+        "md5": md5,
+        "page": page,
+        "start_time": start_time,
+        "duration": min(duration, DURATION_MAX),
+        "total_pages_at_time": total_pages,
+    }
+
+
+class IngestService:
+    """增量推送导入服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._md5_to_book_id: Dict[str, Optional[int]] = {}
+        self._compacted_before: Dict[int, date] = {}
+        self._zone = None
+    
+    def _insert_ignore(self, rows: List[Dict[str, Any]]):
+        """构造忽略唯一索引冲突的批量插入语句"""
+        insert = dialect_insert(self.db)
+        return (
+            insert(ReadingSession)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["book_id", "page", "start_time"])
+        )
+    
+    async def _resolve_books(self, user_id: int, md5s: set) -> None:
+        """批量查询本批次中尚未解析过的md5对应的书籍ID"""
+        missing = [md5 for md5 in md5s if md5 not in self._md5_to_book_id]
+        if not missing:
+            return
+        result = await self.db.execute(
+            select(Book.md5, Book.id).where(Book.user_id == user_id, Book.md5.in_(missing))
+        )
+        found = {row.md5: row.id for row in result}
+        for md5 in missing:
+            self._md5_to_book_id[md5] = found.get(md5)
+        self._compacted_before.update(
+            await CompactionService(self.db).get_compacted_before(list(found.values()))
+        )
+    
+    async def _flush(self, user_id: int, batch: List[Dict[str, Any]], stats: Dict[str, Any]) -> None:
+        """写入一个批次并提交"""
+        await self._resolve_books(user_id, {row["md5"] for row in batch})
+        
+        rows = []
+        for row in batch:
+            book_id = self._md5_to_book_id.get(row["md5"])
+            if book_id is None:
+                stats["unknown_book"] += 1
+                continue
+            local_date, local_hour = local_date_hour(row["start_time"], self._zone)
+            rows.append({
+                "book_id": book_id,
+                "user_id": user_id,
+                "page": row["page"],
+                "start_time": row["start_time"],
+                "duration": row["duration"],
+                "total_pages_at_time": row["total_pages_at_time"],
+                "local_date": local_date,
+                "local_hour": local_hour,
+            })
+        
+        # 早于保留期的记录不再保存
+        kept = drop_expired_rows(rows, retention_cutoff())
+        stats["expired"] += len(rows) - len(kept)
+        rows = kept
+        
+        # 已压缩日期的记录已计入汇总，按重复处理
+        kept = drop_compacted_rows(rows, self._compacted_before)
+        stats["duplicates"] += len(rows) - len(kept)
+        rows = kept
+        if rows:
+            result = await self.db.execute(self._insert_ignore(rows))
+            await DailyStatsService(self.db).refresh_days(user_id, touched_days(rows))
+            await BookStatsService(self.db).refresh_books(user_id, {row["book_id"] for row in rows})
+            await self.db.commit()
+            inserted = max(result.rowcount or 0, 0)
+            stats["inserted"] += inserted
+            stats["duplicates"] += len(rows) - inserted
+    
+    async def ingest_page_stats(self, user_id: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        流式导入NDJSON格式的page_stat记录
+        
+        Args:
+            user_id: 用户ID
+            chunks: 请求体字节流
+        
+        Returns:
+            导入统计: received / inserted / duplicates / invalid / unknown_book / expired / errors
+        """
+        stats: Dict[str, Any] = {
+            "received": 0,
+            "inserted": 0,
+            "duplicates": 0,
+            "invalid": 0,
+            "unknown_book": 0,
+            "expired": 0,
+            "errors": [],
+        }
+        batch: List[Dict[str, Any]] = []
+        line_number = 0
+        
+        try:
+            self._zone = await TimezoneService(self.db).get_user_zone(user_id)
+            async for line in iter_ndjson_lines(chunks):
+                line_number += 1
+                if not line.strip():
+                    continue
+                stats["received"] += 1
+                try:
+                    batch.append(parse_page_stat_line(line))
+                except IngestLineError as e:
+                    stats["invalid"] += 1
+                    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                        stats["errors"].append(f"第 {line_number} 行: {e}")
+                    continue
+                
+                if len(batch) >= settings.INGEST_BATCH_SIZE:
+                    await self._flush(user_id, batch, stats)
+                    batch = []
+            
+            if batch:
+                await self._flush(user_id, batch, stats)
+        except IngestLineError as e:
+            # 请求体本身无法继续解析，已提交的批次保留
+            stats["invalid"] += 1
+            stats["errors"].append(f"第 {line_number + 1} 行: {e}")
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        return stats
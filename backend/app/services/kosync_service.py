@@ -0,0 +1,166 @@
+"""
+KOReader kosync进度同步服务
+
+兼容KOReader内置的进度同步协议：设备在翻页/关闭书籍时上报进度，
+每个(用户, 文档)只保留最新一条，通过单条upsert语句写入。
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_
+
+from backend.app.config import settings
+from backend.app.database import dialect_insert
+from backend.app.models.book import Book
+from backend.app.models.reading_progress import ReadingProgress
+from backend.app.models.user import User
+from backend.app.utils.ttl_cache import TTLCache
+
+# (用户名, 密钥哈希) -> (用户ID, 上次确认密码未修改的时间)；认证失败缓存为False
+_kosync_auth_cache: TTLCache = TTLCache(settings.KOSYNC_AUTH_CACHE_TTL_SECONDS)
+INVALID_AUTH_CACHE_SECONDS = 30
+
+
+def hash_kosync_key(auth_key: str) -> str:
+    """
+    计算kosync认证密钥的存储哈希
+    
+    KOReader发送的x-auth-key是md5(密码)，服务端再做一次SHA-256后保存。
+    """
+    return hashlib.sha256(auth_key.strip().lower().encode()).hexdigest()
+
+
+class KosyncService:
+    """kosync进度同步服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def set_credentials(self, user_id: int, password: str) -> None:
+        """
+        设置用户的kosync同步密码
+        
+        当前进程的认证缓存立即清空；其他worker进程在缓存条目超过
+        KOSYNC_AUTH_REVALIDATE_SECONDS 后重新查询时发现密码已修改。
+        """
+        auth_key = hashlib.md5(password.encode()).hexdigest()
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(kosync_key_hash=hash_kosync_key(auth_key))
+        )
+        await self.db.commit()
+        # 旧密码的缓存立即失效
+        _kosync_auth_cache.clear()
+    
+    async def is_configured(self, user_id: int) -> bool:
+        """用户是否已设置kosync同步密码"""
+        result = await self.db.execute(
+            select(User.kosync_key_hash).where(User.id == user_id)
+        )
+        return bool(result.scalar_one_or_none())
+    
+    async def authenticate(self, username: Optional[str], auth_key: Optional[str]) -> Optional[int]:
+        """
+        验证x-auth-user/x-auth-key
+        
+        命中缓存时不访问数据库，缓存超过 KOSYNC_AUTH_REVALIDATE_SECONDS 时按主键确认
+        保存的密钥哈希未变（其他进程修改的密码由此生效）。
+        
+        Returns:
+            用户ID，认证失败返回None
+        """
+        if not username or not auth_key:
+            return None
+        
+        cache_key = (username, hash_kosync_key(auth_key))
+        cached = _kosync_auth_cache.get(cache_key)
+        if cached is False:
+            return None
+        if cached is not None:
+            user_id, checked_at = cached
+            if time.monotonic() - checked_at < settings.KOSYNC_AUTH_REVALIDATE_SECONDS:
+                return user_id
+            result = await self.db.execute(
+                select(User.id).where(User.id == user_id, User.kosync_key_hash == cache_key[1])
+            )
+            if result.first() is None:
+                _kosync_auth_cache.set(cache_key, False, INVALID_AUTH_CACHE_SECONDS)
+                return None
+            _kosync_auth_cache.set(cache_key, (user_id, time.monotonic()))
+            return user_id
+        
+        result = await self.db.execute(
+            select(User.id).where(
+                User.username == username,
+                User.kosync_key_hash == cache_key[1]
+            )
+        )
+        user_id = result.scalar_one_or_none()
+        if user_id is None:
+            _kosync_auth_cache.set(cache_key, False, INVALID_AUTH_CACHE_SECONDS)
+            return None
+        
+        _kosync_auth_cache.set(cache_key, (user_id, time.monotonic()))
+        return user_id
+    
+    async def upsert_progress(self, user_id: int, data: Dict[str, Any]) -> int:
+        """
+        保存文档的最新进度（单条 INSERT ... ON CONFLICT DO UPDATE）
+        
+        Returns:
+            进度更新时间的Unix时间戳
+        """
+        now = datetime.now(timezone.utc)
+        values = {
+            "progress": data.get("progress"),
+            "percentage": data.get("percentage"),
+            "device": data.get("device"),
+            "device_id": data.get("device_id"),
+            "updated_at": now,
+        }
+        insert = dialect_insert(self.db)
+        stmt = insert(ReadingProgress).values(user_id=user_id, document=data["document"], **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "document"],
+            set_=values
+        )
+        await self.db.execute(stmt)
+        await self.db.commit()
+        return int(now.timestamp())
+    
+    async def get_progress(self, user_id: int, document: str) -> Optional[ReadingProgress]:
+        """获取文档的最新进度"""
+        result = await self.db.execute(
+            select(ReadingProgress).where(
+                ReadingProgress.user_id == user_id,
+                ReadingProgress.document == document
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    async def list_progress(self, user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """获取用户最近更新的阅读进度，并按md5关联到已同步的书籍"""
+        result = await self.db.execute(
+            select(ReadingProgress, Book.id, Book.title)
+            .outerjoin(Book, and_(Book.user_id == ReadingProgress.user_id, Book.md5 == ReadingProgress.document))
+            .where(ReadingProgress.user_id == user_id)
+            .order_by(ReadingProgress.updated_at.desc())
+            .limit(limit)
+        )
+        
+        progress_list = []
+        for progress, book_id, book_title in result:
+            progress_list.append({
+                "document": progress.document,
+                "progress": progress.progress,
+                "percentage": progress.percentage,
+                "device": progress.device,
+                "device_id": progress.device_id,
+                "updated_at": progress.updated_at,
+                "book_id": book_id,
+                "book_title": book_title,
+            })
+        return progress_list
@@ -0,0 +1,212 @@
+"""
+数据库维护服务
+
+全量替换同步会删除并重新插入用户的全部阅读记录，在PostgreSQL中留下大量死元组，
+reading_sessions及其索引随之膨胀。这里统计每张表的写入量和死元组比例，
+超过阈值时对该表执行 VACUUM (ANALYZE)，并提供表/索引大小等指标。
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+
+# 需要维护的表（全量同步时整批删除和插入）
+MAINTAINED_TABLES = ("reading_sessions", "books", "highlights")
+
+_churn_lock = threading.Lock()
+# 表名 -> 上次VACUUM以来由同步写入/删除的行数
+_table_churn: Dict[str, int] = {}
+# 最近一次维护的结果
+_last_runs: Dict[str, Dict[str, Any]] = {}
+
+
+def record_table_churn(table: str, rows: int) -> None:
+    """登记同步对表造成的写入/删除行数，供维护任务判断是否需要VACUUM"""
+    if rows <= 0:
+        return
+    with _churn_lock:
+        _table_churn[table] = _table_churn.get(table, 0) + rows
+
+
+def get_table_churn() -> Dict[str, int]:
+    with _churn_lock:
+        return dict(_table_churn)
+
+
+def _reset_table_churn(table: str) -> None:
+    with _churn_lock:
+        _table_churn.pop(table, None)
+
+
+class MaintenanceService:
+    """数据库维护服务（仅PostgreSQL）"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    @property
+    def is_supported(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+    
+    async def get_table_metrics(self) -> List[Dict[str, Any]]:
+        """
+        获取维护表的膨胀指标
+        
+        包括存活/死元组数、死元组比例、表和各索引大小、最近一次(auto)vacuum/analyze时间。
+        """
+        if not self.is_supported:
+            return []
+        
+        # 分区表（reading_sessions）的统计信息在各个分区上，按分区树汇总到父表
+        result = await self.db.execute(
+            text("""
+                SELECT t.table_name AS relname,
+                       sum(s.n_live_tup) AS n_live_tup,
+                       sum(s.n_dead_tup) AS n_dead_tup,
+                       sum(s.n_mod_since_analyze) AS n_mod_since_analyze,
+                       sum(pg_relation_size(s.relid)) AS table_bytes,
+                       sum(pg_indexes_size(s.relid)) AS indexes_bytes,
+                       sum(pg_total_relation_size(s.relid)) AS total_bytes,
+                       min(s.last_vacuum) AS last_vacuum,
+                       min(s.last_autovacuum) AS last_autovacuum,
+                       min(s.last_analyze) AS last_analyze,
+                       min(s.last_autoanalyze) AS last_autoanalyze
+                FROM unnest(CAST(:tables AS text[])) AS t(table_name)
+                CROSS JOIN LATERAL pg_partition_tree(to_regclass(t.table_name)) pt
+                JOIN pg_stat_user_tables s ON s.relid = pt.relid
+                WHERE pt.isleaf
+                GROUP BY t.table_name
+                ORDER BY t.table_name
+            """),
+            {"tables": list(MAINTAINED_TABLES)}
+        )
+        tables = []
+        for row in result.mappings():
+            live_tuples = int(row["n_live_tup"])
+            dead_tuples = int(row["n_dead_tup"])
+            total_tuples = live_tuples + dead_tuples
+            tables.append({
+                "table": row["relname"],
+                "live_tuples": live_tuples,
+                "dead_tuples": dead_tuples,
+                "dead_tuple_ratio": round(dead_tuples / total_tuples, 4) if total_tuples else 0.0,
+                "modified_since_analyze": int(row["n_mod_since_analyze"]),
+                "table_bytes": int(row["table_bytes"]),
+                "indexes_bytes": int(row["indexes_bytes"]),
+                "total_bytes": int(row["total_bytes"]),
+                "last_vacuum": self._latest(row["last_vacuum"], row["last_autovacuum"]),
+                "last_analyze": self._latest(row["last_analyze"], row["last_autoanalyze"]),
+            })
+        
+        index_result = await self.db.execute(
+            text("""
+                SELECT t.relname, i.relname AS indexrelname,
+                       sum(pg_relation_size(pt.relid)) AS index_bytes,
+                       sum(coalesce(s.idx_scan, 0)) AS idx_scan
+                FROM pg_class t
+                JOIN pg_index x ON x.indrelid = t.oid
+                JOIN pg_class i ON i.oid = x.indexrelid
+                CROSS JOIN LATERAL pg_partition_tree(i.oid) pt
+                LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = pt.relid
+                WHERE t.relname = ANY(:tables) AND pg_table_is_visible(t.oid)
+                GROUP BY t.relname, i.relname
+                ORDER BY t.relname, i.relname
+            """),
+            {"tables": list(MAINTAINED_TABLES)}
+        )
+        indexes: Dict[str, List[Dict[str, Any]]] = {}
+        for row in index_result.mappings():
+            indexes.setdefault(row["relname"], []).append({
+                "index": row["indexrelname"],
+                "bytes": int(row["index_bytes"]),
+                "scans": int(row["idx_scan"]),
+            })
+        
+        churn = get_table_churn()
+        for table in tables:
+            table["indexes"] = indexes.get(table["table"], [])
+            table["churn_since_vacuum"] = churn.get(table["table"], 0)
+        return tables
+    
+    @staticmethod
+    def _latest(*values: Optional[datetime]) -> Optional[str]:
+        present = [value for value in values if value is not None]
+        return max(present).isoformat() if present else None
+    
+    def _needs_vacuum(self, metrics: Dict[str, Any]) -> Optional[str]:
+        """判断表是否需要VACUUM，返回原因"""
+        churn = metrics["churn_since_vacuum"]
+        if churn >= settings.MAINTENANCE_VACUUM_MIN_CHURN_ROWS:
+            return f"同步写入 {churn} 行"
+        if (metrics["dead_tuples"] >= settings.MAINTENANCE_VACUUM_MIN_DEAD_TUPLES
+                and metrics["dead_tuple_ratio"] >= settings.MAINTENANCE_DEAD_TUPLE_RATIO):
+            return f"死元组比例 {metrics['dead_tuple_ratio']:.1%}"
+        return None
+    
+    async def vacuum_table(self, table: str) -> Dict[str, Any]:
+        """
+        对单张表执行 VACUUM (ANALYZE)
+        
+        VACUUM不能在事务中执行，使用独立的AUTOCOMMIT连接。
+        对分区表执行时会依次处理所有分区。
+        """
+        if table not in MAINTAINED_TABLES:
+            raise ValueError(f"不支持维护的表: {table}")
+        
+        started = time.monotonic()
+        async with self.db.bind.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+        _reset_table_churn(table)
+        
+        run = {
+            "table": table,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": round(time.monotonic() - started, 2),
+        }
+        _last_runs[table] = run
+        return run
+    
+    async def run_maintenance(self, force: bool = False) -> Dict[str, Any]:
+        """
+        检查所有维护表，对超过阈值（或force时全部）的表执行 VACUUM (ANALYZE)
+        
+        Returns:
+            维护结果: 各表执行的操作及维护前后的指标
+        """
+        if not self.is_supported:
+            return {"supported": False, "vacuumed": []}
+        
+        before = await self.get_table_metrics()
+        # 结束读取指标的事务，避免长事务阻碍VACUUM回收
+        await self.db.commit()
+        
+        vacuumed = []
+        for metrics in before:
+            reason = "手动执行" if force else self._needs_vacuum(metrics)
+            if not reason:
+                continue
+            run = await self.vacuum_table(metrics["table"])
+            run["reason"] = reason
+            run["dead_tuples_before"] = metrics["dead_tuples"]
+            run["indexes_bytes_before"] = metrics["indexes_bytes"]
+            vacuumed.append(run)
+        
+        return {
+            "supported": True,
+            "vacuumed": vacuumed,
+            "tables": await self.get_table_metrics() if vacuumed else before,
+        }
+    
+    async def get_status(self) -> Dict[str, Any]:
+        """获取维护指标和最近一次维护记录"""
+        return {
+            "supported": self.is_supported,
+            "tables": await self.get_table_metrics(),
+            "churn_since_vacuum": get_table_churn(),
+            "last_runs": dict(_last_runs),
+        }
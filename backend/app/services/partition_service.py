@@ -0,0 +1,206 @@
+"""
+阅读记录分区维护服务
+
+reading_sessions 在PostgreSQL中按 start_time 范围分区（见迁移 f1c6a8d3b7e4）。
+这里负责提前创建未来的分区、把落入默认分区的记录迁到对应分区，
+以及按保留期整体删除过期分区。新导入的记录早于保留期的直接丢弃（见 drop_expired_rows），
+否则会写入默认分区，删除过的数据在下一次同步后又回来。
+"""
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.services.daily_stats_service import DailyStatsService
+from backend.app.utils.partitioning import (
+    PARENT_TABLE, DEFAULT_PARTITION,
+    add_months, partition_floor, next_partition_start, iter_partition_ranges,
+    create_partition_ddl, split_default_partition_ddl, create_default_partition_ddl, drop_partition_ddl,
+)
+
+_RANGE_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> Optional[datetime]:
+    """保留期起点：早于该时间的阅读记录不再保存，未启用时返回None"""
+    retention_months = settings.READING_SESSIONS_RETENTION_MONTHS
+    if retention_months <= 0:
+        return None
+    now = now or datetime.now(timezone.utc)
+    return add_months(partition_floor(now, "month"), -retention_months)
+
+
+def drop_expired_rows(rows: List[Dict[str, Any]], cutoff: Optional[datetime]) -> List[Dict[str, Any]]:
+    """丢弃早于保留期的待写入记录"""
+    if cutoff is None:
+        return rows
+    return [row for row in rows if row["start_time"] >= cutoff]
+
+
+class PartitionService:
+    """阅读记录分区维护服务（仅PostgreSQL）"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def is_partitioned(self) -> bool:
+        """reading_sessions 是否为分区表"""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return False
+        result = await self.db.execute(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+            {"table": PARENT_TABLE}
+        )
+        return result.first() is not None
+    
+    async def list_partitions(self) -> List[Dict[str, Any]]:
+        """
+        列出 reading_sessions 的所有分区
+        
+        包括分区范围、是否有哈希子分区、估算行数和占用空间（含子分区）。
+        """
+        # 分区边界按会话时区输出，统一成UTC便于解析
+        await self.db.execute(text("SET LOCAL TimeZone = 'UTC'"))
+        result = await self.db.execute(
+            text("""
+                SELECT c.relname AS name,
+                       pg_get_expr(c.relpartbound, c.oid) AS bound,
+                       c.relkind = 'p' AS has_subpartitions,
+                       (SELECT coalesce(sum(pg_total_relation_size(pt.relid)), 0)
+                        FROM pg_partition_tree(c.oid) pt) AS total_bytes,
+                       (SELECT coalesce(sum(s.n_live_tup), 0)
+                        FROM pg_partition_tree(c.oid) pt
+                        JOIN pg_stat_user_tables s ON s.relid = pt.relid) AS live_tuples
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(:table)
+                ORDER BY c.relname
+            """),
+            {"table": PARENT_TABLE}
+        )
+        partitions = []
+        for row in result.mappings():
+            start, end = self._parse_bound(row["bound"])
+            partitions.append({
+                "name": row["name"],
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+                "is_default": row["name"] == DEFAULT_PARTITION,
+                "has_subpartitions": row["has_subpartitions"],
+                "live_tuples": int(row["live_tuples"]),
+                "total_bytes": int(row["total_bytes"]),
+            })
+        return partitions
+    
+    @staticmethod
+    def _parse_bound(bound: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+        match = _RANGE_BOUND_RE.search(bound or "")
+        if not match:
+            return None, None
+        return datetime.fromisoformat(match.group(1)), datetime.fromisoformat(match.group(2))
+    
+    async def _existing_ranges(self) -> List[Tuple[datetime, datetime]]:
+        ranges = []
+        for partition in await self.list_partitions():
+            if partition["start"] and partition["end"]:
+                ranges.append((datetime.fromisoformat(partition["start"]), datetime.fromisoformat(partition["end"])))
+        return ranges
+    
+    async def _execute_ddl(self, statements: List[str]) -> None:
+        for statement in statements:
+            await self.db.execute(text(statement))
+    
+    async def ensure_partitions(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        创建当前及未来 READING_SESSIONS_PARTITION_PREMAKE 个分区，
+        并把默认分区中的记录迁到各自的分区
+        
+        Returns:
+            新创建的分区名列表
+        """
+        interval = settings.READING_SESSIONS_PARTITION_INTERVAL
+        hash_partitions = settings.READING_SESSIONS_HASH_PARTITIONS
+        now = now or datetime.now(timezone.utc)
+        
+        await self._execute_ddl([create_default_partition_ddl()])
+        await self.db.commit()
+        
+        last = partition_floor(now, interval)
+        for _ in range(settings.READING_SESSIONS_PARTITION_PREMAKE):
+            last = next_partition_start(last, interval)
+        
+        result = await self.db.execute(
+            text(f"SELECT min(start_time), max(start_time) FROM {DEFAULT_PARTITION}")
+        )
+        default_min, default_max = result.one()
+        
+        wanted = dict((name, (start, end)) for name, start, end in iter_partition_ranges(now, last, interval))
+        if default_min is not None:
+            for name, start, end in iter_partition_ranges(default_min, default_max, interval):
+                wanted[name] = (start, end)
+        
+        existing = await self._existing_ranges()
+        created = []
+        for name, (start, end) in sorted(wanted.items(), key=lambda item: item[1][0]):
+            if any(start < existing_end and existing_start < end for existing_start, existing_end in existing):
+                # 已有分区（可能是按其他间隔创建的）覆盖了该范围
+                continue
+            
+            has_default_rows = default_min is not None and (await self.db.execute(
+                text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE start_time >= :start AND start_time < :end LIMIT 1"),
+                {"start": start, "end": end}
+            )).first() is not None
+            
+            try:
+                if has_default_rows:
+                    await self._execute_ddl(split_default_partition_ddl(name, start, end, hash_partitions))
+                else:
+                    await self._execute_ddl(create_partition_ddl(name, start, end, hash_partitions))
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            existing.append((start, end))
+            created.append(name)
+        return created
+    
+    async def drop_expired_partitions(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        整体删除超出 READING_SESSIONS_RETENTION_MONTHS 保留期的分区
+        
+        只删除上界早于保留期起点的完整分区，默认分区不受影响。
+        """
+        cutoff = retention_cutoff(now)
+        if cutoff is None:
+            return []
+        
+        dropped = []
+        for partition in await self.list_partitions():
+            if partition["is_default"] or not partition["end"]:
+                continue
+            if datetime.fromisoformat(partition["end"]) > cutoff:
+                continue
+            try:
+                await self._execute_ddl(drop_partition_ddl(partition["name"]))
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            dropped.append(partition["name"])
+        
+        if dropped:
+            # 被删除的记录不再计入按天汇总
+            await DailyStatsService(self.db).refresh_before(cutoff)
+            await self.db.commit()
+        return dropped
+    
+    async def run_partition_maintenance(self) -> Dict[str, Any]:
+        """创建未来分区、迁出默认分区记录并删除过期分区"""
+        if not await self.is_partitioned():
+            return {"supported": False, "created": [], "dropped": []}
+        
+        created = await self.ensure_partitions()
+        dropped = await self.drop_expired_partitions()
+        return {"supported": True, "created": created, "dropped": dropped}
@@ -1,15 +1,28 @@
 """
 统计服务模块
+
+按天的统计（热力图、趋势、连续天数、本周/本月时长、时间范围统计、详细日历）读取
+user_daily_stats / book_daily_stats 按天汇总，由同步时增量维护（见 DailyStatsService），
+时间范围统一按用户时区的本地日期整天计算。
+
+其余统计读取原始记录：超过保留期的逐页记录会被压缩为按天汇总（reading_day_aggregates）和
+页码位图（book_page_bitmaps），见 CompactionService。(书籍, 日期) 只会存在于其中一边，
+按天的数值直接相加，去重页数取两边页码的并集。
 """
-from typing import Dict, Any, Optional
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select, text, distinct, extract
+from sqlalchemy import func, select, distinct
 from datetime import datetime, date, timedelta
 
 from backend.app.models.user import User
 from backend.app.models.book import Book
 from backend.app.models.reading_session import ReadingSession
 from backend.app.models.highlight import Highlight
+from backend.app.models.reading_aggregate import ReadingDayAggregate, BookPageBitmap
+from backend.app.models.daily_stats import BookDailyStats, UserDailyStats
+from backend.app.services.timezone_service import TimezoneService
+from backend.app.utils.page_bitmap import pages_to_bitmap, bitmap_to_pages, bitmap_or, bitmap_count
 
 
 class StatisticsService:
@@ -79,42 +92,74 @@ class StatisticsService:
         """
         获取总阅读时长
         
-        来源: 对 reading_sessions 表中所有记录的 duration 字段求和
+        来源: 对 reading_sessions 表中所有记录的 duration 字段求和，加上已压缩的按天汇总
         单位: 秒
         """
         result = await self.db.execute(
             select(func.sum(ReadingSession.duration))
-            .join(Book, ReadingSession.book_id == Book.id)
-            .where(Book.user_id == user_id)
+            .where(ReadingSession.user_id == user_id)
         )
-        return int(result.scalar() or 0)
+        return int(result.scalar() or 0) + await self._get_compacted_duration(user_id)
     
     async def _get_total_pages_read(self, user_id: int) -> int:
         """
         获取总计已读页数
         
-        来源: 对 reading_sessions 表中所有记录的 page 和 book_id 进行去重计数
+        来源: 对 reading_sessions 表中所有记录的 page 和 book_id 进行去重计数，并入已压缩的页码位图
         逻辑: COUNT(DISTINCT (book_id, page))
         """
+        result = await self.db.execute(
+            select(BookPageBitmap.book_id, BookPageBitmap.pages_bitmap)
+            .where(BookPageBitmap.user_id == user_id)
+        )
+        bitmaps = {row.book_id: row.pages_bitmap for row in result}
+        return await self._count_read_pages([ReadingSession.user_id == user_id], bitmaps)
+    
+    async def _count_read_pages(self, conditions: List[Any], bitmaps: Dict[int, bytes]) -> int:
+        """
+        按 (book_id, page) 去重统计满足条件的已读页数
+        
+        没有压缩数据的书籍直接在SQL中计数；有压缩数据的书籍（bitmaps）取原始记录页码与位图的并集。
+        """
         # 使用子查询来实现 COUNT(DISTINCT book_id, page)
         subquery = select(
             ReadingSession.book_id,
             ReadingSession.page
-        ).join(Book, ReadingSession.book_id == Book.id).where(
-            Book.user_id == user_id
-        ).distinct()
+        ).where(*conditions).distinct()
+        if bitmaps:
+            subquery = subquery.where(ReadingSession.book_id.notin_(list(bitmaps)))
         
         result = await self.db.execute(
             select(func.count()).select_from(subquery.subquery())
         )
+        total = int(result.scalar() or 0)
+        if not bitmaps:
+            return total
+        
+        result = await self.db.execute(
+            select(ReadingSession.book_id, ReadingSession.page)
+            .where(*conditions, ReadingSession.book_id.in_(list(bitmaps)))
+            .distinct()
+        )
+        raw_pages = defaultdict(list)
+        for row in result:
+            raw_pages[row.book_id].append(row.page)
+        for book_id, bitmap in bitmaps.items():
+            total += bitmap_count(bitmap_or(bitmap, pages_to_bitmap(raw_pages[book_id])))
+        return total
+    
+    async def _get_compacted_duration(self, user_id: int) -> int:
+        """已压缩的按天汇总中的阅读时长"""
+        result = await self.db.execute(
+            select(func.sum(ReadingDayAggregate.duration)).where(ReadingDayAggregate.user_id == user_id)
+        )
         return int(result.scalar() or 0)
     
     async def _get_total_highlights(self, user_id: int) -> int:
         """获取总标注数量"""
         result = await self.db.execute(
             select(func.count(Highlight.id))
-            .join(Book, Highlight.book_id == Book.id)
-            .where(Book.user_id == user_id)
+            .where(Highlight.user_id == user_id)
         )
         return int(result.scalar() or 0)
     
@@ -140,16 +185,13 @@ class StatisticsService:
             - current_streak: 当前连续天数
         """
         try:
-            # 获取所有不重复的阅读日期，按升序排列
+            # 获取所有阅读日期，按升序排列
             result = await self.db.execute(
-                select(func.date(ReadingSession.start_time).label('reading_date'))
-                .join(Book, ReadingSession.book_id == Book.id)
-                .where(Book.user_id == user_id)
-                .group_by(func.date(ReadingSession.start_time))
-                .order_by(func.date(ReadingSession.start_time))
+                select(UserDailyStats.local_date)
+                .where(UserDailyStats.user_id == user_id)
+                .order_by(UserDailyStats.local_date)
             )
-            
-            reading_dates = [row.reading_date for row in result]
+            reading_dates = result.scalars().all()
             
             if not reading_dates:
                 return {"max_streak": 0, "current_streak": 0}
@@ -169,8 +211,8 @@ class StatisticsService:
                 else:
                     current_streak = 1
             
-            # 检查当前连续天数是否有效
-            today = date.today()
+            # 检查当前连续天数是否有效（按用户时区的今天）
+            today = await self._get_local_today(user_id)
             yesterday = today - timedelta(days=1)
             last_reading_date = reading_dates[-1]
             
@@ -187,7 +229,7 @@ class StatisticsService:
                         break
             
             return {"max_streak": max_streak, "current_streak": current_streak}
-            
+        
         except Exception as e:
             print(f"计算连续阅读天数失败: {e}")
             return {"max_streak": 0, "current_streak": 0}
@@ -197,19 +239,28 @@ class StatisticsService:
         try:
             result = await self.db.execute(
                 select(
-                    extract('hour', ReadingSession.start_time).label('hour'),
-                    func.count(ReadingSession.id).label('count')
+                    ReadingSession.local_hour.label('hour'),
+                    func.count().label('count')
                 )
-                .join(Book, ReadingSession.book_id == Book.id)
-                .where(Book.user_id == user_id)
-                .group_by(extract('hour', ReadingSession.start_time))
-                .order_by(func.count(ReadingSession.id).desc())
-                .limit(1)
+                .where(ReadingSession.user_id == user_id)
+                .group_by(ReadingSession.local_hour)
             )
+            hour_counts = [0] * 24
+            for row in result:
+                hour_counts[row.hour] += row.count
             
-            row = result.first()
-            return int(row.hour) if row else 20  # 默认晚上8点
+            # 已压缩的记录按小时的计数
+            compacted = await self.db.execute(
+                select(ReadingDayAggregate.hour_counts)
+                .where(ReadingDayAggregate.user_id == user_id)
+            )
+            for counts in compacted.scalars():
+                hour_counts = [total + count for total, count in zip(hour_counts, counts)]
             
+            if not any(hour_counts):
+                return 20  # 默认晚上8点
+            return max(range(24), key=lambda hour: hour_counts[hour])
+        
         except Exception as e:
             print(f"获取最喜欢阅读时段失败: {e}")
             return 20
@@ -220,55 +271,57 @@ class StatisticsService:
         
         Args:
             user_id: 用户ID
-            days: 天数（7=本周，30=本月）
-            
+            days: 天数（7=本周，30=本月），按用户时区的最近N天（含今天）
+        
         Returns:
             阅读时长（秒）
         """
-        start_date = datetime.now() - timedelta(days=days)
+        first_day = await self._get_local_today(user_id) - timedelta(days=days - 1)
         
         result = await self.db.execute(
-            select(func.sum(ReadingSession.duration))
-            .join(Book, ReadingSession.book_id == Book.id)
+            select(func.sum(UserDailyStats.duration))
             .where(
-                Book.user_id == user_id,
-                ReadingSession.start_time >= start_date
+                UserDailyStats.user_id == user_id,
+                UserDailyStats.local_date >= first_day
             )
         )
         return int(result.scalar() or 0)
     
-
+    async def _get_local_today(self, user_id: int) -> date:
+        """用户时区的今天"""
+        zone = await TimezoneService(self.db).get_user_zone(user_id)
+        return datetime.now(zone).date()
+    
+    async def _get_local_day_range(self, user_id: int, start_date: datetime, end_date: datetime) -> Tuple[date, date]:
+        """时间范围换算为用户时区的本地日期范围，不带时区的时间视为用户本地时间"""
+        zone = await TimezoneService(self.db).get_user_zone(user_id)
+        return tuple(
+            moment.astimezone(zone).date() if moment.tzinfo else moment.date()
+            for moment in (start_date, end_date)
+        )
     
     async def get_reading_trends(self, user_id: int, days: int = 30) -> Dict[str, Any]:
         """获取阅读趋势数据"""
         try:
-            # 获取最近N天的阅读趋势
-            start_date = datetime.now() - timedelta(days=days)
+            # 获取最近N天（含今天）的阅读趋势
+            first_day = await self._get_local_today(user_id) - timedelta(days=days - 1)
             
             result = await self.db.execute(
-                text("""
-                    SELECT 
-                        DATE(rs.start_time) as reading_date,
-                        SUM(rs.duration) as daily_duration,
-                        COUNT(rs.id) as session_count,
-                        AVG(rs.duration) as avg_session_duration
-                    FROM reading_sessions rs
-                    JOIN books b ON rs.book_id = b.id
-                    WHERE b.user_id = :user_id 
-                        AND rs.start_time >= :start_date
-                    GROUP BY DATE(rs.start_time)
-                    ORDER BY reading_date
-                """),
-                {"user_id": user_id, "start_date": start_date}
+                select(UserDailyStats.local_date, UserDailyStats.duration, UserDailyStats.session_count)
+                .where(
+                    UserDailyStats.user_id == user_id,
+                    UserDailyStats.local_date >= first_day
+                )
+                .order_by(UserDailyStats.local_date)
             )
             
             trends = []
             for row in result:
                 trends.append({
-                    "date": row.reading_date.isoformat() if row.reading_date else None,
-                    "duration": int(row.daily_duration or 0),
-                    "sessions": int(row.session_count or 0),
-                    "avg_duration": int(row.avg_session_duration or 0),
+                    "date": row.local_date.isoformat(),
+                    "duration": row.duration,
+                    "sessions": row.session_count,
+                    "avg_duration": int(row.duration / row.session_count) if row.session_count else 0,
                 })
             
             return {
@@ -334,6 +387,13 @@ class StatisticsService:
             )
             
             read_pages = [row[0] for row in result]
+            
+            # 并入已压缩的页码
+            bitmap = (await self.db.execute(
+                select(BookPageBitmap.pages_bitmap).where(BookPageBitmap.book_id == book_id)
+            )).scalar()
+            if bitmap:
+                read_pages = sorted(set(read_pages).union(bitmap_to_pages(bitmap)))
             total_pages = book.total_pages or 0
             reading_progress = (len(read_pages) / total_pages * 100) if total_pages > 0 else 0.0
             
@@ -345,7 +405,7 @@ class StatisticsService:
                 "read_pages_count": len(read_pages),
                 "reading_progress": round(reading_progress, 2)
             }
-            
+        
         except Exception as e:
             print(f"获取书籍地图数据失败: {e}")
             return {
@@ -365,36 +425,43 @@ class StatisticsService:
         """
         获取指定时间范围的统计数据
         
-        用于生成周报、月报等
+        用于生成周报、月报等，按用户时区的本地日期整天统计
         """
         try:
-            # 基础统计
+            start_day, end_day = await self._get_local_day_range(user_id, start_date, end_date)
+            
+            # 时长和记录数
             result = await self.db.execute(
                 select(
-                    func.sum(ReadingSession.duration).label('total_duration'),
-                    func.count(ReadingSession.id).label('total_sessions'),
-                    func.count(distinct(ReadingSession.book_id)).label('books_read'),
-                    func.count(distinct(ReadingSession.book_id, ReadingSession.page)).label('pages_read'),
-                    func.avg(ReadingSession.duration).label('avg_session_duration')
+                    func.sum(UserDailyStats.duration).label('total_duration'),
+                    func.sum(UserDailyStats.session_count).label('total_sessions')
                 )
-                .join(Book, ReadingSession.book_id == Book.id)
                 .where(
-                    Book.user_id == user_id,
-                    ReadingSession.start_time >= start_date,
-                    ReadingSession.start_time <= end_date
+                    UserDailyStats.user_id == user_id,
+                    UserDailyStats.local_date >= start_day,
+                    UserDailyStats.local_date <= end_day
                 )
             )
-            
             row = result.first()
-            
-            if not row:
-                return self._get_empty_time_range_stats(start_date, end_date)
-            
             total_duration = int(row.total_duration or 0)
             total_sessions = int(row.total_sessions or 0)
-            books_read = int(row.books_read or 0)
-            pages_read = int(row.pages_read or 0)
-            avg_session_duration = int(row.avg_session_duration or 0)
+            
+            # 书籍数和去重页数：各天的页码位图按书取并集
+            result = await self.db.execute(
+                select(BookDailyStats.book_id, BookDailyStats.pages_bitmap)
+                .where(
+                    BookDailyStats.user_id == user_id,
+                    BookDailyStats.local_date >= start_day,
+                    BookDailyStats.local_date <= end_day
+                )
+            )
+            bitmaps: Dict[int, bytes] = {}
+            for day in result:
+                bitmaps[day.book_id] = bitmap_or(bitmaps.get(day.book_id), day.pages_bitmap)
+            
+            books_read = len(bitmaps)
+            pages_read = sum(bitmap_count(bitmap) for bitmap in bitmaps.values())
+            avg_session_duration = int(total_duration / total_sessions) if total_sessions else 0
             
             # 计算阅读速度
             reading_speed = await self._calculate_average_reading_speed(pages_read, total_duration)
@@ -408,22 +475,22 @@ class StatisticsService:
                 "pages_read": pages_read,
                 "avg_session_duration": avg_session_duration,
                 "reading_speed": reading_speed,
-                "days_with_reading": await self._count_active_days(user_id, start_date, end_date)
+                "days_with_reading": await self._count_active_days(user_id, start_day, end_day)
             }
-            
+        
         except Exception as e:
             print(f"获取时间范围统计失败: {e}")
             return self._get_empty_time_range_stats(start_date, end_date)
     
-    async def _count_active_days(self, user_id: int, start_date: datetime, end_date: datetime) -> int:
-        """计算指定时间范围内有阅读记录的天数"""
+    async def _count_active_days(self, user_id: int, start_day: date, end_day: date) -> int:
+        """计算指定本地日期范围内有阅读记录的天数"""
         result = await self.db.execute(
-            select(func.count(distinct(func.date(ReadingSession.start_time))))
-            .join(Book, ReadingSession.book_id == Book.id)
+            select(func.count())
+            .select_from(UserDailyStats)
             .where(
-                Book.user_id == user_id,
-                ReadingSession.start_time >= start_date,
-                ReadingSession.start_time <= end_date
+                UserDailyStats.user_id == user_id,
+                UserDailyStats.local_date >= start_day,
+                UserDailyStats.local_date <= end_day
             )
         )
         return int(result.scalar() or 0)
@@ -451,7 +518,7 @@ class StatisticsService:
         Args:
             user_id: 用户ID
             year: 年份，默认为当前年份
-            
+        
         Returns:
             包含每日阅读数据和年度统计摘要的字典
         """
@@ -460,32 +527,15 @@ class StatisticsService:
             if year is None:
                 year = datetime.now().year
             
-            # 计算年份的开始和结束日期
-            start_date = datetime(year, 1, 1)
-            end_date = datetime(year, 12, 31, 23, 59, 59)
-            
-            # 查询该年份的每日阅读数据
+            # 查询该年份的每日阅读数据（按用户时区的本地日期）
             result = await self.db.execute(
-                text("""
-                    SELECT 
-                        DATE(rs.start_time) as reading_date,
-                        SUM(rs.duration) as daily_duration,
-                        COUNT(rs.id) as session_count,
-                        COUNT(DISTINCT rs.book_id) as books_count,
-                        COUNT(DISTINCT CONCAT(rs.book_id, '-', rs.page)) as pages_count
-                    FROM reading_sessions rs
-                    JOIN books b ON rs.book_id = b.id
-                    WHERE b.user_id = :user_id 
-                        AND rs.start_time >= :start_date
-                        AND rs.start_time <= :end_date
-                    GROUP BY DATE(rs.start_time)
-                    ORDER BY reading_date
-                """),
-                {
-                    "user_id": user_id, 
-                    "start_date": start_date, 
-                    "end_date": end_date
-                }
+                select(UserDailyStats)
+                .where(
+                    UserDailyStats.user_id == user_id,
+                    UserDailyStats.local_date >= date(year, 1, 1),
+                    UserDailyStats.local_date <= date(year, 12, 31)
+                )
+                .order_by(UserDailyStats.local_date)
             )
             
             # 处理每日数据
@@ -493,18 +543,17 @@ class StatisticsService:
             total_duration = 0
             max_daily_duration = 0
             
-            for row in result:
-                daily_duration = int(row.daily_duration or 0)
+            for day in result.scalars():
                 daily_entry = {
-                    "date": row.reading_date.isoformat() if row.reading_date else None,
-                    "reading_time": daily_duration,
-                    "sessions": int(row.session_count or 0),
-                    "books_read": int(row.books_count or 0),
-                    "pages_read": int(row.pages_count or 0)
+                    "date": day.local_date.isoformat(),
+                    "reading_time": day.duration,
+                    "sessions": day.session_count,
+                    "books_read": day.books_count,
+                    "pages_read": day.pages_count
                 }
                 daily_data.append(daily_entry)
-                total_duration += daily_duration
-                max_daily_duration = max(max_daily_duration, daily_duration)
+                total_duration += day.duration
+                max_daily_duration = max(max_daily_duration, day.duration)
             
             # 计算年度统计摘要
             active_days = len(daily_data)
@@ -519,7 +568,7 @@ class StatisticsService:
                 "max_reading_time": max_daily_duration,
                 "avg_daily_reading_time": total_duration // active_days if active_days > 0 else 0
             }
-            
+        
         except Exception as e:
             print(f"获取日历热力图数据失败: {e}")
             # 返回空数据结构
@@ -534,7 +583,7 @@ class StatisticsService:
                 "max_reading_time": 0,
                 "avg_daily_reading_time": 0
             }
-
+    
     async def get_detailed_calendar_data(self, user_id: int, year: Optional[int] = None, month: Optional[int] = None) -> Dict[str, Any]:
         """
         获取详细日历数据，包含每日的具体书籍信息
@@ -543,7 +592,7 @@ class StatisticsService:
             user_id: 用户ID
             year: 年份，默认为当前年份
             month: 月份，默认为当前月份
-            
+        
         Returns:
             包含每日详细阅读数据的字典，包括书籍列表和时长
         """
@@ -561,50 +610,34 @@ class StatisticsService:
             else:
                 end_date = datetime(year, month + 1, 1) - timedelta(seconds=1)
             
-            # 查询该月份的每日详细阅读数据
+            # 查询该月份每天每本书的阅读数据
             result = await self.db.execute(
-                text("""
-                    SELECT 
-                        DATE(rs.start_time) as reading_date,
-                        b.title as book_title,
-                        b.author as book_author,
-                        b.id as book_id,
-                        SUM(rs.duration) as book_daily_duration,
-                        COUNT(rs.id) as book_session_count,
-                        COUNT(DISTINCT rs.page) as book_pages_count,
-                        MIN(rs.start_time) as first_session,
-                        MAX(rs.start_time) as last_session
-                    FROM reading_sessions rs
-                    JOIN books b ON rs.book_id = b.id
-                    WHERE b.user_id = :user_id 
-                        AND rs.start_time >= :start_date
-                        AND rs.start_time <= :end_date
-                    GROUP BY DATE(rs.start_time), b.id, b.title, b.author
-                    ORDER BY reading_date, book_daily_duration DESC
-                """),
-                {
-                    "user_id": user_id, 
-                    "start_date": start_date, 
-                    "end_date": end_date
-                }
+                select(BookDailyStats, Book.title, Book.author)
+                .join(Book, BookDailyStats.book_id == Book.id)
+                .where(
+                    BookDailyStats.user_id == user_id,
+                    BookDailyStats.local_date >= start_date.date(),
+                    BookDailyStats.local_date <= end_date.date()
+                )
+                .order_by(BookDailyStats.local_date, BookDailyStats.duration.desc())
             )
             
             # 按日期组织数据
             daily_books = {}
-            for row in result:
-                date_str = row.reading_date.isoformat() if row.reading_date else None
+            for day, title, author in result:
+                date_str = day.local_date.isoformat()
                 if date_str not in daily_books:
                     daily_books[date_str] = []
                 
                 book_info = {
-                    "book_id": row.book_id,
-                    "title": row.book_title,
-                    "author": row.book_author or "未知作者",
-                    "reading_time": int(row.book_daily_duration or 0),
-                    "session_count": int(row.book_session_count or 0),
-                    "pages_read": int(row.book_pages_count or 0),
-                    "first_session": row.first_session.isoformat() if row.first_session else None,
-                    "last_session": row.last_session.isoformat() if row.last_session else None
+                    "book_id": day.book_id,
+                    "title": title,
+                    "author": author or "未知作者",
+                    "reading_time": day.duration,
+                    "session_count": day.session_count,
+                    "pages_read": day.pages_count,
+                    "first_session": day.first_start.isoformat(),
+                    "last_session": day.last_start.isoformat()
                 }
                 daily_books[date_str].append(book_info)
             
@@ -651,7 +684,7 @@ class StatisticsService:
                 "days_in_month": (end_date.date() - start_date.date()).days + 1,
                 "data": daily_data
             }
-            
+        
         except Exception as e:
             print(f"获取详细日历数据失败: {e}")
             return {
@@ -0,0 +1,129 @@
+"""
+用户时区设置服务
+
+修改时区后重新计算该用户所有阅读记录的 local_date / local_hour 并重建按天汇总，
+使按天、按小时的统计与用户所在时区一致。
+
+已压缩的历史记录（reading_day_aggregates）只保留了压缩时所在时区的本地日期和小时分布，
+无法换算到新时区，因此已有压缩数据的用户不能再修改时区。
+"""
+from typing import Any, Dict, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, text, tuple_
+
+from backend.app.models.reading_aggregate import ReadingDayAggregate
+from backend.app.models.reading_session import ReadingSession
+from backend.app.models.user import User
+from backend.app.services.daily_stats_service import DailyStatsService
+from backend.app.utils.timezones import get_zone, is_valid_timezone, local_date_hour
+
+# 非PostgreSQL数据库逐批在Python中重算时的批大小
+RECOMPUTE_BATCH_SIZE = 5000
+
+
+class TimezoneService:
+    """用户时区设置服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_user_zone(self, user_id: int) -> ZoneInfo:
+        """获取用户时区，未设置时使用 DEFAULT_TIMEZONE"""
+        result = await self.db.execute(select(User.timezone).where(User.id == user_id))
+        return get_zone(result.scalar_one_or_none())
+    
+    async def get_timezone(self, user_id: int) -> Dict[str, Any]:
+        """获取用户设置的时区和实际生效的时区"""
+        result = await self.db.execute(select(User.timezone).where(User.id == user_id))
+        timezone_name = result.scalar_one_or_none()
+        return {
+            "timezone": timezone_name,
+            "effective_timezone": get_zone(timezone_name).key,
+        }
+    
+    async def set_timezone(self, user_id: int, timezone_name: Optional[str]) -> Dict[str, Any]:
+        """
+        设置用户时区并重算已有阅读记录的本地日期和小时
+        
+        Args:
+            user_id: 用户ID
+            timezone_name: IANA时区名称，None表示恢复默认时区
+        
+        Raises:
+            ValueError: 时区名称无效，或用户已有压缩的历史记录且生效时区会改变时
+        """
+        if timezone_name is not None and not is_valid_timezone(timezone_name):
+            raise ValueError(f"无效的时区: {timezone_name}")
+        
+        current_zone = await self.get_user_zone(user_id)
+        if get_zone(timezone_name).key != current_zone.key and await self._has_compacted_data(user_id):
+            raise ValueError(
+                f"已有按 {current_zone.key} 压缩的历史阅读记录，其本地日期无法换算到新时区，不能修改时区"
+            )
+        
+        await self.db.execute(
+            update(User).where(User.id == user_id).values(timezone=timezone_name)
+        )
+        sessions_updated = await self.recompute_local_times(user_id, get_zone(timezone_name))
+        await DailyStatsService(self.db).rebuild_user(user_id)
+        await self.db.commit()
+        
+        result = await self.get_timezone(user_id)
+        result["sessions_updated"] = sessions_updated
+        return result
+    
+    async def _has_compacted_data(self, user_id: int) -> bool:
+        """用户是否已有压缩的历史记录"""
+        result = await self.db.execute(
+            select(ReadingDayAggregate.book_id).where(ReadingDayAggregate.user_id == user_id).limit(1)
+        )
+        return result.first() is not None
+    
+    async def recompute_local_times(self, user_id: int, zone: ZoneInfo) -> int:
+        """
+        按指定时区重算用户所有阅读记录的 local_date / local_hour（调用方负责提交）
+        
+        Returns:
+            更新的记录数
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            result = await self.db.execute(
+                text("""
+                    UPDATE reading_sessions
+                    SET local_date = (start_time AT TIME ZONE :zone)::date,
+                        local_hour = extract(hour FROM start_time AT TIME ZONE :zone)
+                    WHERE user_id = :user_id
+                """),
+                {"zone": zone.key, "user_id": user_id}
+            )
+            return max(result.rowcount or 0, 0)
+        
+        updated = 0
+        key_columns = (ReadingSession.book_id, ReadingSession.page, ReadingSession.start_time)
+        last_key = None
+        while True:
+            query = (
+                select(*key_columns)
+                .where(ReadingSession.user_id == user_id)
+                .order_by(*key_columns)
+                .limit(RECOMPUTE_BATCH_SIZE)
+            )
+            if last_key is not None:
+                query = query.where(tuple_(*key_columns) > tuple_(*last_key))
+            rows = (await self.db.execute(query)).all()
+            if not rows:
+                return updated
+            for row in rows:
+                local_date, local_hour = local_date_hour(row.start_time, zone)
+                await self.db.execute(
+                    update(ReadingSession)
+                    .where(
+                        ReadingSession.book_id == row.book_id,
+                        ReadingSession.page == row.page,
+                        ReadingSession.start_time == row.start_time,
+                    )
+                    .values(local_date=local_date, local_hour=local_hour)
+                )
+            updated += len(rows)
+            last_key = tuple(rows[-1])
@@ -1,15 +1,66 @@
 import os
+import hashlib
+import logging
 import tempfile
 from typing import Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+import requests
 from webdav3.client import Client
+from webdav3.exceptions import ResponseErrorCode
+from webdav3.urn import Urn
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from backend.app.config import settings
 from backend.app.models.user import User
 from backend.app.utils.encryption import encrypt_data, decrypt_data
+from backend.app.utils.host_throttle import (
+    HostCircuitOpenError,
+    get_host_throttle,
+    parse_retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottledWebDAVClient(Client):
+    """按主机限流、退避重试并带熔断保护的WebDAV客户端"""
+    
+    def __init__(self, options):
+        super().__init__(options)
+        self.throttle = get_host_throttle(options['webdav_hostname'])
+        self._last_retry_after = None
+        self.session.hooks['response'].append(self._remember_retry_after)
+    
+    def _remember_retry_after(self, response, *args, **kwargs):
+        """记录最近一次响应的Retry-After头"""
+        self._last_retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        return response
+    
+    def execute_request(self, action, path, data=None, headers_ext=None):
+        return self.throttle.call(
+            lambda: super(ThrottledWebDAVClient, self).execute_request(
+                action, path, data=data, headers_ext=headers_ext
+            ),
+            retry_after_getter=lambda: self._last_retry_after,
+        )
+
+
+class RangeNotSupportedError(Exception):
+    """WebDAV服务器不支持Range请求"""
+
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+
+def file_sha256(path: str) -> str:
+    """计算本地文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 class WebDAVService:
@@ -76,7 +127,7 @@ class WebDAVService:
             await self.db.commit()
     
     def _create_webdav_client(self, config: Dict[str, str]) -> Client:
-        """创建WebDAV客户端"""
+        """创建WebDAV客户端（同一主机共享限流器和熔断器）"""
         webdav_options = {
             'webdav_hostname': config['url'],
             'webdav_login': config['username'],
@@ -84,7 +135,7 @@ class WebDAVService:
             'webdav_timeout': 30,
             'disable_check': True,  # 禁用验证检查，解决坚果云连接问题
         }
-        return Client(webdav_options)
+        return ThrottledWebDAVClient(webdav_options)
     
     def _test_connection_sync(self, config: Dict[str, str]) -> bool:
         """同步测试WebDAV连接"""
@@ -115,8 +166,158 @@ class WebDAVService:
             print(f"WebDAV连接测试异常: {e}")
             return False
     
-    def _download_file_sync(self, config: Dict[str, str], remote_path: str, local_path: str) -> bool:
-        """同步下载文件"""
+    def _get_remote_size(self, client: Client, remote_path: str) -> Optional[int]:
+        """通过PROPFIND获取远程文件大小，服务器不支持时返回None"""
+        try:
+            size = client.info(remote_path).get('size')
+            return int(size) if size not in (None, '') else None
+        except Exception as e:
+            logger.warning(f"获取远程文件大小失败，将不校验文件大小: {e}")
+            return None
+    
+    def _download_range(
+        self,
+        client: Client,
+        remote_path: str,
+        local_path: str,
+        start: int,
+        end: Optional[int],
+        allow_restart: bool = False
+    ) -> int:
+        """
+        下载 [start, end] 字节范围并写入本地文件的对应位置
+        
+        连接中断或服务器提前结束响应时，使用Range请求从最后收到的字节继续下载。
+        
+        Args:
+            client: WebDAV客户端
+            remote_path: 远程文件路径
+            local_path: 本地文件路径（必须已存在）
+            start: 起始字节
+            end: 结束字节（包含），None表示直到文件末尾
+            allow_restart: 服务器忽略Range时是否允许从头重新下载；
+                为False时抛出RangeNotSupportedError
+        
+        Returns:
+            本地文件中已写入的末尾位置（不含）；服务器返回416时可能小于 end + 1
+        """
+        urn_path = Urn(remote_path).quote()
+        position = start
+        attempts = 0
+        
+        with open(local_path, 'r+b') as f:
+            while end is None or position <= end:
+                if attempts > settings.WEBDAV_DOWNLOAD_MAX_RESUMES:
+                    raise IOError(f"下载 {remote_path} 在第 {position} 字节处多次中断，放弃续传")
+                
+                headers = None
+                if position > 0 or not allow_restart:
+                    range_end = '' if end is None else str(end)
+                    headers = [f"Range: bytes={position}-{range_end}"]
+                
+                try:
+                    response = client.execute_request('download', urn_path, headers_ext=headers)
+                    if headers and response.status_code != 206:
+                        if not allow_restart:
+                            response.close()
+                            raise RangeNotSupportedError(f"服务器忽略了Range请求: {response.status_code}")
+                        logger.warning("服务器不支持续传，从头重新下载")
+                        position = 0
+                    
+                    f.seek(position)
+                    for chunk in response.iter_content(chunk_size=client.chunk_size):
+                        if end is not None:
+                            chunk = chunk[:end + 1 - position]
+                        f.write(chunk)
+                        position += len(chunk)
+                        if end is not None and position > end:
+                            break
+                    response.close()
+                    
+                    if end is None:
+                        f.truncate(position)
+                        break
+                except ResponseErrorCode as e:
+                    if e.code == 416:
+                        # 请求的范围已超出文件末尾（文件已下载完，或远程文件变短），由调用方核对收到的字节数
+                        break
+                    raise
+                except requests.RequestException as e:
+                    logger.warning(f"下载 {remote_path} 中断于第 {position} 字节: {e}")
+                
+                attempts += 1
+                if end is not None and position <= end:
+                    logger.info(f"从第 {position} 字节续传 ({attempts}/{settings.WEBDAV_DOWNLOAD_MAX_RESUMES})")
+        
+        return position
+    
+    def _download_parallel(
+        self,
+        config: Dict[str, str],
+        remote_path: str,
+        local_path: str,
+        total_size: int
+    ) -> int:
+        """
+        将大文件拆成多个Range并行下载，每个分段独立续传
+        
+        Returns:
+            各分段实际收到的字节数之和，有分段没有下载完整时小于total_size
+        """
+        segments = settings.WEBDAV_DOWNLOAD_SEGMENTS
+        segment_size = -(-total_size // segments)
+        ranges = [
+            (start, min(start + segment_size, total_size) - 1)
+            for start in range(0, total_size, segment_size)
+        ]
+        
+        def download_segment(byte_range):
+            # requests.Session不是线程安全的，每个分段使用独立的客户端
+            client = self._create_webdav_client(config)
+            return self._download_range(client, remote_path, local_path, *byte_range)
+        
+        logger.info(f"并行下载 {remote_path}: {total_size} 字节, {len(ranges)} 个分段")
+        with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            positions = list(pool.map(download_segment, ranges))
+        return sum(position - start for (start, _), position in zip(ranges, positions))
+    
+    def _verify_download(
+        self,
+        local_path: str,
+        expected_size: Optional[int],
+        received: int
+    ) -> bool:
+        """
+        在解析前校验下载文件的完整性和SQLite文件头
+        
+        本地文件在下载前已预分配为expected_size，文件大小不能说明下载完整，
+        因此核对的是实际收到的字节数。
+        """
+        if not os.path.exists(local_path):
+            logger.warning(f"文件下载失败: {local_path}")
+            return False
+        
+        if os.path.getsize(local_path) == 0:
+            logger.warning(f"文件下载失败或文件为空: {local_path}")
+            return False
+        if expected_size is not None and received != expected_size:
+            logger.warning(f"文件下载不完整: 期望 {expected_size} 字节, 实际收到 {received} 字节")
+            return False
+        
+        with open(local_path, 'rb') as f:
+            if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                logger.warning(f"下载的文件不是有效的SQLite数据库: {local_path}")
+                return False
+        
+        return True
+    
+    def _download_file_sync(
+        self,
+        config: Dict[str, str],
+        remote_path: str,
+        local_path: str
+    ) -> bool:
+        """同步下载文件（支持断点续传，大文件分段并行下载）"""
         try:
             client = self._create_webdav_client(config)
             
@@ -125,28 +326,51 @@ class WebDAVService:
                 print(f"远程文件不存在: {remote_path}")
                 return False
             
-            # 下载文件
-            client.download_sync(remote_path=remote_path, local_path=local_path)
+            expected_size = self._get_remote_size(client, remote_path)
+            with open(local_path, 'wb') as f:
+                if expected_size:
+                    f.truncate(expected_size)
+            
+            received = None
+            if (
+                expected_size
+                and settings.WEBDAV_DOWNLOAD_SEGMENTS > 1
+                and expected_size >= settings.WEBDAV_PARALLEL_DOWNLOAD_MIN_BYTES
+            ):
+                try:
+                    received = self._download_parallel(config, remote_path, local_path, expected_size)
+                except RangeNotSupportedError as e:
+                    logger.warning(f"{e}，改为单连接下载")
+            
+            if received is None:
+                received = self._download_range(
+                    client,
+                    remote_path,
+                    local_path,
+                    0,
+                    expected_size - 1 if expected_size else None,
+                    allow_restart=True
+                )
             
             # 检查本地文件是否下载成功
-            if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
-                return True
-            else:
-                print(f"文件下载失败或文件为空: {local_path}")
-                return False
-                
+            return self._verify_download(local_path, expected_size, received)
+        
         except Exception as e:
             print(f"下载文件时出错: {e}")
             return False
     
-    async def download_statistics_file(self, user_id: int, remote_path: str = None) -> Optional[str]:
+    async def download_statistics_file(
+        self,
+        user_id: int,
+        remote_path: str = None
+    ) -> Optional[str]:
         """
         从WebDAV下载statistics.sqlite3文件
         
         Args:
             user_id: 用户ID
             remote_path: 远程文件路径，如果为None则使用默认路径
-            
+        
         Returns:
             本地临时文件路径，如果下载失败则返回None
         """
@@ -181,7 +405,7 @@ class WebDAVService:
                 if os.path.exists(local_path):
                     os.remove(local_path)
                 return None
-                
+        
         except Exception as e:
             print(f"异步下载文件异常: {e}")
             # 清理可能的临时文件
@@ -255,6 +479,10 @@ class WebDAVService:
                     return path
                 else:
                     print(f"  ❌ 文件不存在: {path}")
+            except HostCircuitOpenError as e:
+                # 主机已熔断，继续尝试其他路径只会被直接拒绝
+                print(f"  ⏸️ {e}")
+                return None
             except Exception as e:
                 print(f"  ❌ 检查路径 {path} 时出错: {e}")
                 continue
@@ -0,0 +1,196 @@
+"""
+批量任务执行器
+
+供重算、离线导入等批处理命令使用：asyncio工作池并发执行任务，
+按任务数和写入行数限速以保护线上数据库，进度写入检查点文件以便中断后续跑。
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 任务: (唯一键, 描述)；处理函数返回与 DataSyncService 同步结果相同格式的字典
+Job = Tuple[str, Any]
+JobHandler = Callable[[Any], Awaitable[Dict[str, Any]]]
+
+
+class AsyncThrottle:
+    """
+    批处理限速器
+    
+    jobs_per_minute 限制任务启动速率；rows_per_second 按已写入的行数推迟后续任务，
+    使整体写入速率不超过上限。为0表示不限制。
+    """
+    
+    def __init__(self, jobs_per_minute: float = 0, rows_per_second: float = 0):
+        self.job_interval = 60.0 / jobs_per_minute if jobs_per_minute > 0 else 0.0
+        self.rows_per_second = rows_per_second
+        self._next_start = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+    
+    async def acquire(self) -> None:
+        """等待到允许启动下一个任务"""
+        async with self._lock:
+            delay = self._next_start - time.monotonic()
+            if delay > 0:
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+            self._next_start = max(self._next_start, time.monotonic()) + self.job_interval
+    
+    def record_rows(self, rows: int) -> None:
+        """登记已写入的行数"""
+        if self.rows_per_second > 0 and rows > 0:
+            self._next_start = max(self._next_start, time.monotonic()) + rows / self.rows_per_second
+
+
+class Checkpoint:
+    """
+    JSON检查点文件
+    
+    记录每个任务的最新结果，每完成一个任务原子写入一次。
+    """
+    
+    def __init__(self, path: Optional[str], resume: bool = False):
+        self.path = path
+        self.results: Dict[str, Dict[str, Any]] = {}
+        if path and resume and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.results = json.load(f).get('results', {})
+    
+    def is_done(self, key: str) -> bool:
+        return bool(self.results.get(key, {}).get('success'))
+    
+    def record(self, key: str, result: Dict[str, Any]) -> None:
+        self.results[key] = {
+            'success': result.get('success', False),
+            'error': result.get('error'),
+            'books_synced': result.get('books_synced', 0),
+            'sessions_synced': result.get('sessions_synced', 0),
+            'finished_at': datetime.now(timezone.utc).isoformat()
+        }
+        self._save()
+    
+    def _save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'results': self.results}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class ProgressReporter:
+    """批处理进度与吞吐量统计"""
+    
+    def __init__(self, total: int, label: str = "任务"):
+        self.total = total
+        self.label = label
+        self.done = 0
+        self.failed = 0
+        self.rows = 0
+        self.started_at = time.monotonic()
+    
+    def update(self, key: str, result: Dict[str, Any]) -> None:
+        self.done += 1
+        if not result.get('success'):
+            self.failed += 1
+        self.rows += result.get('sessions_synced', 0) or 0
+        
+        elapsed = time.monotonic() - self.started_at
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        status = "成功" if result.get('success') else f"失败: {result.get('error')}"
+        logger.info(f"[{self.done}/{self.total}] {self.label} {key} {status} | "
+                    f"{rate * 60:.1f} 个/分钟, {self.rows / elapsed if elapsed > 0 else 0:.0f} 行/秒, "
+                    f"预计剩余 {eta:.0f} 秒")
+    
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'total': self.total,
+            'succeeded': self.done - self.failed,
+            'failed': self.failed,
+            'rows_written': self.rows,
+            'elapsed_seconds': round(elapsed, 2),
+            'jobs_per_second': round(self.done / elapsed, 3) if elapsed > 0 else 0.0,
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class BulkRunner:
+    """并发批量任务执行器"""
+    
+    def __init__(
+        self,
+        handler: JobHandler,
+        workers: int = 4,
+        throttle: Optional[AsyncThrottle] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        label: str = "任务",
+    ):
+        """
+        Args:
+            handler: 处理单个任务的协程函数
+            workers: 并发工作协程数
+            throttle: 限速器
+            checkpoint: 检查点，续跑时跳过已成功的任务
+            label: 日志中的任务名称
+        """
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.throttle = throttle or AsyncThrottle()
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.label = label
+    
+    async def run(self, jobs: Iterable[Job]) -> Dict[str, Any]:
+        """
+        执行所有任务
+        
+        Returns:
+            汇总统计（total / succeeded / failed / skipped / rows_written / 吞吐量）
+        """
+        pending: List[Job] = []
+        skipped = 0
+        for key, payload in jobs:
+            if self.checkpoint.is_done(key):
+                skipped += 1
+            else:
+                pending.append((key, payload))
+        if skipped:
+            logger.info(f"检查点中已完成 {skipped} 个{self.label}，跳过")
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in pending:
+            queue.put_nowait(job)
+        reporter = ProgressReporter(len(pending), self.label)
+        
+        async def worker() -> None:
+            while True:
+                try:
+                    key, payload = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self.throttle.acquire()
+                try:
+                    result = await self.handler(payload)
+                except Exception as e:
+                    result = {'success': False, 'error': str(e), 'books_synced': 0, 'sessions_synced': 0}
+                self.throttle.record_rows(result.get('sessions_synced', 0) or 0)
+                self.checkpoint.record(key, result)
+                reporter.update(key, result)
+        
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(pending)) or 1)))
+        
+        summary = reporter.summary()
+        summary['skipped'] = skipped
+        summary['throttle_wait_seconds'] = round(self.throttle.waited_seconds, 2)
+        return summary
@@ -0,0 +1,180 @@
+"""
+离线批量导入本地统计文件
+
+把本地的KOReader statistics.sqlite3文件通过 DataSyncService 的解析/导入流程并发导入，
+用于历史数据回填和大批量用户迁移。
+
+用法:
+    python -m backend.app.tasks.import_files alice=/data/alice/statistics.sqlite3 bob=/data/bob.sqlite3
+    python -m backend.app.tasks.import_files --manifest users.csv --workers 8 --resume
+
+清单文件每行一条 "用户名或用户ID,文件路径"，以#开头的行忽略；也支持 [{"user": ..., "path": ...}] 格式的JSON文件。
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.database import AsyncSessionLocal
+from backend.app.models.user import User
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.services.webdav_service import SQLITE_HEADER
+from backend.app.tasks.bulk_runner import AsyncThrottle, BulkRunner, Checkpoint
+
+logger = logging.getLogger(__name__)
+
+ImportPair = Tuple[str, str]
+
+
+def parse_pair(value: str) -> ImportPair:
+    """解析命令行中的 用户=路径"""
+    user, sep, path = value.partition("=")
+    if not sep or not user.strip() or not path.strip():
+        raise argparse.ArgumentTypeError(f"格式应为 用户=路径: {value}")
+    return user.strip(), path.strip()
+
+
+def load_manifest(manifest_path: str) -> List[ImportPair]:
+    """读取导入清单（CSV或JSON），相对路径按清单文件所在目录解析"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    pairs: List[ImportPair] = []
+    
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        if manifest_path.endswith(".json"):
+            rows = [(str(item["user"]), item["path"]) for item in json.load(f)]
+        else:
+            rows = [
+                (row[0].strip(), row[1].strip())
+                for row in csv.reader(f)
+                if row and row[0].strip() and not row[0].startswith("#") and len(row) >= 2
+            ]
+    
+    for user, path in rows:
+        pairs.append((user, os.path.join(base_dir, os.path.expanduser(path))))
+    return pairs
+
+
+class LocalFileImporter:
+    """本地统计文件并发导入器"""
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        rows_per_second: Optional[float] = None,
+        checkpoint_path: Optional[str] = None,
+        resume: bool = False,
+        archive: bool = True,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ):
+        """
+        Args:
+            workers: 并发数，默认读取 REPROCESS_WORKERS
+            rows_per_second: 每秒最多写入的阅读记录数，默认读取 REPROCESS_MAX_ROWS_PER_SECOND
+            checkpoint_path: 检查点文件路径，为空时不记录检查点
+            resume: 是否从检查点续跑
+            archive: 是否同时归档导入的文件
+            session_factory: 数据库会话工厂
+        """
+        self.workers = workers or settings.REPROCESS_WORKERS
+        self.throttle = AsyncThrottle(
+            rows_per_second=settings.REPROCESS_MAX_ROWS_PER_SECOND if rows_per_second is None else rows_per_second
+        )
+        self.checkpoint = Checkpoint(checkpoint_path, resume)
+        self.archive = archive
+        self.session_factory = session_factory
+        self._user_ids: Dict[str, int] = {}
+        # 导入是按用户全量替换，同一用户的多个文件必须串行
+        self._user_locks: Dict[int, asyncio.Lock] = {}
+    
+    async def resolve_users(self, users: Sequence[str]) -> None:
+        """一次查询解析所有用户名/用户ID"""
+        names = list(set(users))
+        ids = [int(u) for u in names if u.isdigit()]
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(User.id, User.username).where(or_(User.username.in_(names), User.id.in_(ids)))
+            )
+            for row in result:
+                self._user_ids[row.username] = row.id
+                self._user_ids[str(row.id)] = row.id
+    
+    async def import_file(self, pair: ImportPair) -> Dict[str, Any]:
+        """导入单个文件，每个文件使用独立的数据库会话"""
+        user, path = pair
+        user_id = self._user_ids.get(user)
+        if user_id is None:
+            return {'success': False, 'error': f'用户不存在: {user}', 'books_synced': 0, 'sessions_synced': 0}
+        if not os.path.isfile(path):
+            return {'success': False, 'error': f'文件不存在: {path}', 'books_synced': 0, 'sessions_synced': 0}
+        with open(path, 'rb') as f:
+            if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                return {'success': False, 'error': f'不是SQLite文件: {path}', 'books_synced': 0, 'sessions_synced': 0}
+        
+        async with self._user_locks.setdefault(user_id, asyncio.Lock()):
+            async with self.session_factory() as session:
+                sync_service = DataSyncService(session)
+                return await sync_service.ingest_statistics_file(user_id, path, path, archive=self.archive)
+    
+    async def run(self, pairs: Sequence[ImportPair]) -> Dict[str, Any]:
+        """并发导入所有文件并返回汇总统计"""
+        await self.resolve_users([user for user, _ in pairs])
+        total_bytes = sum(os.path.getsize(path) for _, path in pairs if os.path.isfile(path))
+        logger.info(f"开始导入 {len(pairs)} 个统计文件 ({total_bytes / 1024 / 1024:.1f} MB)，并发 {self.workers}")
+        
+        runner = BulkRunner(
+            self.import_file,
+            workers=self.workers,
+            throttle=self.throttle,
+            checkpoint=self.checkpoint,
+            label="文件",
+        )
+        summary = await runner.run((f"{user}:{path}", (user, path)) for user, path in pairs)
+        if summary['elapsed_seconds'] > 0:
+            summary['megabytes_per_second'] = round(total_bytes / 1024 / 1024 / summary['elapsed_seconds'], 2)
+        logger.info(f"导入完成: {summary}")
+        return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="并发导入本地KOReader statistics.sqlite3文件")
+    parser.add_argument("pairs", nargs="*", type=parse_pair, help="用户=文件路径（用户可以是用户名或ID）")
+    parser.add_argument("--manifest", "-m", help="导入清单文件（CSV: 用户,路径；或JSON）")
+    parser.add_argument("--workers", "-w", type=int, default=settings.REPROCESS_WORKERS, help="并发数")
+    parser.add_argument("--rows-per-second", type=float, default=settings.REPROCESS_MAX_ROWS_PER_SECOND,
+                        help="每秒最多写入的阅读记录数 (0为不限)")
+    parser.add_argument("--checkpoint", help="检查点文件路径，配合--resume续跑")
+    parser.add_argument("--resume", action="store_true", help="从检查点续跑，跳过已成功的文件")
+    parser.add_argument("--no-archive", action="store_true", help="不归档导入的文件")
+    args = parser.parse_args(argv)
+    
+    pairs = list(args.pairs)
+    if args.manifest:
+        pairs.extend(load_manifest(args.manifest))
+    if not pairs:
+        parser.error("请提供 用户=路径 参数或 --manifest 清单文件")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume 需要同时指定 --checkpoint")
+    
+    logging.basicConfig(level=logging.INFO)
+    importer = LocalFileImporter(
+        workers=args.workers,
+        rows_per_second=args.rows_per_second,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        archive=not args.no_archive,
+    )
+    summary = asyncio.run(importer.run(pairs))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if summary['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
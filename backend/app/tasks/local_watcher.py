@@ -0,0 +1,255 @@
+"""
+本地目录监听同步源
+
+适用于通过Syncthing等工具把KOReader目录镜像到服务器本地的场景：
+监听配置的目录，statistics.sqlite3写入稳定后直接走DataSyncService的解析/导入流程，
+无需经过WebDAV网络下载。
+"""
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional, Tuple, AsyncIterator, Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.database import AsyncSessionLocal
+from backend.app.models.user import User
+from backend.app.services.data_sync_service import DataSyncService
+
+try:
+    # uvicorn[standard] 已依赖 watchfiles（Linux下基于inotify）
+    from watchfiles import awatch
+except ImportError:
+    # 未安装时退回轮询
+    awatch = None
+
+logger = logging.getLogger(__name__)
+
+# KOReader统计文件可能出现的位置（相对于监听目录）
+STATISTICS_FILE_CANDIDATES = [
+    "statistics.sqlite3",
+    "statistics.sqlite",
+    os.path.join("settings", "statistics.sqlite3"),
+]
+
+FileSignature = Tuple[int, int]
+
+
+class LocalStatisticsWatcher:
+    """本地statistics.sqlite3文件监听器"""
+    
+    def __init__(
+        self,
+        watch_paths: Optional[Dict[str, str]] = None,
+        debounce_seconds: Optional[float] = None,
+        poll_interval_seconds: Optional[float] = None,
+        force_polling: Optional[bool] = None,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ):
+        """
+        Args:
+            watch_paths: 用户名到监听目录的映射，默认读取 LOCAL_WATCH_PATHS
+            debounce_seconds: 文件停止变化多久后才开始导入
+            poll_interval_seconds: 轮询模式下的检查间隔
+            force_polling: 是否强制使用轮询（网络文件系统上inotify不可靠）
+            session_factory: 数据库会话工厂，测试时可替换
+        """
+        self.watch_paths = watch_paths if watch_paths is not None else settings.LOCAL_WATCH_PATHS
+        self.debounce_seconds = (
+            debounce_seconds if debounce_seconds is not None else settings.LOCAL_WATCH_DEBOUNCE_SECONDS
+        )
+        self.poll_interval_seconds = (
+            poll_interval_seconds if poll_interval_seconds is not None
+            else settings.LOCAL_WATCH_POLL_INTERVAL_SECONDS
+        )
+        self.force_polling = force_polling if force_polling is not None else settings.LOCAL_WATCH_FORCE_POLLING
+        self.session_factory = session_factory
+        
+        self.is_running = False
+        self._stop_event = asyncio.Event()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._last_ingested: Dict[str, FileSignature] = {}
+        self._last_results: Dict[str, dict] = {}
+    
+    @property
+    def mode(self) -> str:
+        """当前使用的监听方式"""
+        return "polling" if self.force_polling or awatch is None else "inotify"
+    
+    @staticmethod
+    def find_statistics_file(directory: str) -> Optional[str]:
+        """在监听目录中查找statistics.sqlite3文件"""
+        for candidate in STATISTICS_FILE_CANDIDATES:
+            path = os.path.join(directory, candidate)
+            if os.path.isfile(path):
+                return path
+        return None
+    
+    @staticmethod
+    def _signature(path: Optional[str]) -> Optional[FileSignature]:
+        """文件签名：(修改时间ns, 大小)"""
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    async def _changes(self, directory: str) -> AsyncIterator[None]:
+        """目录内可能有统计文件变化时产出一次"""
+        if awatch is not None:
+            async for _ in awatch(
+                directory,
+                watch_filter=lambda change, path: os.path.basename(path).startswith("statistics.sqlite"),
+                stop_event=self._stop_event,
+                force_polling=self.force_polling,
+                poll_delay_ms=int(self.poll_interval_seconds * 1000),
+                recursive=True,
+            ):
+                yield
+            return
+        
+        last_signature = self._signature(self.find_statistics_file(directory))
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.poll_interval_seconds)
+                return
+            except asyncio.TimeoutError:
+                pass
+            signature = self._signature(self.find_statistics_file(directory))
+            if signature != last_signature:
+                last_signature = signature
+                yield
+    
+    async def _wait_until_stable(self, directory: str) -> Optional[str]:
+        """防抖：等待文件在debounce_seconds内不再变化，返回稳定后的文件路径"""
+        path = self.find_statistics_file(directory)
+        signature = self._signature(path)
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.debounce_seconds)
+                return None
+            except asyncio.TimeoutError:
+                pass
+            new_path = self.find_statistics_file(directory)
+            new_signature = self._signature(new_path)
+            if new_path == path and new_signature == signature:
+                return path
+            path, signature = new_path, new_signature
+        return None
+    
+    async def _get_user_id(self, session: AsyncSession, username: str) -> Optional[int]:
+        result = await session.execute(select(User.id).where(User.username == username))
+        return result.scalar_one_or_none()
+    
+    async def ingest(self, username: str, path: str) -> dict:
+        """
+        将本地统计文件导入指定用户
+        
+        先复制一份快照再解析，避免SQLite读取时与同步工具的写入互相影响。
+        """
+        fd, snapshot_path = tempfile.mkstemp(prefix="statistics_local_", suffix=".sqlite3")
+        os.close(fd)
+        try:
+            await asyncio.to_thread(shutil.copy2, path, snapshot_path)
+            async with self.session_factory() as session:
+                user_id = await self._get_user_id(session, username)
+                if user_id is None:
+                    return {
+                        'success': False,
+                        'error': f'用户不存在: {username}',
+                        'books_synced': 0,
+                        'sessions_synced': 0
+                    }
+                sync_service = DataSyncService(session)
+                return await sync_service.ingest_statistics_file(user_id, snapshot_path, path)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'导入本地统计文件时出错: {str(e)}',
+                'books_synced': 0,
+                'sessions_synced': 0
+            }
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+    
+    async def _ingest_if_changed(self, username: str, path: Optional[str]) -> None:
+        signature = self._signature(path)
+        if signature is None or self._last_ingested.get(username) == signature:
+            return
+        
+        result = await self.ingest(username, path)
+        self._last_results[username] = result
+        if result['success']:
+            self._last_ingested[username] = signature
+            logger.info(f"本地目录同步用户 {username} 成功: "
+                        f"书籍 {result['books_synced']}, 会话 {result['sessions_synced']}")
+        else:
+            logger.warning(f"本地目录同步用户 {username} 失败: {result['error']}")
+    
+    async def _watch_directory(self, username: str, directory: str) -> None:
+        """监听单个目录，启动时先导入一次现有文件"""
+        logger.info(f"开始监听用户 {username} 的本地目录: {directory} ({self.mode})")
+        try:
+            await self._ingest_if_changed(username, self.find_statistics_file(directory))
+            async for _ in self._changes(directory):
+                path = await self._wait_until_stable(directory)
+                if path is None:
+                    continue
+                await self._ingest_if_changed(username, path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"监听本地目录 {directory} 时出错: {e}")
+    
+    def start(self) -> None:
+        """启动所有目录的监听任务"""
+        if self.is_running:
+            logger.warning("本地目录监听已经在运行")
+            return
+        
+        self._stop_event = asyncio.Event()
+        for username, directory in self.watch_paths.items():
+            if not os.path.isdir(directory):
+                logger.warning(f"本地监听目录不存在，已跳过: {directory}")
+                continue
+            self._tasks[username] = asyncio.create_task(self._watch_directory(username, directory))
+        self.is_running = True
+    
+    async def stop(self) -> None:
+        """停止所有监听任务"""
+        if not self.is_running:
+            return
+        
+        self._stop_event.set()
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        self.is_running = False
+        logger.info("本地目录监听已停止")
+    
+    def get_status(self) -> dict:
+        """获取监听状态"""
+        return {
+            "running": self.is_running,
+            "mode": self.mode,
+            "paths": {
+                username: {
+                    "directory": directory,
+                    "watching": username in self._tasks and not self._tasks[username].done(),
+                    "last_result": self._last_results.get(username),
+                }
+                for username, directory in self.watch_paths.items()
+            },
+        }
+
+
+# 全局监听器实例
+local_watcher = LocalStatisticsWatcher()
@@ -0,0 +1,137 @@
+"""
+派生数据批量重算
+
+修改派生表或聚合规则后，从本地归档的原始统计文件为全部（或指定）用户重建书籍、阅读记录等派生数据，
+不访问WebDAV。
+
+用法:
+    python -m backend.app.tasks.reprocess                      # 所有有归档的用户
+    python -m backend.app.tasks.reprocess --users alice,bob    # 指定用户（用户名或ID）
+    python -m backend.app.tasks.reprocess --resume             # 中断后续跑，跳过已成功的用户
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.database import AsyncSessionLocal
+from backend.app.models.statistics_archive import StatisticsArchive
+from backend.app.models.user import User
+from backend.app.services.archive_service import ArchiveService
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.tasks.bulk_runner import AsyncThrottle, BulkRunner, Checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+class ReprocessPipeline:
+    """派生数据批量重算流水线"""
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        jobs_per_minute: Optional[float] = None,
+        rows_per_second: Optional[float] = None,
+        checkpoint_path: Optional[str] = None,
+        resume: bool = False,
+        fallback_webdav: bool = False,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ):
+        """
+        Args:
+            workers: 并发数，默认读取 REPROCESS_WORKERS
+            jobs_per_minute: 每分钟最多开始的用户数，默认读取 REPROCESS_MAX_JOBS_PER_MINUTE
+            rows_per_second: 每秒最多写入的阅读记录数，默认读取 REPROCESS_MAX_ROWS_PER_SECOND
+            checkpoint_path: 检查点文件路径，默认读取 REPROCESS_CHECKPOINT_PATH
+            resume: 是否从检查点续跑
+            fallback_webdav: 没有归档的用户是否退回从WebDAV下载
+            session_factory: 数据库会话工厂
+        """
+        self.workers = workers or settings.REPROCESS_WORKERS
+        self.throttle = AsyncThrottle(
+            settings.REPROCESS_MAX_JOBS_PER_MINUTE if jobs_per_minute is None else jobs_per_minute,
+            settings.REPROCESS_MAX_ROWS_PER_SECOND if rows_per_second is None else rows_per_second,
+        )
+        self.checkpoint = Checkpoint(checkpoint_path or settings.REPROCESS_CHECKPOINT_PATH, resume)
+        self.fallback_webdav = fallback_webdav
+        self.session_factory = session_factory
+    
+    async def select_users(self, users: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        选择需要重算的用户
+        
+        Args:
+            users: 用户名或用户ID列表；为空时选择所有有归档文件的用户
+        """
+        query = select(User.id, User.username).order_by(User.id)
+        if users:
+            ids = [int(u) for u in users if u.isdigit()]
+            query = query.where(or_(User.id.in_(ids), User.username.in_(list(users))))
+        elif not self.fallback_webdav:
+            query = query.where(
+                select(StatisticsArchive.id).where(StatisticsArchive.user_id == User.id).exists()
+            )
+        
+        async with self.session_factory() as session:
+            result = await session.execute(query)
+            return [{'user_id': row.id, 'username': row.username} for row in result]
+    
+    async def reprocess_user(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """从归档重建单个用户的派生数据，每个用户使用独立的数据库会话"""
+        async with self.session_factory() as session:
+            sync_service = DataSyncService(session)
+            if self.fallback_webdav and await ArchiveService(session).get_archive(user['user_id']) is None:
+                return await sync_service.sync_user_data(user['user_id'])
+            return await sync_service.replay_user_data(user['user_id'])
+    
+    async def run(self, users: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """执行重算并返回汇总统计"""
+        selected = await self.select_users(users)
+        logger.info(f"开始重算 {len(selected)} 个用户的派生数据，并发 {self.workers}")
+        
+        runner = BulkRunner(
+            self.reprocess_user,
+            workers=self.workers,
+            throttle=self.throttle,
+            checkpoint=self.checkpoint,
+            label="用户",
+        )
+        summary = await runner.run((str(user['user_id']), user) for user in selected)
+        logger.info(f"重算完成: {summary}")
+        return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="从归档的统计文件批量重算派生数据")
+    parser.add_argument("--users", help="逗号分隔的用户名或用户ID，默认所有有归档的用户")
+    parser.add_argument("--workers", "-w", type=int, default=settings.REPROCESS_WORKERS, help="并发数")
+    parser.add_argument("--jobs-per-minute", type=float, default=settings.REPROCESS_MAX_JOBS_PER_MINUTE,
+                        help="每分钟最多开始的用户数 (0为不限)")
+    parser.add_argument("--rows-per-second", type=float, default=settings.REPROCESS_MAX_ROWS_PER_SECOND,
+                        help="每秒最多写入的阅读记录数 (0为不限)")
+    parser.add_argument("--checkpoint", default=settings.REPROCESS_CHECKPOINT_PATH, help="检查点文件路径")
+    parser.add_argument("--resume", action="store_true", help="从检查点续跑，跳过已成功的用户")
+    parser.add_argument("--fallback-webdav", action="store_true", help="没有归档的用户从WebDAV重新下载")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO)
+    pipeline = ReprocessPipeline(
+        workers=args.workers,
+        jobs_per_minute=args.jobs_per_minute,
+        rows_per_second=args.rows_per_second,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        fallback_webdav=args.fallback_webdav,
+    )
+    users = [u.strip() for u in args.users.split(",") if u.strip()] if args.users else None
+    summary = asyncio.run(pipeline.run(users))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
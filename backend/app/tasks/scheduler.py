@@ -10,7 +10,11 @@ from sqlalchemy import select
 from backend.app.config import settings
 from backend.app.database import AsyncSessionLocal
 from backend.app.models.user import User
+from backend.app.services.archive_service import ArchiveService
+from backend.app.services.compaction_service import CompactionService
 from backend.app.services.data_sync_service import DataSyncService
+from backend.app.services.maintenance_service import MaintenanceService
+from backend.app.services.partition_service import PartitionService
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -58,7 +62,7 @@ class SyncScheduler:
                                       f"会话 {result['sessions_synced']}")
                         else:
                             logger.warning(f"用户 {user.username} 同步失败: {result['error']}")
-                            
+                    
                     except Exception as e:
                         logger.error(f"同步用户 {user.username} 数据时出错: {e}")
                         sync_results.append({
@@ -77,9 +81,48 @@ class SyncScheduler:
                 
                 logger.info(f"自动同步完成: {successful_syncs}/{len(sync_results)} 用户同步成功, "
                           f"总计同步 {total_books} 本书籍, {total_sessions} 个会话")
-                
+            
             except Exception as e:
                 logger.error(f"自动同步过程中发生错误: {e}")
+        
+        # 大批量同步后立即检查是否需要VACUUM
+        if settings.MAINTENANCE_ENABLED:
+            await self.run_maintenance()
+    
+    async def run_maintenance(self):
+        """检查表膨胀情况，按需执行 VACUUM (ANALYZE)"""
+        async with AsyncSessionLocal() as session:
+            try:
+                maintenance_service = MaintenanceService(session)
+                result = await maintenance_service.run_maintenance()
+                for run in result['vacuumed']:
+                    logger.info(f"已对 {run['table']} 执行 VACUUM (ANALYZE)（{run['reason']}），"
+                              f"耗时 {run['duration_seconds']} 秒")
+            except Exception as e:
+                logger.error(f"数据库维护任务出错: {e}")
+    
+    async def maintain_partitions(self):
+        """创建未来的阅读记录分区，迁出默认分区中的记录并删除过期分区"""
+        async with AsyncSessionLocal() as session:
+            try:
+                partition_service = PartitionService(session)
+                result = await partition_service.run_partition_maintenance()
+                if result['created'] or result['dropped']:
+                    logger.info(f"分区维护完成: 新建 {result['created']}, 删除 {result['dropped']}")
+            except Exception as e:
+                logger.error(f"分区维护任务出错: {e}")
+    
+    async def compact_reading_sessions(self):
+        """把超过保留期的逐页阅读记录压缩为按天汇总和页码位图"""
+        async with AsyncSessionLocal() as session:
+            try:
+                compaction_service = CompactionService(session)
+                result = await compaction_service.run_compaction()
+                if result['rows_compacted']:
+                    logger.info(f"阅读记录压缩完成（截止 {result['cutoff']}）: 用户 {result['users']}, "
+                              f"书籍 {result['books']}, 天数 {result['days']}, 删除记录 {result['rows_compacted']}")
+            except Exception as e:
+                logger.error(f"阅读记录压缩任务出错: {e}")
     
     async def sync_single_user(self, user_id: int):
         """同步单个用户的数据"""
@@ -94,10 +137,21 @@ class SyncScheduler:
                               f"会话 {result['sessions_synced']}")
                 else:
                     logger.warning(f"用户 {user_id} 定时同步失败: {result['error']}")
-                    
+            
             except Exception as e:
                 logger.error(f"同步用户 {user_id} 数据时出错: {e}")
     
+    async def cleanup_archives(self):
+        """按保留策略清理统计文件归档"""
+        async with AsyncSessionLocal() as session:
+            try:
+                archive_service = ArchiveService(session)
+                result = await archive_service.apply_retention()
+                logger.info(f"归档清理完成: 删除记录 {result['records_deleted']}, "
+                          f"删除文件 {result['blobs_deleted']}, 释放 {result['bytes_freed']} 字节")
+            except Exception as e:
+                logger.error(f"清理统计文件归档时出错: {e}")
+    
     def start(self):
         """启动调度器"""
         if self.is_running:
@@ -115,6 +169,50 @@ class SyncScheduler:
             replace_existing=True
         )
         
+        if settings.MAINTENANCE_ENABLED:
+            self.scheduler.add_job(
+                self.run_maintenance,
+                trigger=IntervalTrigger(minutes=settings.MAINTENANCE_INTERVAL_MINUTES),
+                id='database_maintenance',
+                name='数据库维护(VACUUM/ANALYZE)',
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True
+            )
+        
+        self.scheduler.add_job(
+            self.maintain_partitions,
+            trigger=IntervalTrigger(hours=settings.PARTITION_MAINTENANCE_INTERVAL_HOURS),
+            id='maintain_partitions',
+            name='阅读记录分区维护',
+            next_run_time=datetime.now(),  # 启动时立即检查一次，确保当前月份的分区存在
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        
+        if settings.READING_SESSIONS_COMPACT_AFTER_MONTHS > 0:
+            self.scheduler.add_job(
+                self.compact_reading_sessions,
+                trigger=IntervalTrigger(hours=settings.PARTITION_MAINTENANCE_INTERVAL_HOURS),
+                id='compact_reading_sessions',
+                name='压缩历史阅读记录',
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True
+            )
+        
+        if settings.ARCHIVE_ENABLED:
+            self.scheduler.add_job(
+                self.cleanup_archives,
+                trigger=IntervalTrigger(hours=settings.ARCHIVE_CLEANUP_INTERVAL_HOURS),
+                id='cleanup_archives',
+                name='清理统计文件归档',
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True
+            )
+        
         self.scheduler.start()
         self.is_running = True
         logger.info(f"定时同步调度器已启动，同步间隔: {settings.SYNC_INTERVAL_MINUTES} 分钟")
@@ -123,7 +221,7 @@ class SyncScheduler:
         """停止调度器"""
         if not self.is_running:
             return
-            
+        
         self.scheduler.shutdown()
         self.is_running = False
         logger.info("定时同步调度器已停止")
@@ -0,0 +1,42 @@
+"""
+列表分页游标
+
+游标记录上一页最后一行的排序键和ID，下一页从该位置之后开始（keyset分页），
+查询直接在 (user_id, 排序键, id) 索引上定位，耗时与翻到第几页无关。
+游标对客户端不透明：排序方式和键值编码为JSON后再做URL安全的base64。
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+INVALID_CURSOR = "无效的分页游标"
+
+
+def encode_cursor(sort: str, key: Optional[Any], row_id: int) -> str:
+    """由排序方式、最后一行的排序键和ID生成游标"""
+    if isinstance(key, datetime):
+        key = {"dt": key.isoformat()}
+    payload = json.dumps({"s": sort, "k": [key, row_id]}, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """
+    解析游标，返回 [排序键, ID]
+    
+    Raises:
+        ValueError: 游标格式错误或与当前排序方式不一致
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        key, row_id = payload["k"]
+        if payload["s"] != sort or not isinstance(row_id, int):
+            raise ValueError(INVALID_CURSOR)
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key["dt"])
+        return [key, row_id]
+    except (ValueError, TypeError, KeyError, UnicodeError, binascii.Error):
+        raise ValueError(INVALID_CURSOR)
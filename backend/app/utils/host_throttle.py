@@ -0,0 +1,335 @@
+"""
+WebDAV主机级限流与熔断
+
+同一WebDAV主机（例如坚果云）上的所有用户共享一个令牌桶和一个熔断器，
+避免在服务商已经返回429/503时继续高频请求。
+"""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Any, Optional, TypeVar
+from urllib.parse import urlparse
+
+import requests
+from webdav3.exceptions import ResponseErrorCode, NoConnection, ConnectionException
+
+from backend.app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 被视为限流或临时故障、需要退避重试的HTTP状态码
+THROTTLE_STATUS_CODES = {429, 503}
+RETRYABLE_STATUS_CODES = THROTTLE_STATUS_CODES | {500, 502, 504}
+
+
+class HostCircuitOpenError(Exception):
+    """WebDAV主机处于熔断状态，请求被直接拒绝"""
+    
+    def __init__(self, host: str, retry_in: float):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(f"WebDAV主机 {host} 已熔断，{retry_in:.0f} 秒后重试")
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    def acquire(self) -> float:
+        """
+        获取一个令牌，必要时阻塞等待
+        
+        Returns:
+            实际等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+    
+    def penalize(self, seconds: float) -> None:
+        """服务端要求暂停时清空令牌，让后续请求至少等待指定秒数（调用方负责限制上限，等待会占用线程）"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class CircuitBreaker:
+    """
+    熔断器
+    
+    closed: 正常放行；连续失败达到阈值后进入 open
+    open: 拒绝所有请求，直到恢复时间结束后进入 half_open
+    half_open: 只放行一个探测请求，成功则恢复 closed，失败则重新 open
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int, recovery_seconds: float):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_seconds = recovery_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.open_count = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def before_request(self) -> Optional[float]:
+        """
+        判断是否允许发起请求
+        
+        Returns:
+            None表示允许；否则返回距离下次允许探测的秒数
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return None
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.recovery_seconds - now
+                if remaining > 0:
+                    return remaining
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return self.recovery_seconds
+            self._probe_in_flight = True
+            return None
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+    
+    def record_failure(self, pause_seconds: Optional[float] = None, force_open: bool = False) -> bool:
+        """
+        记录一次失败
+        
+        Args:
+            pause_seconds: 服务端要求的暂停秒数（Retry-After）
+            force_open: 不论连续失败次数直接打开（服务端要求的暂停过长，不适合阻塞等待）
+        
+        Returns:
+            本次失败是否导致熔断器打开
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if force_open or self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                was_open = self.state == self.OPEN
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                if pause_seconds and pause_seconds > self.recovery_seconds:
+                    # 服务端给出的Retry-After更长时以服务端为准
+                    self.opened_at += pause_seconds - self.recovery_seconds
+                if not was_open:
+                    self.open_count += 1
+                return not was_open
+            return False
+
+
+class HostThrottle:
+    """单个WebDAV主机的限流器、熔断器和指标"""
+    
+    def __init__(self, host: str):
+        self.host = host
+        self.bucket = TokenBucket(
+            settings.WEBDAV_RATE_LIMIT_PER_SECOND,
+            settings.WEBDAV_RATE_LIMIT_BURST,
+        )
+        self.breaker = CircuitBreaker(
+            settings.WEBDAV_CIRCUIT_FAILURE_THRESHOLD,
+            settings.WEBDAV_CIRCUIT_RECOVERY_SECONDS,
+        )
+        self._metrics_lock = threading.Lock()
+        self.metrics: Dict[str, Any] = {
+            "requests": 0,
+            "successes": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "connection_errors": 0,
+            "retries": 0,
+            "rejected_by_circuit": 0,
+            "rate_limit_wait_seconds": 0.0,
+            "last_throttled_at": None,
+            "last_retry_after": None,
+        }
+    
+    def _incr(self, key: str, value: float = 1) -> None:
+        with self._metrics_lock:
+            self.metrics[key] += value
+    
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """计算第attempt次重试前的等待时间（指数退避 + 抖动，优先遵循Retry-After）"""
+        if retry_after is not None:
+            return min(retry_after, settings.WEBDAV_RETRY_MAX_BACKOFF_SECONDS)
+        delay = settings.WEBDAV_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+        delay = min(delay, settings.WEBDAV_RETRY_MAX_BACKOFF_SECONDS)
+        return delay * random.uniform(0.5, 1.0)
+    
+    def call(
+        self,
+        func: Callable[[], T],
+        retry_after_getter: Optional[Callable[[], Optional[float]]] = None,
+    ) -> T:
+        """
+        在限流和熔断保护下执行一次WebDAV请求
+        
+        Args:
+            func: 实际发起请求的函数
+            retry_after_getter: 返回最近一次响应中Retry-After秒数的函数
+        
+        Returns:
+            func的返回值
+        """
+        attempt = 0
+        while True:
+            retry_in = self.breaker.before_request()
+            if retry_in is not None:
+                self._incr("rejected_by_circuit")
+                raise HostCircuitOpenError(self.host, retry_in)
+            
+            waited = self.bucket.acquire()
+            if waited:
+                self._incr("rate_limit_wait_seconds", waited)
+            self._incr("requests")
+            
+            retry_after = None
+            try:
+                result = func()
+            except ResponseErrorCode as e:
+                if e.code not in RETRYABLE_STATUS_CODES:
+                    # 4xx等客户端错误说明主机本身可用
+                    self.breaker.record_success()
+                    raise
+                retry_after = retry_after_getter() if retry_after_getter else None
+                if e.code in THROTTLE_STATUS_CODES:
+                    self._record_throttled(e.code, retry_after)
+                else:
+                    self._incr("server_errors")
+                error = e
+            except (requests.ConnectionError, requests.Timeout, NoConnection, ConnectionException) as e:
+                self._incr("connection_errors")
+                error = e
+            except Exception:
+                # 404、423等由webdav3转换出的异常同样说明主机可用
+                self.breaker.record_success()
+                raise
+            else:
+                self.breaker.record_success()
+                self._incr("successes")
+                return result
+            
+            # Retry-After超过最大退避时间时不再睡眠等待，由熔断器在这段时间内直接拒绝请求
+            long_pause = retry_after is not None and retry_after > settings.WEBDAV_RETRY_MAX_BACKOFF_SECONDS
+            if self.breaker.record_failure(retry_after, force_open=long_pause):
+                logger.warning(f"WebDAV主机 {self.host} 连续失败，已熔断 "
+                               f"{max(settings.WEBDAV_CIRCUIT_RECOVERY_SECONDS, retry_after or 0):.0f} 秒")
+            if attempt >= settings.WEBDAV_MAX_RETRIES or self.breaker.state == CircuitBreaker.OPEN:
+                raise error
+            
+            delay = self._backoff(attempt, retry_after)
+            attempt += 1
+            self._incr("retries")
+            logger.info(f"WebDAV主机 {self.host} 请求失败({error})，{delay:.1f} 秒后第 {attempt} 次重试")
+            time.sleep(delay)
+    
+    def _record_throttled(self, code: int, retry_after: Optional[float]) -> None:
+        with self._metrics_lock:
+            self.metrics["throttled"] += 1
+            self.metrics["last_throttled_at"] = datetime.now(timezone.utc).isoformat()
+            self.metrics["last_retry_after"] = retry_after
+        # 同一主机上的其他请求也一起让路；等待会占用线程，最长只让路最大退避时间，更长的暂停由熔断器拒绝
+        pause = retry_after if retry_after is not None else 1 / self.bucket.rate
+        self.bucket.penalize(min(pause, settings.WEBDAV_RETRY_MAX_BACKOFF_SECONDS))
+        logger.warning(f"WebDAV主机 {self.host} 返回 {code}，Retry-After: {retry_after}")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取该主机的限流与熔断状态"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics["rate_limit_wait_seconds"] = round(metrics["rate_limit_wait_seconds"], 3)
+        retry_in = None
+        if self.breaker.state == CircuitBreaker.OPEN and self.breaker.opened_at is not None:
+            retry_in = max(0.0, self.breaker.opened_at + self.breaker.recovery_seconds - time.monotonic())
+        return {
+            "host": self.host,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "circuit_open_count": self.breaker.open_count,
+            "circuit_retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+            **metrics,
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期）"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_throttles: Dict[str, HostThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def get_host_key(url: str) -> str:
+    """从WebDAV URL中提取主机标识（不包含凭证）"""
+    parsed = urlparse(url)
+    return (parsed.hostname or url).lower() + (f":{parsed.port}" if parsed.port else "")
+
+
+def get_host_throttle(url: str) -> HostThrottle:
+    """获取（或创建）WebDAV URL所在主机的共享限流器"""
+    host = get_host_key(url)
+    with _throttles_lock:
+        throttle = _throttles.get(host)
+        if throttle is None:
+            throttle = HostThrottle(host)
+            _throttles[host] = throttle
+        return throttle
+
+
+def get_all_host_status() -> list:
+    """获取所有WebDAV主机的限流与熔断状态"""
+    with _throttles_lock:
+        throttles = list(_throttles.values())
+    return [throttle.get_status() for throttle in throttles]
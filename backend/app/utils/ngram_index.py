@@ -0,0 +1,135 @@
+"""
+字符n-gram索引
+
+中文书名没有空格分词，按单字和相邻两字（bigram）建立倒排表：关键词各个bigram
+（单字关键词用单字）中书籍最少的倒排表作为候选，再逐本确认关键词确实是连续子串。
+英文等按同样方式处理，不区分大小写和全半角。
+"""
+import sys
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+
+class IndexedBook(NamedTuple):
+    """索引中的一本书"""
+    id: int
+    title: str
+    author: Optional[str]
+    series: Optional[str]
+
+
+def normalize(text: Optional[str]) -> str:
+    """全半角统一、忽略大小写"""
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def _grams(text: str) -> Set[str]:
+    """文本中的单字和bigram（不含空白）"""
+    grams = {char for char in text if not char.isspace()}
+    grams.update(text[i:i + 2] for i in range(len(text) - 1) if not any(char.isspace() for char in text[i:i + 2]))
+    return grams
+
+
+def _append_posting(postings: Dict[str, array], gram: str, position: int) -> None:
+    """把书籍位置追加到倒排表（按位置升序追加）"""
+    ids = postings.get(gram)
+    if ids is None:
+        ids = postings[gram] = array("I")
+    ids.append(position)
+
+
+def _query_grams(token: str) -> Set[str]:
+    """查找关键词用到的倒排键：单字关键词用单字，否则用bigram"""
+    if len(token) == 1:
+        return {token}
+    return {token[i:i + 2] for i in range(len(token) - 1)}
+
+
+class NgramIndex:
+    """
+    一个用户全部书籍的书名、作者、系列n-gram索引，建好后只读
+    
+    书籍按 (书名长度, -ID) 排好位置，倒排表按位置升序保存，按顺序扫描倒排表即得到排好序的结果。
+    书名另有单独的倒排表：先从书名中找出包含关键词的书籍，不够数量时再找作者、系列包含的，
+    凑够数量即停止，不必扫描作者相同的全部书籍。
+    """
+    
+    def __init__(self, books: Iterable[IndexedBook]):
+        entries = sorted(((normalize(book.title), book) for book in books), key=lambda entry: (len(entry[0]), -entry[1].id))
+        self._books: List[IndexedBook] = []
+        self._titles: List[str] = []
+        self._texts: List[str] = []
+        self._title_postings: Dict[str, array] = {}
+        self._postings: Dict[str, array] = {}
+        for position, (title, book) in enumerate(entries):
+            # 字段之间用换行分隔，关键词不会跨字段匹配
+            text = "\n".join((title, normalize(book.author), normalize(book.series)))
+            self._books.append(book)
+            self._titles.append(title)
+            self._texts.append(text)
+            for gram in _grams(title):
+                _append_posting(self._title_postings, gram, position)
+            for gram in _grams(text):
+                _append_posting(self._postings, gram, position)
+        self.size_bytes = self._estimate_size()
+    
+    def __len__(self) -> int:
+        return len(self._books)
+    
+    def search(self, query: str, limit: int = 10) -> List[IndexedBook]:
+        """
+        查找书名、作者或系列包含关键词的书籍
+        
+        关键词按空白拆分，每段都要出现；排序依次为书名以关键词开头、书名包含关键词、
+        只有作者或系列包含，同一档中书名短的在前。
+        """
+        tokens = normalize(query).split()
+        if not tokens:
+            return []
+        phrase = " ".join(tokens)
+        grams = [gram for token in tokens for gram in _query_grams(token)]
+        
+        # 书名包含关键词：取最短的倒排表逐本确认是连续子串，书名开头的凑够数量即可结束
+        prefixed: List[int] = []
+        contained: List[int] = []
+        for position in self._candidates(self._title_postings, grams):
+            title = self._titles[position]
+            if title.startswith(phrase):
+                prefixed.append(position)
+                if len(prefixed) >= limit:
+                    break
+            elif phrase in title and len(contained) < limit:
+                contained.append(position)
+        found = (prefixed + contained)[:limit]
+        
+        # 只有作者、系列包含（或各段分散在不同字段中）
+        if len(found) < limit:
+            for position in self._candidates(self._postings, grams):
+                if phrase in self._titles[position]:
+                    continue
+                text = self._texts[position]
+                if all(token in text for token in tokens):
+                    found.append(position)
+                    if len(found) >= limit:
+                        break
+        return [self._books[position] for position in found]
+    
+    def _candidates(self, postings: Dict[str, array], grams: List[str]) -> array:
+        """关键词各倒排键中书籍最少的倒排表，有键不存在时为空"""
+        lists = [postings.get(gram) for gram in grams]
+        if not all(lists):
+            return array("I")
+        return min(lists, key=len)
+    
+    def _estimate_size(self) -> int:
+        """索引占用内存的估算值（字节），用于缓存按内存上限淘汰"""
+        size = sys.getsizeof(self._books) * 3
+        for postings in (self._title_postings, self._postings):
+            size += sys.getsizeof(postings)
+            for gram, ids in postings.items():
+                size += sys.getsizeof(gram) + sys.getsizeof(ids)
+        for book, title, text in zip(self._books, self._titles, self._texts):
+            size += sys.getsizeof(book) + sum(sys.getsizeof(value) for value in book if value is not None)
+            size += sys.getsizeof(title) + sys.getsizeof(text)
+        return size
@@ -0,0 +1,86 @@
+"""
+在线DDL辅助函数（供Alembic迁移使用）
+
+大表加列回填、设置NOT NULL和建索引时避免长事务和长时间的排他锁。
+这些函数需要在 op.get_context().autocommit_block() 中调用，每条语句单独提交。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# 每批回填的id范围
+BACKFILL_BATCH_SIZE = 50000
+
+
+def backfill_in_batches(table: str, update_sql: str, batch_size: int = BACKFILL_BATCH_SIZE) -> None:
+    """
+    按id范围分批执行回填UPDATE，每批单独提交
+    
+    update_sql 中用别名 t 指代目标表，并包含 :start / :end 两个参数，例如
+    "UPDATE highlights t SET ... WHERE t.id >= :start AND t.id < :end"
+    """
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, batch_size):
+        op.execute(sa.text(update_sql).bindparams(start=start, end=start + batch_size))
+
+
+def set_not_null(table: str, column: str) -> None:
+    """
+    逐个叶子分区设置 NOT NULL
+    
+    先加 NOT VALID 的CHECK约束再单独校验（只持有SHARE UPDATE EXCLUSIVE锁，不阻塞写入），
+    之后 SET NOT NULL 可以直接利用已校验的约束而不再全表扫描。
+    """
+    bind = op.get_bind()
+    leaves = bind.execute(
+        sa.text("SELECT relid::regclass::text FROM pg_partition_tree(to_regclass(:table)) WHERE isleaf"),
+        {"table": table}
+    ).scalars().all()
+    for leaf in leaves:
+        constraint = f"{leaf}_{column}_not_null"[:63]
+        op.execute(f"ALTER TABLE {leaf} ADD CONSTRAINT {constraint} CHECK ({column} IS NOT NULL) NOT VALID")
+        op.execute(f"ALTER TABLE {leaf} VALIDATE CONSTRAINT {constraint}")
+        op.execute(f"ALTER TABLE {leaf} ALTER COLUMN {column} SET NOT NULL")
+        op.execute(f"ALTER TABLE {leaf} DROP CONSTRAINT {constraint}")
+    # 所有分区都已NOT NULL，父表设置时不再扫描
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+
+
+def create_index_concurrently(name: str, table: str, definition: str, partition_suffix: str) -> None:
+    """
+    不阻塞写入地创建索引
+    
+    分区表不支持 CREATE INDEX CONCURRENTLY：先在父表上 ON ONLY 建立无效索引，
+    再对每个分区并发建索引并 ATTACH，全部挂上后父表索引自动变为有效。
+    
+    Args:
+        name: 索引名
+        table: 表名
+        definition: 列定义，例如 "(user_id, start_time) INCLUDE (duration)"
+        partition_suffix: 分区上索引名的后缀，分区索引命名为 <分区名>_<后缀>
+    """
+    bind = op.get_bind()
+    is_partitioned = bind.execute(
+        sa.text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table}
+    ).first() is not None
+    
+    if not is_partitioned:
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+        return
+    
+    children = bind.execute(
+        sa.text("""
+            SELECT c.relname
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table)
+        """),
+        {"table": table}
+    ).scalars().all()
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {definition}")
+    for child in children:
+        child_index = f"{child}_{partition_suffix}"
+        create_index_concurrently(child_index, child, definition, partition_suffix)
+        op.execute(f"ALTER INDEX {name} ATTACH PARTITION {child_index}")
@@ -0,0 +1,52 @@
+"""
+页码位图
+
+压缩后的阅读记录只保留"读过哪些页"，用位图表示：第n页对应第n位（字节 n // 8 的第 n % 8 位），
+一本500页的书只需63字节。多个位图按位或即为并集，置位数即为去重后的页数。
+"""
+from typing import Iterable, List, Optional
+
+# 位图能表示的最大页码，位图最大约125KB。导入时超出的记录已被排除，
+# 这里再跳过一次，数据库中已有的异常页码也不会生成超大的位图
+PAGE_MAX = 1000000
+
+
+def pages_to_bitmap(pages: Iterable[int]) -> bytes:
+    """页码集合转为位图，忽略不在 [0, PAGE_MAX] 内的页码"""
+    value = 0
+    for page in pages:
+        if 0 <= page <= PAGE_MAX:
+            value |= 1 << page
+    return _to_bytes(value)
+
+
+def bitmap_to_pages(bitmap: Optional[bytes]) -> List[int]:
+    """位图转为升序页码列表"""
+    value = _to_int(bitmap)
+    pages = []
+    while value:
+        low_bit = value & -value
+        pages.append(low_bit.bit_length() - 1)
+        value ^= low_bit
+    return pages
+
+
+def bitmap_or(*bitmaps: Optional[bytes]) -> bytes:
+    """多个位图的并集"""
+    value = 0
+    for bitmap in bitmaps:
+        value |= _to_int(bitmap)
+    return _to_bytes(value)
+
+
+def bitmap_count(bitmap: Optional[bytes]) -> int:
+    """位图中的页数"""
+    return _to_int(bitmap).bit_count()
+
+
+def _to_int(bitmap: Optional[bytes]) -> int:
+    return int.from_bytes(bitmap, "little") if bitmap else 0
+
+
+def _to_bytes(value: int) -> bytes:
+    return value.to_bytes((value.bit_length() + 7) // 8, "little")
@@ -0,0 +1,148 @@
+"""
+page_stat数据的列式中间表示
+
+统计文件中的阅读记录按列存放在紧凑的 array.array 中（int32页码/时长、int64时间戳），
+代替每行一个dict：百万行文件的内存占用从数百MB降到约24MB，
+映射、过滤等转换按整列执行，只为最终写入的行构造数据库参数。
+"""
+from array import array
+from datetime import datetime, timezone, tzinfo
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from backend.app.utils.page_bitmap import PAGE_MAX
+
+# 每次从SQLite读取的行数
+FETCH_CHUNK_SIZE = 10000
+
+INT32_MAX = 2147483647
+# reading_sessions.duration 为SMALLINT，单页时长超过约9小时的记录截断
+DURATION_MAX = 32767
+# start_time上限：9999-12-31 00:00 UTC。datetime最大到9999年，再晚的时间戳在
+# fromtimestamp或换算到东时区时溢出，留出一天余量
+START_TIME_MAX = 253402214400
+
+
+def page_stat_query(table: str, duration_column: str, since: Optional[int] = None) -> Tuple[str, tuple]:
+    """
+    生成读取page_stat表的SQL及参数
+    
+    在SQLite内完成与book表的关联和过滤：没有md5的书籍、NULL和非数值时间戳、
+    超出datetime范围的时间戳、超过PAGE_MAX的页码直接排除，数值截断到int32范围，
+    返回的每一行都可以直接写入。
+    
+    Args:
+        table: page_stat_data（当前格式）或page_stat（旧格式）
+        duration_column: 时长字段名（旧格式为period）
+        since: 只读取start_time大于该Unix时间戳的记录
+    """
+    sql = f"""
+        SELECT p.id_book, p.page, CAST(p.start_time AS INTEGER),
+               MIN(MAX(COALESCE(p.{duration_column}, 0), 0), {DURATION_MAX}),
+               MIN(MAX(COALESCE(p.total_pages, 0), 0), {INT32_MAX})
+        FROM {table} AS p
+        JOIN book AS b ON p.id_book = b.id
+        WHERE b.md5 IS NOT NULL AND b.md5 <> ''
+          AND p.page BETWEEN 0 AND {PAGE_MAX}
+          AND typeof(p.start_time) IN ('integer', 'real')
+          AND p.start_time > ? AND p.start_time < {START_TIME_MAX}
+    """
+    return sql, (since or 0,)
+
+
+PageStatRow = Tuple[int, int, int, int, int]
+
+
+class PageStatColumns:
+    """
+    按列存储的page_stat记录
+    
+    book_ids: KOReader中的书籍ID (int32)
+    pages: 页码 (int32)
+    start_times: Unix时间戳 (int64)
+    durations: 阅读时长秒数 (int32，已截断到DURATION_MAX)
+    total_pages: 当时的总页数 (int32，未知时为0)
+    """
+    
+    __slots__ = ("book_ids", "pages", "start_times", "durations", "total_pages")
+    
+    def __init__(self):
+        self.book_ids = array("i")
+        self.pages = array("i")
+        self.start_times = array("q")
+        self.durations = array("i")
+        self.total_pages = array("i")
+    
+    def _columns(self) -> Tuple[array, ...]:
+        return self.book_ids, self.pages, self.start_times, self.durations, self.total_pages
+    
+    def __len__(self) -> int:
+        return len(self.start_times)
+    
+    @classmethod
+    def from_cursor(cls, cursor) -> "PageStatColumns":
+        """
+        从已执行查询的SQLite游标分块读取
+        
+        查询需返回 (id_book, page, start_time, duration, total_pages) 且不含NULL。
+        """
+        columns = cls()
+        while True:
+            rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+            if not rows:
+                return columns
+            columns.extend(rows)
+    
+    def extend(self, rows: Sequence[PageStatRow]) -> None:
+        """追加一批行数据（按列写入）"""
+        for index, column in enumerate(self._columns()):
+            column.extend(map(itemgetter(index), rows))
+    
+    def valid_indices(self, book_id_map: Mapping[int, int]) -> Sequence[int]:
+        """
+        返回需要写入的行下标
+        
+        无效记录和没有md5的书籍已在SQLite查询中排除，这里只过滤书籍未能同步的行；
+        全部可以映射时直接返回range，不逐行构造列表。
+        """
+        mapped = book_id_map.keys()
+        if all(book_id in mapped for book_id in set(self.book_ids)):
+            return range(len(self))
+        return [i for i, book_id in enumerate(self.book_ids) if book_id in mapped]
+    
+    def iter_session_rows(
+        self,
+        indices: Sequence[int],
+        book_id_map: Mapping[int, int],
+        user_id: int,
+        zone: tzinfo,
+        batch_size: int
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        按批生成reading_sessions的插入参数
+        
+        Args:
+            indices: valid_indices() 返回的行下标
+            book_id_map: KOReader书籍ID到数据库书籍ID的映射
+            user_id: 用户ID（冗余写入reading_sessions）
+            zone: 用户时区，用于计算 local_date / local_hour
+            batch_size: 每批行数
+        """
+        for offset in range(0, len(indices), batch_size):
+            chunk = indices[offset:offset + batch_size]
+            # start_time统一存UTC，本地日期和小时按用户时区换算
+            start_times = [datetime.fromtimestamp(self.start_times[i], timezone.utc) for i in chunk]
+            local_times = [start_time.astimezone(zone) for start_time in start_times]
+            yield [
+                {
+                    "book_id": book_id_map[self.book_ids[i]],
+                    "user_id": user_id,
+                    "page": self.pages[i],
+                    "start_time": start_time,
+                    "duration": self.durations[i],
+                    "total_pages_at_time": self.total_pages[i] or None,
+                    "local_date": local_time.date(),
+                    "local_hour": local_time.hour,
+                }
+                for i, start_time, local_time in zip(chunk, start_times, local_times)
+            ]
@@ -0,0 +1,111 @@
+"""
+reading_sessions 按 start_time 的范围分区
+
+分区按月或按年划分，可选再按 book_id 做哈希子分区；落在已有分区范围外的记录进入默认分区，
+由调度任务定期把它们迁移到新建的分区中。这里只生成DDL，Alembic迁移（同步连接）和
+分区维护服务（异步会话）共用。
+"""
+from datetime import datetime, timezone
+from typing import Iterator, List, Tuple
+
+PARENT_TABLE = "reading_sessions"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_INTERVALS = ("month", "year")
+
+
+def partition_floor(moment: datetime, interval: str) -> datetime:
+    """取moment所在分区的起始时间（UTC）"""
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f"不支持的分区间隔: {interval}")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    month = moment.month if interval == "month" else 1
+    return datetime(moment.year, month, 1, tzinfo=timezone.utc)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    """月初时间加减若干个月"""
+    year, month = divmod(start.year * 12 + start.month - 1 + months, 12)
+    return start.replace(year=year, month=month + 1)
+
+
+def next_partition_start(start: datetime, interval: str) -> datetime:
+    """下一个分区的起始时间"""
+    return add_months(start, 12 if interval == "year" else 1)
+
+
+def partition_name(start: datetime, interval: str) -> str:
+    """分区表名，例如 reading_sessions_p202401 / reading_sessions_p2024"""
+    suffix = f"{start:%Y%m}" if interval == "month" else f"{start:%Y}"
+    return f"{PARENT_TABLE}_p{suffix}"
+
+
+def iter_partition_ranges(first: datetime, last: datetime, interval: str) -> Iterator[Tuple[str, datetime, datetime]]:
+    """依次生成覆盖 [first, last] 的分区 (名称, 起始, 结束)"""
+    start = partition_floor(first, interval)
+    while start <= last:
+        end = next_partition_start(start, interval)
+        yield partition_name(start, interval), start, end
+        start = end
+
+
+def _bound(moment: datetime) -> str:
+    return f"'{moment.isoformat()}'"
+
+
+def _hash_subpartition_ddl(name: str, hash_partitions: int) -> List[str]:
+    return [
+        f"CREATE TABLE IF NOT EXISTS {name}_h{remainder} PARTITION OF {name} "
+        f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {remainder})"
+        for remainder in range(hash_partitions)
+    ]
+
+
+def create_partition_ddl(name: str, start: datetime, end: datetime, hash_partitions: int = 0) -> List[str]:
+    """
+    直接创建一个范围分区（默认分区中没有落在该范围内的记录时使用）
+    
+    hash_partitions > 1 时该分区再按 book_id 哈希拆成若干子分区。
+    """
+    partition_by = " PARTITION BY HASH (book_id)" if hash_partitions > 1 else ""
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ({_bound(start)}) TO ({_bound(end)}){partition_by}"
+    ]
+    if hash_partitions > 1:
+        statements += _hash_subpartition_ddl(name, hash_partitions)
+    return statements
+
+
+def split_default_partition_ddl(name: str, start: datetime, end: datetime, hash_partitions: int = 0) -> List[str]:
+    """
+    把默认分区中落在 [start, end) 的记录迁出到新分区
+    
+    默认分区里已有该范围的记录时不能直接 CREATE ... PARTITION OF，
+    需要先建独立表、搬运记录，再 ATTACH。应在同一事务中执行。
+    """
+    partition_by = " PARTITION BY HASH (book_id)" if hash_partitions > 1 else ""
+    condition = f"start_time >= {_bound(start)} AND start_time < {_bound(end)}"
+    statements = [f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS){partition_by}"]
+    if hash_partitions > 1:
+        statements += _hash_subpartition_ddl(name, hash_partitions)
+    statements += [
+        f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {condition}",
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE {condition}",
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ({_bound(start)}) TO ({_bound(end)})",
+    ]
+    return statements
+
+
+def create_default_partition_ddl() -> str:
+    return f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+
+
+def drop_partition_ddl(name: str) -> List[str]:
+    """先DETACH再DROP整个分区，删除整段历史数据不产生死元组"""
+    return [
+        f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}",
+        f"DROP TABLE {name}",
+    ]
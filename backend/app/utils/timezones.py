@@ -0,0 +1,54 @@
+"""
+用户时区
+
+KOReader记录的start_time是Unix时间戳（UTC），按用户所在时区换算出本地日期和小时，
+写入reading_sessions的 local_date / local_hour，统计时直接按这两列分组。
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from backend.app.config import settings
+
+
+@lru_cache(maxsize=256)
+def _load_zone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+def is_valid_timezone(name: str) -> bool:
+    """是否为可识别的IANA时区名称"""
+    try:
+        _load_zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """获取时区，未设置或无效时使用 DEFAULT_TIMEZONE"""
+    if name and is_valid_timezone(name):
+        return _load_zone(name)
+    return _load_zone(settings.DEFAULT_TIMEZONE)
+
+
+def local_date_hour(moment: datetime, zone: ZoneInfo) -> Tuple[date, int]:
+    """把时间换算为用户本地的 (日期, 小时)，不带时区的时间视为UTC"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    local = moment.astimezone(zone)
+    return local.date(), local.hour
+
+
+def start_time_bounds(start_day: date, end_day: date) -> Tuple[datetime, datetime]:
+    """
+    本地日期范围 [start_day, end_day] 对应的 start_time 范围 [start, end)
+    
+    时区偏移不超过±14小时，local_date 与 start_time 的UTC日期最多相差一天，
+    按本地日期过滤时附加放宽一天的 start_time 条件，查询仍能按 start_time 裁剪分区。
+    """
+    return (
+        datetime.combine(start_day - timedelta(days=1), time.min, tzinfo=timezone.utc),
+        datetime.combine(end_day + timedelta(days=2), time.min, tzinfo=timezone.utc),
+    )
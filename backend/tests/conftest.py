@@ -1,4 +1,6 @@
 import asyncio
+import itertools
+import sqlite3
 from typing import AsyncGenerator
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -6,6 +8,7 @@ from sqlalchemy.pool import StaticPool
 
 from backend.app.database import Base, get_db
 from backend.app.main import app
+from backend.app.models.user import User
 
 # 测试数据库URL（使用SQLite内存数据库）
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -55,13 +58,58 @@ async def test_db(test_engine) -> AsyncGenerator[AsyncSession, None]:
 @pytest.fixture
 async def client(test_db):
     """创建测试客户端"""
-    from httpx import AsyncClient
+    from httpx import ASGITransport, AsyncClient
     
     # 重写依赖
     app.dependency_overrides[get_db] = lambda: test_db
     
-    async with AsyncClient(app=app, base_url="http://test") as ac:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
     
     # 清理依赖重写
-    app.dependency_overrides.clear() 
\ No newline at end of file
+    app.dependency_overrides.clear() 
+
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture
+def make_user(test_db):
+    """创建测试用户（测试之间共用数据库，用户名自动编号避免冲突）"""
+    async def make() -> User:
+        user = User(username=f"test-user-{next(_user_numbers)}", password_hash="x")
+        test_db.add(user)
+        await test_db.commit()
+        return user
+    
+    return make
+
+
+@pytest.fixture
+def make_statistics_file(tmp_path):
+    """
+    生成KOReader格式的statistics.sqlite3
+    
+    books: [(id, title, md5)]
+    page_stats: [(id_book, page, start_time, duration, total_pages)]
+    """
+    def make(books, page_stats, name: str = "statistics.sqlite3") -> str:
+        path = str(tmp_path / name)
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE book (id integer PRIMARY KEY autoincrement, title text, authors text, notes integer,
+                               last_open integer, highlights integer, pages integer, series text,
+                               language text, md5 text, total_read_time integer, total_read_pages integer);
+            CREATE TABLE page_stat_data (id_book integer, page integer NOT NULL DEFAULT 0,
+                                         start_time integer NOT NULL DEFAULT 0, duration integer NOT NULL DEFAULT 0,
+                                         total_pages integer NOT NULL DEFAULT 0, UNIQUE (id_book, page, start_time));
+        """)
+        conn.executemany(
+            "INSERT INTO book (id, title, authors, pages, md5) VALUES (?, ?, '作者', 300, ?)", books
+        )
+        conn.executemany("INSERT INTO page_stat_data VALUES (?, ?, ?, ?, ?)", page_stats)
+        conn.commit()
+        conn.close()
+        return path
+    
+    return make
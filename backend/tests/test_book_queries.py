@@ -0,0 +1,100 @@
+"""
+书籍列表和详情的查询次数测试
+
+每页书籍、统计和总数由同一条语句取得，详情也只有一次数据库往返，
+与返回的书籍数量无关；逐本查询统计（N+1）的写法回归时测试失败。
+"""
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, select
+
+from backend.app.config import settings
+from backend.app.models.book import Book
+from backend.app.services.book_service import BookService
+from backend.app.services.data_sync_service import DataSyncService
+
+BOOK_COUNT = 12
+
+
+@contextmanager
+def count_statements(engine):
+    """统计代码块内实际发出的SQL语句"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+async def user_with_books(test_db, make_user, make_statistics_file, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+    user = await make_user()
+    now = int(time.time())
+    books = [(i, f"书名{i}", f"{i:032x}") for i in range(1, BOOK_COUNT + 1)]
+    page_stats = [
+        (book_id, page, now - book_id * 86400 - page * 60, 30, 300)
+        for book_id in range(1, BOOK_COUNT + 1)
+        for page in range(1, book_id * 5)
+    ]
+    path = make_statistics_file(books, page_stats)
+    await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    return user
+
+
+@pytest.mark.parametrize("sort", ["id", "title", "last_read", "total_time", "progress"])
+async def test_book_list_single_statement(test_engine, test_db, user_with_books, sort):
+    service = BookService(test_db)
+    
+    with count_statements(test_engine) as statements:
+        books = await service.get_user_books(user_with_books.id, limit=5, sort=sort)
+    
+    assert len(books.books) == 5
+    assert books.total == BOOK_COUNT
+    assert len(statements) == 1
+
+
+async def test_book_list_search_and_status_single_statement(test_engine, test_db, user_with_books):
+    service = BookService(test_db)
+    
+    with count_statements(test_engine) as statements:
+        books = await service.get_user_books(user_with_books.id, search="书名1", sort="relevance", status="reading")
+    
+    assert books.books
+    assert len(statements) == 1
+
+
+async def test_book_list_cursor_page_single_statement(test_engine, test_db, user_with_books):
+    service = BookService(test_db)
+    first_page = await service.get_user_books(user_with_books.id, limit=5, sort="last_read", include_total=False)
+    assert first_page.next_cursor
+    
+    with count_statements(test_engine) as statements:
+        second_page = await service.get_user_books(
+            user_with_books.id, limit=5, sort="last_read", cursor=first_page.next_cursor, include_total=False
+        )
+    
+    assert len(second_page.books) == 5
+    assert not {book.id for book in first_page.books} & {book.id for book in second_page.books}
+    assert len(statements) == 1
+
+
+async def test_book_detail_single_statement(test_engine, test_db, user_with_books):
+    service = BookService(test_db)
+    book_id = (await test_db.execute(
+        select(Book.id).where(Book.user_id == user_with_books.id, Book.md5 == f"{BOOK_COUNT:032x}")
+    )).scalar_one()
+    
+    with count_statements(test_engine) as statements:
+        detail = await service.get_book_detail(book_id, user_with_books.id)
+    
+    assert detail.id == book_id
+    assert detail.reading_sessions_count == BOOK_COUNT * 5 - 1
+    assert len(statements) == 1
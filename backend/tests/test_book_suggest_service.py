@@ -0,0 +1,82 @@
+"""
+搜索建议索引缓存测试
+
+按估算内存占用的LRU淘汰、TTL过期，以及失效后丢弃失效前开始建立的索引。
+"""
+from backend.app.services import book_suggest_service
+from backend.app.services.book_suggest_service import SuggestIndexCache
+from backend.app.utils.ngram_index import IndexedBook, NgramIndex
+
+
+def make_index(title: str) -> NgramIndex:
+    return NgramIndex([IndexedBook(1, title, None, None)])
+
+
+def test_lru_eviction_by_size_bytes():
+    indexes = [make_index(f"书名{i}") for i in range(3)]
+    size = max(index.size_bytes for index in indexes)
+    cache = SuggestIndexCache(max_bytes=size * 2 + size // 2, ttl_seconds=60)
+    
+    cache.set(1, indexes[0], cache.generation(1))
+    cache.set(2, indexes[1], cache.generation(2))
+    assert cache.get(1) is indexes[0]
+    # 放入第三个超过上限，淘汰最久未使用的用户2
+    cache.set(3, indexes[2], cache.generation(3))
+    assert len(cache) == 2
+    assert cache.get(2) is None
+    assert cache.get(1) is indexes[0]
+    assert cache.get(3) is indexes[2]
+    assert cache.total_bytes == indexes[0].size_bytes + indexes[2].size_bytes
+
+
+def test_index_larger_than_limit_not_cached():
+    index = make_index("很长的书名" * 100)
+    cache = SuggestIndexCache(max_bytes=index.size_bytes - 1, ttl_seconds=60)
+    cache.set(1, index, cache.generation(1))
+    assert cache.get(1) is None
+    assert cache.total_bytes == 0
+
+
+def test_replacing_index_keeps_total_bytes():
+    cache = SuggestIndexCache(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+    first, second = make_index("一"), make_index("二二二二")
+    cache.set(1, first, cache.generation(1))
+    cache.set(1, second, cache.generation(1))
+    assert cache.get(1) is second
+    assert cache.total_bytes == second.size_bytes
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(book_suggest_service.time, "monotonic", lambda: now[0])
+    cache = SuggestIndexCache(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+    index = make_index("三体")
+    cache.set(1, index, cache.generation(1))
+    
+    now[0] += 59
+    assert cache.get(1) is index
+    now[0] += 2
+    assert cache.get(1) is None
+    assert cache.total_bytes == 0
+
+
+def test_invalidate_drops_index_built_before_invalidation():
+    cache = SuggestIndexCache(max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+    cache.set(1, make_index("旧书"), cache.generation(1))
+    
+    # 开始建索引时记下代数，建好之前用户同步了书籍
+    generation = cache.generation(1)
+    stale = make_index("旧书")
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    cache.set(1, stale, generation)
+    assert cache.get(1) is None
+    assert cache.total_bytes == 0
+    
+    # 失效之后重新建立的索引正常缓存，其他用户不受影响
+    fresh = make_index("新书")
+    cache.set(1, fresh, cache.generation(1))
+    assert cache.get(1) is fresh
+    other = make_index("别人的书")
+    cache.set(2, other, generation)
+    assert cache.get(2) is other
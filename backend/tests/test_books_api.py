@@ -0,0 +1,66 @@
+"""
+书籍列表接口测试
+
+参数错误（无效游标、relevance排序缺少搜索词）返回400，阅读状态通过 status 查询参数筛选。
+"""
+import time
+
+import pytest
+
+from backend.app.config import settings
+from backend.app.main import app
+from backend.app.services.auth_service import AuthService
+from backend.app.services.data_sync_service import DataSyncService
+
+BOOKS_URL = "/api/v1/books/"
+
+
+@pytest.fixture
+async def user_client(client, test_db, make_user, make_statistics_file, monkeypatch):
+    """以新用户身份登录的客户端，用户有一本读过的书和一本没读过的书"""
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+    user = await make_user()
+    now = int(time.time())
+    path = make_statistics_file(
+        [(1, "读过的书", "a" * 32), (2, "没读的书", "b" * 32)],
+        [(1, page, now - page * 60, 30, 300) for page in range(1, 20)],
+    )
+    await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    
+    app.dependency_overrides[AuthService.get_current_user] = lambda: {
+        "user_id": user.id, "username": user.username
+    }
+    yield client
+    app.dependency_overrides.pop(AuthService.get_current_user, None)
+
+
+async def test_invalid_cursor_returns_400(user_client):
+    response = await user_client.get(BOOKS_URL, params={"cursor": "not-a-cursor"})
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "无效的分页游标"
+
+
+async def test_cursor_from_other_sort_returns_400(user_client):
+    first_page = (await user_client.get(BOOKS_URL, params={"limit": 1, "sort": "title"})).json()
+    
+    response = await user_client.get(
+        BOOKS_URL, params={"limit": 1, "sort": "last_read", "cursor": first_page["next_cursor"]}
+    )
+    
+    assert response.status_code == 400
+
+
+async def test_relevance_without_search_returns_400(user_client):
+    response = await user_client.get(BOOKS_URL, params={"sort": "relevance"})
+    
+    assert response.status_code == 400
+
+
+async def test_status_filter(user_client):
+    unread = (await user_client.get(BOOKS_URL, params={"status": "unread"})).json()
+    reading = (await user_client.get(BOOKS_URL, params={"status": "reading"})).json()
+    
+    assert [book["title"] for book in unread["books"]] == ["没读的书"]
+    assert [book["title"] for book in reading["books"]] == ["读过的书"]
+    assert (await user_client.get(BOOKS_URL, params={"status": "lost"})).status_code == 422
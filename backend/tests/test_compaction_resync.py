@@ -0,0 +1,141 @@
+"""
+压缩后全量重新同步测试
+
+全量同步会清理用户数据再重新导入，已压缩书籍的按天汇总、页码位图和压缩截止日期必须保留，
+重新同步后统计结果与压缩前一致。
+"""
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.app.config import settings
+from backend.app.models.book import Book
+from backend.app.models.book_stats import BookStats
+from backend.app.models.daily_stats import BookDailyStats, UserDailyStats
+from backend.app.models.reading_aggregate import BookPageBitmap, ReadingDayAggregate
+from backend.app.models.reading_session import ReadingSession
+from backend.app.services.compaction_service import CompactionService
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.services.statistics_service import StatisticsService
+
+DAY = 86400
+BOOKS = [
+    (1, "第一本书", "11111111111111111111111111111111"),
+    (2, "第二本书", "22222222222222222222222222222222"),
+    (3, "第三本书", "33333333333333333333333333333333"),
+]
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+
+
+def make_page_stats(seed: int = 0):
+    """三本书近120天内的随机翻页记录"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    rows = {}
+    while len(rows) < 600:
+        book_id = rng.randint(1, 3)
+        page = rng.randint(1, 300)
+        start_time = now - rng.randint(DAY, 120 * DAY)
+        rows[(book_id, page, start_time)] = (book_id, page, start_time, rng.randint(5, 120), 300)
+    return sorted(rows.values())
+
+
+async def snapshot(db, user_id):
+    """用户的全部统计结果（按书的md5对齐，书籍ID可能变化）"""
+    md5_by_id = dict((await db.execute(select(Book.id, Book.md5).where(Book.user_id == user_id))).all())
+    
+    user_days = sorted(
+        tuple(row) for row in await db.execute(
+            select(UserDailyStats.local_date, UserDailyStats.duration, UserDailyStats.session_count,
+                   UserDailyStats.pages_count, UserDailyStats.books_count)
+            .where(UserDailyStats.user_id == user_id)
+        )
+    )
+    book_days = sorted(
+        (md5_by_id[day.book_id], day.local_date, day.duration, day.session_count, day.pages_count)
+        for day in (await db.execute(select(BookDailyStats).where(BookDailyStats.user_id == user_id))).scalars()
+    )
+    book_stats = sorted(
+        (md5_by_id[stats.book_id], stats.total_reading_time, stats.read_pages_count, stats.sessions_count)
+        for stats in (await db.execute(select(BookStats).where(BookStats.user_id == user_id))).scalars()
+    )
+    
+    service = StatisticsService(db)
+    summary = await service.get_dashboard_summary(user_id)
+    book_maps = {
+        md5: (await service.get_book_map_data(user_id, book_id))["read_pages"]
+        for book_id, md5 in md5_by_id.items()
+    }
+    return {
+        "user_days": user_days,
+        "book_days": book_days,
+        "book_stats": book_stats,
+        "summary": summary,
+        "book_maps": book_maps,
+    }
+
+
+async def count_rows(db, model, user_id):
+    return (await db.execute(select(func.count()).select_from(model).where(model.user_id == user_id))).scalar()
+
+
+async def test_stats_unchanged_after_compaction_and_full_resync(test_db, make_user, make_statistics_file):
+    user = await make_user()
+    path = make_statistics_file(BOOKS, make_page_stats())
+    sync_service = DataSyncService(test_db)
+    await sync_service.ingest_statistics_file(user.id, path, incremental=False)
+    before = await snapshot(test_db, user.id)
+    
+    cutoff = date.today() - timedelta(days=60)
+    compacted = await CompactionService(test_db).compact_user(user.id, cutoff)
+    assert compacted["rows_compacted"] > 0
+    assert await snapshot(test_db, user.id) == before
+    
+    # 同一文件全量重新同步：已压缩日期的原始记录被丢弃，汇总保留
+    result = await sync_service.ingest_statistics_file(user.id, path, incremental=False)
+    assert result["success"]
+    assert await snapshot(test_db, user.id) == before
+    assert await count_rows(test_db, ReadingDayAggregate, user.id) > 0
+    assert await count_rows(test_db, ReadingSession, user.id) + compacted["rows_compacted"] == 600
+    
+    # 再同步一次结果不变
+    await sync_service.ingest_statistics_file(user.id, path, incremental=False)
+    assert await snapshot(test_db, user.id) == before
+
+
+async def test_full_resync_removes_compacted_book_missing_from_file(test_db, make_user, make_statistics_file):
+    user = await make_user()
+    page_stats = make_page_stats()
+    sync_service = DataSyncService(test_db)
+    await sync_service.ingest_statistics_file(
+        user.id, make_statistics_file(BOOKS, page_stats, "full.sqlite3"), incremental=False
+    )
+    await CompactionService(test_db).compact_user(user.id, date.today() - timedelta(days=60))
+    
+    # 新文件中没有第三本书：按全量替换删除它，连同压缩数据
+    path = make_statistics_file(
+        BOOKS[:2], [row for row in page_stats if row[0] != 3], "two_books.sqlite3"
+    )
+    await sync_service.ingest_statistics_file(user.id, path, incremental=False)
+    
+    md5s = set((await test_db.execute(select(Book.md5).where(Book.user_id == user.id))).scalars())
+    assert md5s == {BOOKS[0][2], BOOKS[1][2]}
+    book_ids = set((await test_db.execute(select(Book.id).where(Book.user_id == user.id))).scalars())
+    for model in (ReadingDayAggregate, BookPageBitmap):
+        orphaned = await test_db.execute(
+            select(model.book_id).where(model.user_id == user.id, model.book_id.not_in(book_ids))
+        )
+        assert orphaned.first() is None
+    
+    # 与从未压缩过、直接同步这个文件的用户结果一致
+    fresh_user = await make_user()
+    await sync_service.ingest_statistics_file(fresh_user.id, path, incremental=False)
+    await CompactionService(test_db).compact_user(fresh_user.id, date.today() - timedelta(days=60))
+    assert await snapshot(test_db, user.id) == await snapshot(test_db, fresh_user.id)
@@ -0,0 +1,139 @@
+"""
+书籍列表游标分页测试
+
+游标编码解码往返、跨排序方式的游标被拒绝，以及按游标翻到最后一页的结果
+与skip分页完全一致（包括排序键相同和last_read从有值过渡到NULL的情况）。
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.app.config import settings
+from backend.app.services.book_service import BOOK_SORT_COLUMNS, BookService
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.utils.cursor import decode_cursor, encode_cursor
+
+PAGE_SIZE = 3
+
+
+@pytest.fixture
+async def user_with_books(test_db, make_user, make_statistics_file, monkeypatch):
+    """13本书：9本读过（书名、时长、进度两两重复），4本从未读过（last_read为NULL）"""
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+    user = await make_user()
+    now = int(time.time())
+    books = [(i, f"书名{i % 4}", f"{i:032x}") for i in range(1, 14)]
+    page_stats = [
+        (book_id, page, now - book_id * 3600 - page * 60, 30, 20)
+        for book_id in range(1, 10)
+        for page in range(1, book_id % 3 + 3)
+    ]
+    path = make_statistics_file(books, page_stats)
+    await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    return user
+
+
+async def walk_cursor(service, user_id, sort, search=None):
+    """按next_cursor翻到最后一页，返回依次得到的书籍ID"""
+    ids = []
+    cursor = None
+    while True:
+        page = await service.get_user_books(
+            user_id, limit=PAGE_SIZE, sort=sort, search=search, cursor=cursor, include_total=False
+        )
+        ids.extend(book.id for book in page.books)
+        if page.next_cursor is None:
+            return ids
+        assert len(page.books) == PAGE_SIZE
+        cursor = page.next_cursor
+
+
+async def walk_offset(service, user_id, sort, search=None):
+    """按skip逐页取完，返回依次得到的书籍ID"""
+    ids = []
+    skip = 0
+    while True:
+        page = await service.get_user_books(user_id, skip=skip, limit=PAGE_SIZE, sort=sort, search=search)
+        ids.extend(book.id for book in page.books)
+        skip += PAGE_SIZE
+        if skip >= page.total:
+            return ids
+
+
+@pytest.mark.parametrize("key", [
+    datetime(2026, 10, 19, 8, 30, 15, 123456, tzinfo=timezone.utc),
+    datetime(2026, 10, 19, 16, 30, tzinfo=timezone(timedelta(hours=8))),
+    42.5,
+    0.1 + 0.2,
+    "书名",
+    None,
+])
+def test_cursor_round_trip(key):
+    cursor = encode_cursor("last_read", key, 7)
+    assert "=" not in cursor
+    decoded_key, row_id = decode_cursor(cursor, "last_read")
+    assert decoded_key == key
+    assert type(decoded_key) is type(key)
+    assert row_id == 7
+
+
+def test_cursor_from_other_sort_rejected():
+    cursor = encode_cursor("total_time", 120, 7)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "progress")
+
+
+@pytest.mark.parametrize("cursor", ["", "不是游标", "e30", encode_cursor("id", None, 7)[:-2]])
+def test_malformed_cursor_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "id")
+
+
+async def test_other_sort_cursor_rejected_by_service(test_db, user_with_books):
+    service = BookService(test_db)
+    page = await service.get_user_books(user_with_books.id, limit=PAGE_SIZE, sort="title")
+    with pytest.raises(ValueError):
+        await service.get_user_books(user_with_books.id, limit=PAGE_SIZE, sort="id", cursor=page.next_cursor)
+
+
+@pytest.mark.parametrize("sort", list(BOOK_SORT_COLUMNS))
+async def test_cursor_walk_matches_offset(test_db, user_with_books, sort):
+    service = BookService(test_db)
+    by_cursor = await walk_cursor(service, user_with_books.id, sort)
+    assert len(by_cursor) == 13
+    assert by_cursor == await walk_offset(service, user_with_books.id, sort)
+
+
+async def test_relevance_cursor_walk_matches_offset(test_db, user_with_books):
+    service = BookService(test_db)
+    by_cursor = await walk_cursor(service, user_with_books.id, "relevance", search="书名")
+    assert len(by_cursor) == 13
+    assert by_cursor == await walk_offset(service, user_with_books.id, "relevance", search="书名")
+
+
+async def test_last_read_cursor_crosses_into_null(test_db, user_with_books):
+    service = BookService(test_db)
+    seen = []
+    cursor = None
+    while True:
+        page = await service.get_user_books(
+            user_with_books.id, limit=PAGE_SIZE, sort="last_read", cursor=cursor, include_total=False
+        )
+        seen.extend(book.last_read_time for book in page.books)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    
+    # 读过的9本按时间倒序在前，未读过的4本在后
+    assert [value is None for value in seen] == [False] * 9 + [True] * 4
+    assert seen[:9] == sorted(seen[:9], reverse=True)
+    
+    # 游标停在NULL键上时，下一页从剩余的未读书籍继续
+    page = await service.get_user_books(user_with_books.id, limit=10, sort="last_read", include_total=False)
+    assert decode_cursor(page.next_cursor, "last_read")[0] is None
+    rest = await service.get_user_books(
+        user_with_books.id, limit=10, sort="last_read", cursor=page.next_cursor, include_total=False
+    )
+    assert [book.last_read_time for book in rest.books] == [None] * 3
+    assert rest.next_cursor is None
@@ -0,0 +1,83 @@
+"""
+设备API密钥认证缓存测试
+
+模拟多进程部署：密钥在“其他进程”中被删除（直接删数据库记录，不经过本进程的缓存），
+本进程缓存的条目超过 DEVICE_KEY_REVALIDATE_SECONDS 后应拒绝该密钥。
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.app import database
+from backend.app.config import settings
+from backend.app.models.device_api_key import DeviceApiKey
+from backend.app.models.user import User
+from backend.app.services import device_key_service
+from backend.app.services.device_key_service import DeviceKeyService
+
+
+@pytest.fixture
+async def device_key(test_engine, test_db, monkeypatch):
+    """创建用户和设备密钥，认证时使用测试数据库"""
+    monkeypatch.setattr(
+        database,
+        "AsyncSessionLocal",
+        async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    )
+    device_key_service._device_key_cache.clear()
+    
+    user = User(username="device-key-user", password_hash="x")
+    test_db.add(user)
+    await test_db.commit()
+    key, api_key = await DeviceKeyService(test_db).create_key(user.id, "Kindle")
+    yield key, api_key
+    
+    device_key_service._device_key_cache.clear()
+    await test_db.execute(delete(DeviceApiKey).where(DeviceApiKey.user_id == user.id))
+    await test_db.execute(delete(User).where(User.id == user.id))
+    await test_db.commit()
+
+
+async def delete_in_other_worker(test_db, key_id: int) -> None:
+    await test_db.execute(delete(DeviceApiKey).where(DeviceApiKey.id == key_id))
+    await test_db.commit()
+
+
+async def test_revoked_key_rejected_after_revalidate_interval(device_key, test_db, monkeypatch):
+    key, api_key = device_key
+    device = await DeviceKeyService.get_device_user(api_key)
+    assert device["device_key_id"] == key.id
+    
+    await delete_in_other_worker(test_db, key.id)
+    
+    # 缓存仍在确认间隔内：不访问数据库
+    monkeypatch.setattr(settings, "DEVICE_KEY_REVALIDATE_SECONDS", 3600)
+    assert await DeviceKeyService.get_device_user(api_key) == device
+    
+    # 超过确认间隔：重新查询后拒绝
+    monkeypatch.setattr(settings, "DEVICE_KEY_REVALIDATE_SECONDS", 0)
+    with pytest.raises(HTTPException) as exc_info:
+        await DeviceKeyService.get_device_user(api_key)
+    assert exc_info.value.status_code == 401
+
+
+async def test_cached_key_still_valid_after_revalidate(device_key, monkeypatch):
+    key, api_key = device_key
+    monkeypatch.setattr(settings, "DEVICE_KEY_REVALIDATE_SECONDS", 0)
+    
+    first = await DeviceKeyService.get_device_user(api_key)
+    second = await DeviceKeyService.get_device_user(api_key)
+    
+    assert first == second
+    assert second["device_key_id"] == key.id
+
+
+async def test_revoke_key_removes_local_cache(device_key, test_db, monkeypatch):
+    key, api_key = device_key
+    monkeypatch.setattr(settings, "DEVICE_KEY_REVALIDATE_SECONDS", 3600)
+    await DeviceKeyService.get_device_user(api_key)
+    
+    assert await DeviceKeyService(test_db).revoke_key(key.user_id, key.id)
+    with pytest.raises(HTTPException):
+        await DeviceKeyService.get_device_user(api_key)
@@ -0,0 +1,55 @@
+"""
+增量推送（services/ingest_service.py）测试
+"""
+import json
+import time
+
+import pytest
+
+from backend.app.config import settings
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.services.ingest_service import IngestLineError, IngestService, parse_page_stat_line
+from backend.app.utils.page_bitmap import PAGE_MAX
+
+MD5 = "c" * 32
+
+
+def line(**fields) -> bytes:
+    data = {"md5": MD5, "page": 1, "start_time": 1700000000, "duration": 30}
+    data.update(fields)
+    return json.dumps(data).encode()
+
+
+def test_parse_valid_line():
+    row = parse_page_stat_line(line(page=PAGE_MAX, total_pages=500))
+    
+    assert row["page"] == PAGE_MAX
+    assert row["total_pages_at_time"] == 500
+    assert int(row["start_time"].timestamp()) == 1700000000
+
+
+@pytest.mark.parametrize("page", [-1, PAGE_MAX + 1, 2 ** 31 - 1])
+def test_parse_rejects_out_of_range_page(page):
+    with pytest.raises(IngestLineError):
+        parse_page_stat_line(line(page=page))
+
+
+async def test_out_of_range_pages_counted_as_invalid(test_db, make_user, make_statistics_file, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+    user = await make_user()
+    now = int(time.time())
+    path = make_statistics_file([(1, "书名", MD5)], [(1, 1, now - 3600, 60, 300)])
+    await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    
+    async def chunks():
+        yield b"\n".join([
+            line(page=2, start_time=now - 60),
+            line(page=2 ** 31 - 1, start_time=now - 30),
+        ])
+    
+    stats = await IngestService(test_db).ingest_page_stats(user.id, chunks())
+    
+    assert stats["received"] == 2
+    assert stats["inserted"] == 1
+    assert stats["invalid"] == 1
+    assert "page不能超过" in stats["errors"][0]
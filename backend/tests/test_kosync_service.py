@@ -0,0 +1,71 @@
+"""
+kosync认证缓存测试
+
+模拟多进程部署：同步密码在“其他进程”中修改（直接更新数据库，不清空本进程的缓存），
+本进程缓存的条目超过 KOSYNC_AUTH_REVALIDATE_SECONDS 后旧密码应失效。
+"""
+import hashlib
+
+import pytest
+from sqlalchemy import update
+
+from backend.app.config import settings
+from backend.app.models.user import User
+from backend.app.services import kosync_service
+from backend.app.services.kosync_service import KosyncService, hash_kosync_key
+
+
+def auth_key(password: str) -> str:
+    """KOReader发送的x-auth-key"""
+    return hashlib.md5(password.encode()).hexdigest()
+
+
+@pytest.fixture
+async def kosync_user(test_db, make_user):
+    kosync_service._kosync_auth_cache.clear()
+    user = await make_user()
+    await KosyncService(test_db).set_credentials(user.id, "old-password")
+    yield user
+    kosync_service._kosync_auth_cache.clear()
+
+
+async def change_password_in_other_worker(test_db, user_id: int, password: str) -> None:
+    await test_db.execute(
+        update(User).where(User.id == user_id).values(kosync_key_hash=hash_kosync_key(auth_key(password)))
+    )
+    await test_db.commit()
+
+
+async def test_old_password_rejected_after_revalidate_interval(test_db, kosync_user, monkeypatch):
+    service = KosyncService(test_db)
+    old_key = auth_key("old-password")
+    assert await service.authenticate(kosync_user.username, old_key) == kosync_user.id
+    
+    await change_password_in_other_worker(test_db, kosync_user.id, "new-password")
+    
+    # 缓存仍在确认间隔内：不访问数据库
+    monkeypatch.setattr(settings, "KOSYNC_AUTH_REVALIDATE_SECONDS", 3600)
+    assert await service.authenticate(kosync_user.username, old_key) == kosync_user.id
+    
+    # 超过确认间隔：重新查询后拒绝旧密码，新密码可用
+    monkeypatch.setattr(settings, "KOSYNC_AUTH_REVALIDATE_SECONDS", 0)
+    assert await service.authenticate(kosync_user.username, old_key) is None
+    assert await service.authenticate(kosync_user.username, auth_key("new-password")) == kosync_user.id
+
+
+async def test_unchanged_password_still_valid_after_revalidate(test_db, kosync_user, monkeypatch):
+    service = KosyncService(test_db)
+    monkeypatch.setattr(settings, "KOSYNC_AUTH_REVALIDATE_SECONDS", 0)
+    
+    for _ in range(3):
+        assert await service.authenticate(kosync_user.username, auth_key("old-password")) == kosync_user.id
+
+
+async def test_set_credentials_clears_local_cache(test_db, kosync_user, monkeypatch):
+    service = KosyncService(test_db)
+    monkeypatch.setattr(settings, "KOSYNC_AUTH_REVALIDATE_SECONDS", 3600)
+    await service.authenticate(kosync_user.username, auth_key("old-password"))
+    
+    await service.set_credentials(kosync_user.id, "new-password")
+    
+    assert await service.authenticate(kosync_user.username, auth_key("old-password")) is None
@@ -0,0 +1,114 @@
+"""
+本地目录监听（tasks/local_watcher.py）测试
+
+使用轮询模式监听临时目录，导入过程替换为计数，只验证防抖和触发次数。
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from backend.app.tasks.local_watcher import LocalStatisticsWatcher
+
+DEBOUNCE_SECONDS = 0.3
+POLL_INTERVAL_SECONDS = 0.05
+
+
+class CountingWatcher(LocalStatisticsWatcher):
+    """记录每次导入时文件内容的监听器，不访问数据库"""
+    
+    def __init__(self, directory: str):
+        super().__init__(
+            {"reader": directory},
+            debounce_seconds=DEBOUNCE_SECONDS,
+            poll_interval_seconds=POLL_INTERVAL_SECONDS,
+            force_polling=True,
+        )
+        self.ingested = []
+    
+    async def ingest(self, username: str, path: str) -> dict:
+        with open(path, "rb") as f:
+            self.ingested.append((username, f.read()))
+        return {'success': True, 'books_synced': 0, 'sessions_synced': 0}
+
+
+def write_statistics(directory, content: bytes, mtime: float = None) -> None:
+    path = os.path.join(directory, "statistics.sqlite3")
+    with open(path, "wb") as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+async def wait_for(predicate, timeout: float = 5.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        if loop.time() > deadline:
+            raise AssertionError("等待超时")
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+@pytest.fixture
+async def watcher(tmp_path):
+    watcher = CountingWatcher(str(tmp_path))
+    yield watcher
+    await watcher.stop()
+
+
+async def test_existing_file_ingested_once_on_start(tmp_path, watcher):
+    write_statistics(tmp_path, b"v1")
+    
+    watcher.start()
+    await wait_for(lambda: watcher.ingested)
+    await asyncio.sleep(DEBOUNCE_SECONDS * 3)
+    
+    assert watcher.mode == "polling"
+    assert watcher.ingested == [("reader", b"v1")]
+
+
+async def test_change_triggers_exactly_one_ingest(tmp_path, watcher):
+    write_statistics(tmp_path, b"v1")
+    watcher.start()
+    await wait_for(lambda: watcher.ingested)
+    await asyncio.sleep(POLL_INTERVAL_SECONDS * 4)
+    
+    # watchfiles轮询按秒比较修改时间，模拟稍后一次同步写入
+    write_statistics(tmp_path, b"v2-longer", mtime=time.time() + 2)
+    await wait_for(lambda: len(watcher.ingested) > 1)
+    await asyncio.sleep(DEBOUNCE_SECONDS * 3)
+    
+    assert watcher.ingested == [("reader", b"v1"), ("reader", b"v2-longer")]
+
+
+async def test_debounce_waits_for_writes_to_settle(tmp_path, watcher):
+    watcher.start()
+    await asyncio.sleep(POLL_INTERVAL_SECONDS * 4)
+    
+    # 模拟同步工具分多次写入，每次间隔都小于防抖时间
+    for size in range(1, 6):
+        write_statistics(tmp_path, b"x" * size)
+        await asyncio.sleep(DEBOUNCE_SECONDS / 3)
+    assert watcher.ingested == []
+    
+    await wait_for(lambda: watcher.ingested)
+    await asyncio.sleep(DEBOUNCE_SECONDS * 3)
+    
+    assert watcher.ingested == [("reader", b"x" * 5)]
+
+
+async def test_unchanged_file_not_reingested(tmp_path, watcher):
+    write_statistics(tmp_path, b"v1")
+    watcher.start()
+    await wait_for(lambda: watcher.ingested)
+    await asyncio.sleep(POLL_INTERVAL_SECONDS * 4)
+    
+    # 重写相同内容并恢复修改时间，文件签名不变
+    path = os.path.join(tmp_path, "statistics.sqlite3")
+    stat = os.stat(path)
+    write_statistics(tmp_path, b"v1")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    await asyncio.sleep(DEBOUNCE_SECONDS * 3)
+    
+    assert watcher.ingested == [("reader", b"v1")]
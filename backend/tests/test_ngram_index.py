@@ -0,0 +1,69 @@
+"""
+n-gram索引测试
+
+中文单字、bigram和多段关键词的查找，以及书名开头、书名包含、作者/系列包含三档排序。
+"""
+from backend.app.utils.ngram_index import IndexedBook, NgramIndex
+
+BOOKS = [
+    IndexedBook(1, "三体", "刘慈欣", "地球往事"),
+    IndexedBook(2, "三体II：黑暗森林", "刘慈欣", "地球往事"),
+    IndexedBook(3, "球状闪电", "刘慈欣", None),
+    IndexedBook(4, "流浪地球", "刘慈欣", None),
+    IndexedBook(5, "挪威的森林", "村上春树", None),
+    IndexedBook(6, "The Three-Body Problem", "Cixin Liu", "Remembrance of Earth's Past"),
+    IndexedBook(7, "地球简史", "某作者", None),
+]
+
+
+def ids(books):
+    return [book.id for book in books]
+
+
+def test_single_character_query():
+    index = NgramIndex(BOOKS)
+    assert ids(index.search("森")) == [5, 2]
+    # 同档内书名长度相同时ID大的在前
+    assert ids(index.search("刘")) == [1, 4, 3, 2]
+    assert index.search("龙") == []
+
+
+def test_bigram_query_requires_contiguous_substring():
+    index = NgramIndex(BOOKS)
+    assert ids(index.search("森林")) == [5, 2]
+    assert ids(index.search("三体")) == [1, 2]
+    # “球地”两个单字都在“流浪地球”中，但不是连续子串
+    assert index.search("球地") == []
+
+
+def test_case_and_width_insensitive():
+    index = NgramIndex(BOOKS)
+    assert ids(index.search("three-body")) == [6]
+    assert ids(index.search("ＴＨＥ")) == [6]
+    assert ids(index.search("三体ii")) == [2]
+
+
+def test_multi_token_query_spans_title_and_author():
+    index = NgramIndex(BOOKS)
+    assert ids(index.search("地球 刘慈欣")) == [1, 4, 2]
+    assert ids(index.search("problem liu")) == [6]
+    assert index.search("森林 刘慈欣 村上") == []
+    # 关键词不跨字段匹配
+    assert index.search("欣地") == []
+
+
+def test_ranking_tiers():
+    index = NgramIndex(BOOKS)
+    # 书名以“地球”开头 > 书名包含“地球” > 只有系列包含，同档内书名短的在前
+    assert ids(index.search("地球")) == [7, 4, 1, 2]
+    # 书名以“球”开头 > 书名包含 > 只有系列包含
+    assert ids(index.search("球")) == [3, 7, 4, 1, 2]
+
+
+def test_limit_and_empty_query():
+    index = NgramIndex(BOOKS)
+    assert ids(index.search("刘慈欣", limit=2)) == [1, 4]
+    assert ids(index.search("地球", limit=1)) == [7]
+    assert index.search("   ") == []
+    assert len(index) == len(BOOKS)
+    assert NgramIndex([]).search("三体") == []
@@ -0,0 +1,36 @@
+"""
+页码位图（utils/page_bitmap.py）测试
+"""
+from backend.app.utils.page_bitmap import (
+    PAGE_MAX, bitmap_count, bitmap_or, bitmap_to_pages, pages_to_bitmap,
+)
+
+
+def test_round_trip():
+    pages = [0, 1, 7, 8, 300, 1023]
+    
+    bitmap = pages_to_bitmap(pages)
+    
+    assert bitmap_to_pages(bitmap) == pages
+    assert bitmap_count(bitmap) == len(pages)
+    assert len(bitmap) == 128
+
+
+def test_union_and_empty():
+    assert bitmap_to_pages(bitmap_or(pages_to_bitmap([1, 2]), None, pages_to_bitmap([2, 5]))) == [1, 2, 5]
+    assert pages_to_bitmap([]) == b""
+    assert bitmap_count(None) == 0
+
+
+def test_out_of_range_pages_ignored():
+    bitmap = pages_to_bitmap([3, -1, PAGE_MAX + 1, 2 ** 31 - 1])
+    
+    assert bitmap_to_pages(bitmap) == [3]
+    assert len(bitmap) == 1
+
+
+def test_largest_page_bitmap_size():
+    bitmap = pages_to_bitmap([PAGE_MAX])
+    
+    assert bitmap_to_pages(bitmap) == [PAGE_MAX]
+    assert len(bitmap) == PAGE_MAX // 8 + 1
@@ -0,0 +1,77 @@
+"""
+page_stat读取查询（utils/page_stats.py）测试
+"""
+import sqlite3
+from zoneinfo import ZoneInfo
+
+from backend.app.utils.page_bitmap import PAGE_MAX
+from backend.app.utils.page_stats import START_TIME_MAX, PageStatColumns, page_stat_query
+
+
+def make_statistics_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE book (id integer PRIMARY KEY, md5 text);
+        CREATE TABLE page_stat_data (id_book integer, page integer, start_time integer,
+                                     duration integer, total_pages integer);
+        INSERT INTO book VALUES (1, 'abc'), (2, NULL);
+    """)
+    return conn
+
+
+def read_rows(conn: sqlite3.Connection, since: int = None) -> PageStatColumns:
+    cursor = conn.cursor()
+    cursor.execute(*page_stat_query("page_stat_data", "duration", since))
+    return PageStatColumns.from_cursor(cursor)
+
+
+def test_out_of_range_start_times_excluded():
+    conn = make_statistics_db()
+    conn.executemany("INSERT INTO page_stat_data VALUES (?, ?, ?, ?, ?)", [
+        (1, 1, 1700000000, 30, 100),
+        (1, 2, START_TIME_MAX, 30, 100),
+        (1, 3, 10 ** 15, 30, 100),
+        (1, 4, 2 ** 62, 30, 100),
+        (1, 5, 'abc', 30, 100),
+        (2, 6, 1700000000, 30, 100),
+    ])
+    
+    columns = read_rows(conn)
+    
+    assert list(columns.pages) == [1]
+
+
+def test_latest_allowed_start_time_converts_in_east_timezone():
+    conn = make_statistics_db()
+    conn.execute("INSERT INTO page_stat_data VALUES (1, 1, ?, 30, 100)", (START_TIME_MAX - 1,))
+    columns = read_rows(conn)
+    indices = columns.valid_indices({1: 10})
+    
+    # 东十四区是最大的时区偏移，换算后仍在datetime范围内
+    batches = list(columns.iter_session_rows(indices, {1: 10}, 7, ZoneInfo("Pacific/Kiritimati"), 100))
+    
+    assert batches[0][0]["local_date"].year == 9999
+    assert batches[0][0]["book_id"] == 10
+
+
+def test_since_filters_older_rows():
+    conn = make_statistics_db()
+    conn.executemany("INSERT INTO page_stat_data VALUES (1, ?, ?, 30, 100)", [
+        (1, 1700000000),
+        (2, 1700000100),
+    ])
+    
+    columns = read_rows(conn, since=1700000000)
+    
+    assert list(columns.pages) == [2]
+
+
+def test_out_of_range_pages_excluded():
+    conn = make_statistics_db()
+    conn.executemany("INSERT INTO page_stat_data VALUES (1, ?, 1700000000, 30, 100)", [
+        (-1,), (0,), (PAGE_MAX,), (PAGE_MAX + 1,), (2 ** 31 - 1,),
+    ])
+    
+    columns = read_rows(conn)
+    
+    assert sorted(columns.pages) == [0, PAGE_MAX]
@@ -0,0 +1,78 @@
+"""
+阅读记录保留期测试
+
+过期分区删除后，再次同步或推送的过期记录应在写入前丢弃，不会落入默认分区。
+"""
+import json
+import time
+
+import pytest
+from sqlalchemy import select
+
+from backend.app.config import settings
+from backend.app.models.reading_session import ReadingSession
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.services.ingest_service import IngestService
+
+DAY = 86400
+MD5 = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture(autouse=True)
+def retention(monkeypatch):
+    monkeypatch.setattr(settings, "READING_SESSIONS_RETENTION_MONTHS", 3)
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+
+
+async def session_start_times(db, user_id):
+    result = await db.execute(
+        select(ReadingSession.start_time).where(ReadingSession.user_id == user_id)
+    )
+    return sorted(int(start_time.timestamp()) for start_time in result.scalars())
+
+
+async def test_full_sync_drops_expired_rows(test_db, make_user, make_statistics_file):
+    user = await make_user()
+    now = int(time.time())
+    path = make_statistics_file(
+        [(1, "书名", MD5)],
+        [(1, 1, now - 365 * DAY, 60, 300), (1, 2, now - DAY, 60, 300)],
+    )
+    
+    result = await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    
+    assert result["success"]
+    assert result["sessions_synced"] == 1
+    assert await session_start_times(test_db, user.id) == [now - DAY]
+
+
+async def test_push_ingest_counts_expired_rows(test_db, make_user, make_statistics_file):
+    user = await make_user()
+    now = int(time.time())
+    path = make_statistics_file([(1, "书名", MD5)], [(1, 1, now - 2 * DAY, 60, 300)])
+    await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    
+    lines = [
+        {"md5": MD5, "page": 5, "start_time": now - 400 * DAY, "duration": 30},
+        {"md5": MD5, "page": 6, "start_time": now - DAY, "duration": 30},
+    ]
+    
+    async def chunks():
+        yield "\n".join(json.dumps(line) for line in lines).encode()
+    
+    stats = await IngestService(test_db).ingest_page_stats(user.id, chunks())
+    
+    assert stats["inserted"] == 1
+    assert stats["expired"] == 1
+    assert await session_start_times(test_db, user.id) == [now - 2 * DAY, now - DAY]
+
+
+async def test_retention_disabled_keeps_old_rows(test_db, make_user, make_statistics_file, monkeypatch):
+    monkeypatch.setattr(settings, "READING_SESSIONS_RETENTION_MONTHS", 0)
+    user = await make_user()
+    now = int(time.time())
+    path = make_statistics_file([(1, "书名", MD5)], [(1, 1, now - 365 * DAY, 60, 300)])
+    
+    await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    
+    assert await session_start_times(test_db, user.id) == [now - 365 * DAY]
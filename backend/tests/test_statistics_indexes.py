@@ -0,0 +1,86 @@
+"""
+统计查询覆盖索引测试
+
+reading_sessions 上的统计查询应只读取某个覆盖索引（索引列 + INCLUDE列）中的字段，
+这样在PostgreSQL上可以只扫描索引；查询或索引改动使字段超出索引时测试失败。
+"""
+import time
+
+from sqlalchemy import Column, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql import visitors
+
+from backend.app.config import settings
+from backend.app.models.book import Book
+from backend.app.models.reading_session import ReadingSession
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.services.statistics_service import StatisticsService
+
+SESSIONS = ReadingSession.__table__
+
+
+def covered_columns(index) -> set:
+    """索引能直接提供的字段：索引列加上PostgreSQL的INCLUDE列"""
+    return {column.name for column in index.columns} | set(index.dialect_options["postgresql"]["include"] or [])
+
+
+def test_covering_indexes_defined_on_models():
+    indexes = {index.name: index for index in SESSIONS.indexes | Book.__table__.indexes}
+    
+    assert [c.name for c in indexes["idx_sessions_book_time_covering"].columns] == ["book_id", "start_time"]
+    assert covered_columns(indexes["idx_sessions_book_time_covering"]) >= {"page", "duration"}
+    assert [c.name for c in indexes["idx_books_user_covering"].columns] == ["user_id", "id"]
+    assert covered_columns(indexes["idx_books_user_covering"]) >= {"title", "author"}
+
+
+def test_covering_index_ddl_on_postgresql():
+    index = next(index for index in SESSIONS.indexes if index.name == "idx_sessions_book_time_covering")
+    
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    
+    assert "(book_id, start_time) INCLUDE (page, duration)" in ddl
+
+
+async def test_statistics_queries_covered_by_indexes(test_db, make_user, make_statistics_file, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+    user = await make_user()
+    now = int(time.time())
+    path = make_statistics_file(
+        [(1, "书名", "0123456789abcdef0123456789abcdef")],
+        [(1, page, now - page * 3600, 60, 300) for page in range(1, 50)],
+    )
+    await DataSyncService(test_db).ingest_statistics_file(user.id, path, incremental=False)
+    book_id = (await test_db.execute(Book.__table__.select().where(Book.user_id == user.id))).first().id
+    
+    statements = []
+    
+    def listener(state):
+        statements.append(state.statement)
+    
+    event.listen(test_db.sync_session, "do_orm_execute", listener)
+    try:
+        service = StatisticsService(test_db)
+        await service.get_dashboard_summary(user.id)
+        await service.get_reading_trends(user.id, 30)
+        await service.get_calendar_heatmap_data(user.id)
+        await service.get_detailed_calendar_data(user.id)
+        await service.get_book_map_data(user.id, book_id)
+    finally:
+        event.remove(test_db.sync_session, "do_orm_execute", listener)
+    
+    index_columns = [covered_columns(index) for index in SESSIONS.indexes]
+    session_queries = 0
+    for statement in statements:
+        # 所有统计查询都能按PostgreSQL方言编译
+        statement.compile(dialect=postgresql.dialect())
+        used = {
+            element.name for element in visitors.iterate(statement)
+            if isinstance(element, Column) and element.table is SESSIONS
+        }
+        if not used:
+            continue
+        session_queries += 1
+        assert any(used <= columns for columns in index_columns), f"没有覆盖索引包含字段 {sorted(used)}"
+    
+    assert session_queries > 0
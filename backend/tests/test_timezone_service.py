@@ -0,0 +1,79 @@
+"""
+时区修改测试
+
+按天汇总以压缩时的本地日期保存，已有压缩数据的用户不能改为其他时区；
+没有压缩数据时修改时区会按新时区重算本地日期。
+"""
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from backend.app.config import settings
+from backend.app.models.daily_stats import UserDailyStats
+from backend.app.models.reading_session import ReadingSession
+from backend.app.services.compaction_service import CompactionService
+from backend.app.services.data_sync_service import DataSyncService
+from backend.app.services.timezone_service import TimezoneService
+
+DAY = 86400
+BOOKS = [(1, "时区测试", "44444444444444444444444444444444")]
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+
+
+def make_page_stats():
+    """近90天内每天一次、落在UTC 20点左右的翻页记录（上海与纽约的本地日期不同）"""
+    today = int(time.time()) // DAY * DAY
+    return [(1, day % 50 + 1, today - day * DAY + 20 * 3600, 60, 50) for day in range(1, 90)]
+
+
+async def user_days(db, user_id):
+    result = await db.execute(
+        select(UserDailyStats.local_date, UserDailyStats.duration).where(UserDailyStats.user_id == user_id)
+    )
+    return sorted(tuple(row) for row in result)
+
+
+async def synced_user(db, make_user, make_statistics_file):
+    user = await make_user()
+    path = make_statistics_file(BOOKS, make_page_stats(), "timezone.sqlite3")
+    await DataSyncService(db).ingest_statistics_file(user.id, path, incremental=False)
+    return user
+
+
+async def test_timezone_change_recomputes_local_dates(test_db, make_user, make_statistics_file):
+    user = await synced_user(test_db, make_user, make_statistics_file)
+    before = await user_days(test_db, user.id)
+    
+    result = await TimezoneService(test_db).set_timezone(user.id, "America/New_York")
+    assert result["effective_timezone"] == "America/New_York"
+    after = await user_days(test_db, user.id)
+    assert after != before
+    assert sum(duration for _, duration in after) == sum(duration for _, duration in before)
+    
+    local_hours = set((await test_db.execute(
+        select(ReadingSession.local_hour).where(ReadingSession.user_id == user.id)
+    )).scalars())
+    assert local_hours <= {15, 16}
+
+
+async def test_timezone_change_rejected_after_compaction(test_db, make_user, make_statistics_file):
+    user = await synced_user(test_db, make_user, make_statistics_file)
+    await CompactionService(test_db).compact_user(user.id, date.today() - timedelta(days=30))
+    before = await user_days(test_db, user.id)
+    service = TimezoneService(test_db)
+    
+    with pytest.raises(ValueError):
+        await service.set_timezone(user.id, "America/New_York")
+    assert (await service.get_timezone(user.id))["timezone"] is None
+    assert await user_days(test_db, user.id) == before
+    
+    # 生效时区不变（显式设置为默认时区）仍然允许
+    result = await service.set_timezone(user.id, settings.DEFAULT_TIMEZONE)
+    assert result["timezone"] == settings.DEFAULT_TIMEZONE
+    assert await user_days(test_db, user.id) == before
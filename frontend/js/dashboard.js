@@ -542,10 +542,10 @@ class KOReaderDashboard {
         
         // 特别调试books API
         console.log('📚 准备调用books API...');
-        console.log('📚 Books API URL:', `${this.baseURL}/books/?skip=0&limit=20`);
+        console.log('📚 Books API URL:', `${this.baseURL}/books/?skip=0&limit=20&sort=last_read`);
         
         // 并行获取所有需要的数据
-        const [summaryData, calendarData, trendsData, weeklyData, booksData] = await Promise.all([
+        const [summaryData, calendarData, trendsData, weeklyData, booksData, finishedData, readingData] = await Promise.all([
             this.apiRequest('/dashboard/summary'),
             this.apiRequest('/dashboard/calendar'),
             this.apiRequest('/statistics/trends?days=30'),
@@ -553,14 +553,18 @@ class KOReaderDashboard {
             (async () => {
                 console.log('📚 开始执行books API调用...');
                 try {
-                    const result = await this.apiRequest('/books/?skip=0&limit=20');
+                    // 书单按最近阅读排序，由服务端排好只取显示的20本
+                    const result = await this.apiRequest('/books/?skip=0&limit=20&sort=last_read');
                     console.log('📚 Books API调用成功，结果:', result);
                     return result;
                 } catch (error) {
                     console.error('📚 Books API调用失败:', error);
                     return null;
                 }
-            })()
+            })(),
+            // 完成/进行中的数量由服务端按阅读状态筛选计数，不需要下载全部书籍
+            this.apiRequest('/books/?limit=1&status=finished').catch(() => null),
+            this.apiRequest('/books/?limit=1&status=reading').catch(() => null)
         ]);
 
         if (!summaryData || !calendarData || !trendsData) {
@@ -582,7 +586,7 @@ class KOReaderDashboard {
             calendar: this.convertCalendarData(calendarData),
             trends: this.convertTrendsData(trendsData),
             hourlyData: this.generateHourlyData(), // 暂时使用模拟数据
-            progressData: this.calculateBookProgress(booksData),
+            progressData: this.countBookProgress(finishedData, readingData) || this.calculateBookProgress(booksData),
             readingList: this.convertReadingListData(booksData),
             weeklyData: weeklyData,
             monthlyData: calendarData // 使用日历数据作为月度数据的基础
@@ -637,6 +641,20 @@ class KOReaderDashboard {
         return [];
     }
 
+    /**
+     * 由按阅读状态筛选的书籍总数得到完成进度（服务端同样使用85%阈值），接口不可用时返回null
+     */
+    countBookProgress(finishedData, readingData) {
+        if (!finishedData || !readingData || finishedData.total == null || readingData.total == null) {
+            return null;
+        }
+        console.log(`📊 进度统计: 已完成 ${finishedData.total} 本，进行中 ${readingData.total} 本`);
+        return {
+            completed: finishedData.total,
+            inProgress: readingData.total
+        };
+    }
+
     /**
      * 计算书籍完成进度（使用85%阈值）
      */
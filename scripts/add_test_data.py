@@ -102,6 +102,9 @@ async def add_test_data():
                     
                     reading_session = ReadingSession(
                         book_id=book.id,
+                        local_date=session_time.date(),
+                        local_hour=session_time.hour,
+                        user_id=book.user_id,
                         page=page,
                         start_time=session_time,
                         duration=duration,
@@ -114,6 +117,7 @@ async def add_test_data():
                     if random.random() < 0.3:  # 30%的概率添加标注
                         highlight = Highlight(
                             book_id=book.id,
+                            user_id=book.user_id,
                             page=page,
                             text=f"这是第{page}页的重要内容标注",
                             note=f"笔记：关于第{page}页的思考",
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+阅读记录表存储布局基准测试
+
+在独立的schema中分别建立旧布局（BIGINT代理主键 + 唯一索引 + book_id/start_time/id单列索引）
+和精简布局（(book_id, page, start_time) 主键、SMALLINT时长、无冗余索引）的reading_sessions，
+两者都带有统计查询使用的覆盖索引。用同一批模拟的page_stat记录按同步时的方式
+（分批 INSERT ... ON CONFLICT DO NOTHING，每批提交）写入，输出每秒写入行数、
+每行占用的表和索引字节数。仅支持PostgreSQL。
+
+用法:
+    python scripts/benchmark_session_layout.py --rows 500000
+    python scripts/benchmark_session_layout.py --rows 200000 --batch-size 5000 --keep
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+
+from backend.app.database import engine
+
+SCHEMA = "layout_bench"
+
+LAYOUTS: Dict[str, List[str]] = {
+    "legacy": [
+        """
+        CREATE TABLE {schema}.legacy (
+            id BIGSERIAL PRIMARY KEY,
+            book_id INTEGER NOT NULL,
+            page INTEGER NOT NULL,
+            start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+            duration INTEGER NOT NULL,
+            total_pages_at_time INTEGER,
+            user_id INTEGER NOT NULL,
+            local_date DATE NOT NULL,
+            local_hour SMALLINT NOT NULL
+        )
+        """,
+        "CREATE UNIQUE INDEX legacy_book_page_time ON {schema}.legacy (book_id, page, start_time)",
+        "CREATE INDEX legacy_book_id ON {schema}.legacy (book_id)",
+        "CREATE INDEX legacy_start_time ON {schema}.legacy (start_time)",
+        "CREATE INDEX legacy_id ON {schema}.legacy (id)",
+        "CREATE INDEX legacy_book_time ON {schema}.legacy (book_id, start_time) INCLUDE (page, duration, id)",
+        "CREATE INDEX legacy_user_time ON {schema}.legacy (user_id, start_time) INCLUDE (book_id, page, duration, id)",
+        "CREATE INDEX legacy_user_local_date ON {schema}.legacy (user_id, local_date) "
+        "INCLUDE (local_hour, book_id, page, duration, id)",
+    ],
+    "lean": [
+        """
+        CREATE TABLE {schema}.lean (
+            start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+            book_id INTEGER NOT NULL,
+            page INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            local_date DATE NOT NULL,
+            total_pages_at_time INTEGER,
+            duration SMALLINT NOT NULL,
+            local_hour SMALLINT NOT NULL,
+            PRIMARY KEY (book_id, page, start_time)
+        )
+        """,
+        "CREATE INDEX lean_book_time ON {schema}.lean (book_id, start_time) INCLUDE (page, duration)",
+        "CREATE INDEX lean_user_time ON {schema}.lean (user_id, start_time) INCLUDE (book_id, page, duration)",
+        "CREATE INDEX lean_user_local_date ON {schema}.lean (user_id, local_date) "
+        "INCLUDE (local_hour, book_id, page, duration)",
+    ],
+}
+
+INSERT_SQL = """
+    INSERT INTO {schema}.{table}
+        (book_id, page, start_time, duration, total_pages_at_time, user_id, local_date, local_hour)
+    VALUES
+        (:book_id, :page, :start_time, :duration, :total_pages_at_time, :user_id, :local_date, :local_hour)
+    ON CONFLICT (book_id, page, start_time) DO NOTHING
+"""
+
+
+def generate_rows(count: int, books: int, seed: int) -> List[Dict[str, Any]]:
+    """模拟一个用户的翻页记录：逐本书连续翻页，每页停留几秒到两分钟"""
+    rng = random.Random(seed)
+    moment = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows: List[Dict[str, Any]] = []
+    pages = {book_id: 1 for book_id in range(1, books + 1)}
+    while len(rows) < count:
+        book_id = rng.randint(1, books)
+        moment += timedelta(hours=rng.randint(1, 20))
+        for _ in range(rng.randint(10, 80)):
+            duration = rng.randint(3, 120)
+            rows.append({
+                "book_id": book_id,
+                "page": pages[book_id],
+                "start_time": moment,
+                "duration": duration,
+                "total_pages_at_time": 400,
+                "user_id": 1,
+                "local_date": moment.date(),
+                "local_hour": moment.hour,
+            })
+            pages[book_id] += 1
+            moment += timedelta(seconds=duration)
+            if len(rows) >= count:
+                break
+    return rows
+
+
+async def prepare_schema() -> None:
+    async with engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            raise SystemExit("❌ 仅支持PostgreSQL")
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        for statements in LAYOUTS.values():
+            for statement in statements:
+                await conn.execute(text(statement.format(schema=SCHEMA)))
+
+
+async def load_rows(table: str, rows: List[Dict[str, Any]], batch_size: int) -> float:
+    """分批写入并逐批提交，返回耗时秒数"""
+    insert_sql = text(INSERT_SQL.format(schema=SCHEMA, table=table))
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        for offset in range(0, len(rows), batch_size):
+            await conn.execute(insert_sql, rows[offset:offset + batch_size])
+            await conn.commit()
+    return time.perf_counter() - started
+
+
+async def measure_storage(table: str) -> Dict[str, Any]:
+    """VACUUM后统计表、各索引的大小和每行字节数"""
+    qualified = f"{SCHEMA}.{table}"
+    async with engine.connect() as conn:
+        autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await autocommit.execute(text(f"VACUUM ANALYZE {qualified}"))
+        row_count = (await conn.execute(text(f"SELECT count(*) FROM {qualified}"))).scalar()
+        heap_bytes = (await conn.execute(
+            text("SELECT pg_table_size(CAST(:table AS regclass))"), {"table": qualified}
+        )).scalar()
+        indexes = (await conn.execute(
+            text("""
+                SELECT c.relname, pg_relation_size(c.oid)
+                FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = CAST(:table AS regclass)
+                ORDER BY c.relname
+            """),
+            {"table": qualified}
+        )).all()
+    index_bytes = sum(size for _, size in indexes)
+    rows = max(row_count, 1)
+    return {
+        "rows": row_count,
+        "heap_bytes": heap_bytes,
+        "index_bytes": index_bytes,
+        "heap_per_row": round(heap_bytes / rows, 1),
+        "index_per_row": round(index_bytes / rows, 1),
+        "total_per_row": round((heap_bytes + index_bytes) / rows, 1),
+        "indexes": {name: size for name, size in indexes},
+    }
+
+
+def print_report(results: Dict[str, Dict[str, Any]], verbose: bool) -> None:
+    print(f"{'布局':<8} {'索引数':>6} {'行/秒':>10} {'表 字节/行':>12} {'索引 字节/行':>14} {'合计 字节/行':>14} {'合计MB':>9}")
+    print("-" * 80)
+    for layout, result in results.items():
+        total_mb = (result["heap_bytes"] + result["index_bytes"]) / 1024 / 1024
+        print(f"{layout:<8} {len(result['indexes']):>6} {result['rows_per_second']:>10} "
+              f"{result['heap_per_row']:>12} {result['index_per_row']:>14} "
+              f"{result['total_per_row']:>14} {total_mb:>9.1f}")
+        if verbose:
+            for name, size in result["indexes"].items():
+                print(f"    {name:<28} {size / 1024 / 1024:>9.1f} MB")
+    
+    legacy, lean = results["legacy"], results["lean"]
+    print(f"\n精简布局: 每行存储 {lean['total_per_row'] / legacy['total_per_row']:.0%}，"
+          f"写入速度 {lean['rows_per_second'] / legacy['rows_per_second']:.2f}x")
+
+
+async def main(args: argparse.Namespace) -> int:
+    print(f"🧪 生成 {args.rows} 条模拟阅读记录...")
+    rows = generate_rows(args.rows, args.books, args.seed)
+    await prepare_schema()
+    
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for table in LAYOUTS:
+            elapsed = await load_rows(table, rows, args.batch_size)
+            result = await measure_storage(table)
+            result["seconds"] = round(elapsed, 2)
+            result["rows_per_second"] = int(len(rows) / elapsed) if elapsed else 0
+            results[table] = result
+            print(f"  {table}: {elapsed:.2f}s")
+        print()
+        print_report(results, args.verbose)
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="比较reading_sessions旧布局和精简布局的写入速度与存储占用")
+    parser.add_argument("--rows", type=int, default=200000, help="写入的记录数")
+    parser.add_argument("--books", type=int, default=50, help="模拟的书籍数")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每批写入行数（同 INGEST_BATCH_SIZE）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--keep", action="store_true", help=f"保留 {SCHEMA} schema 以便进一步检查")
+    parser.add_argument("--verbose", action="store_true", help="打印每个索引的大小")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
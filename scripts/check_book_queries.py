@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+书籍接口查询次数检查脚本
+
+调用 BookService 的书籍列表（skip分页和游标翻页）和详情，统计每次调用实际发出的SQL语句数，
+超过上限（都应只有一次数据库往返）时以非零状态码退出，
+防止逐本查询统计（N+1）的写法回归。PostgreSQL和SQLite均可使用。
+
+用法:
+    python scripts/check_book_queries.py --user-id 1
+    python scripts/check_book_queries.py --user-id 1 --limit 100 --search 三体 --verbose
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import event, select, func
+
+from backend.app.database import engine, AsyncSessionLocal
+from backend.app.models.book import Book
+from backend.app.services.book_service import BookService
+
+# 每个接口允许的语句数，与返回的书籍数量无关
+QUERY_BUDGETS = {
+    "get_user_books": 1,
+    "get_user_books_cursor": 1,
+    "get_book_detail": 1,
+}
+
+
+async def capture_book_queries(user_id: int, limit: int, search: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    调用书籍列表和详情并记录各自执行的SQL
+    
+    Returns:
+        {接口名: {"statements": [SQL], "items": 返回的书籍数}}
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    current = {"label": None}
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["label"]:
+            results[current["label"]]["statements"].append(statement)
+    
+    async with AsyncSessionLocal() as session:
+        book_id = (await session.execute(
+            select(func.max(Book.id)).where(Book.user_id == user_id)
+        )).scalar()
+        
+        service = BookService(session)
+        calls = [
+            ("get_user_books", lambda: service.get_user_books(user_id, limit=limit, search=search)),
+        ]
+        # 游标翻到第二页（不计总数）
+        first_page = await service.get_user_books(user_id, limit=limit, search=search, include_total=False)
+        if first_page.next_cursor:
+            calls.append(("get_user_books_cursor", lambda: service.get_user_books(
+                user_id, limit=limit, search=search, cursor=first_page.next_cursor, include_total=False
+            )))
+        if book_id is not None:
+            calls.append(("get_book_detail", lambda: service.get_book_detail(book_id, user_id)))
+        
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            for label, call in calls:
+                results[label] = {"statements": [], "items": 0}
+                current["label"] = label
+                response = await call()
+                current["label"] = None
+                if label.startswith("get_user_books"):
+                    results[label]["items"] = len(response.books)
+                else:
+                    results[label]["items"] = 1 if response else 0
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    
+    return results
+
+
+def print_report(results: Dict[str, Dict[str, Any]], verbose: bool) -> List[str]:
+    """打印每个接口的语句数，返回超出上限的接口"""
+    failed = []
+    print(f"{'接口':<24} {'书籍数':>6} {'语句数':>6} {'上限':>6}")
+    print("-" * 48)
+    for label, result in results.items():
+        count, budget = len(result["statements"]), QUERY_BUDGETS[label]
+        marker = "❌" if count > budget else "✅"
+        print(f"{label:<24} {result['items']:>6} {count:>6} {budget:>6} {marker}")
+        if verbose or count > budget:
+            for statement in result["statements"]:
+                print(f"    {' '.join(statement.split())[:160]}")
+        if count > budget:
+            failed.append(label)
+    return failed
+
+
+async def main(args: argparse.Namespace) -> int:
+    results = await capture_book_queries(args.user_id, args.limit, args.search)
+    if not results["get_user_books"]["items"]:
+        print("⚠️ 该用户没有书籍，列表为空时无法发现逐本查询")
+    
+    failed = print_report(results, args.verbose)
+    await engine.dispose()
+    if failed:
+        print(f"\n❌ 查询次数超出上限: {', '.join(failed)}")
+        return 1
+    print("\n✅ 查询次数检查通过")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="检查书籍列表和详情接口的SQL语句数，防止N+1查询回归")
+    parser.add_argument("--user-id", type=int, required=True, help="用于调用接口的用户ID")
+    parser.add_argument("--limit", type=int, default=100, help="书籍列表每页数量（同接口默认值）")
+    parser.add_argument("--search", help="书籍列表的搜索关键词")
+    parser.add_argument("--verbose", action="store_true", help="打印每个接口执行的SQL")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -42,7 +42,7 @@ async def check_test_data():
         
         # 检查阅读会话数量
         sessions_count = await session.execute(
-            select(func.count(ReadingSession.id))
+            select(func.count()).select_from(ReadingSession)
             .join(Book, ReadingSession.book_id == Book.id)
             .where(Book.user_id == user.id)
         )
@@ -79,7 +79,7 @@ async def check_test_data():
             
             # 检查每本书的阅读会话
             book_sessions = await session.execute(
-                select(func.count(ReadingSession.id))
+                select(func.count()).select_from(ReadingSession)
                 .where(ReadingSession.book_id == book.id)
             )
             book_sessions_count = book_sessions.scalar()
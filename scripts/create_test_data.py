@@ -166,6 +166,9 @@ async def create_reading_sessions(db: AsyncSession, user: User, books: list[Book
                     for page in range(start_page, start_page + pages_read):
                         session = ReadingSession(
                             book_id=book.id,
+                            local_date=session_time.date(),
+                            local_hour=session_time.hour,
+                            user_id=book.user_id,
                             page=page,
                             start_time=session_time,
                             duration=duration // pages_read  # 平均分配时间
@@ -199,6 +202,7 @@ async def create_highlights(db: AsyncSession, user: User, books: list[Book]):
         for _ in range(random.randint(2, 5)):
             highlight = Highlight(
                 book_id=book.id,
+                user_id=book.user_id,
                 page=random.randint(1, book.total_pages),
                 text=random.choice(sample_highlights),
                 note=f"来自《{book.title}》的精彩片段"
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+统计查询执行计划检查脚本
+
+依次调用 StatisticsService 的各个统计接口，截获它们实际发出的SQL，
+对每条SQL执行 EXPLAIN (ANALYZE, BUFFERS)，输出耗时、缓冲区和扫描方式，
+并与基线文件比较，发现计划退化（变慢、读取更多缓冲区、出现顺序扫描、
+失去仅索引扫描）时以非零状态码退出。仅支持PostgreSQL。
+
+用法:
+    python scripts/explain_statistics.py --user-id 1 --save-baseline plans.json
+    python scripts/explain_statistics.py --user-id 1 --baseline plans.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import event, select, func
+
+from backend.app.database import engine, AsyncSessionLocal
+from backend.app.models.book import Book
+from backend.app.services.statistics_service import StatisticsService
+
+# 这些表上出现顺序扫描视为退化
+WATCHED_TABLES = ("reading_sessions", "books", "highlights")
+
+
+async def capture_statistics_queries(user_id: int, year: int, month: int, days: int) -> List[Tuple[str, str, Any]]:
+    """
+    调用各统计接口并记录执行的SQL
+    
+    Returns:
+        [(标签, 驱动层SQL, 参数)]，标签形如 get_dashboard_summary#2
+    """
+    captured: List[Tuple[str, str, Any]] = []
+    current = {"label": None, "count": 0}
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["label"] and statement.lstrip().upper().startswith("SELECT"):
+            current["count"] += 1
+            captured.append((f"{current['label']}#{current['count']}", statement, parameters))
+    
+    async with AsyncSessionLocal() as session:
+        book_id = (await session.execute(
+            select(func.min(Book.id)).where(Book.user_id == user_id)
+        )).scalar()
+        
+        end_date = datetime(year, month, 1)
+        start_date = end_date - timedelta(days=days)
+        service = StatisticsService(session)
+        calls = [
+            ("get_dashboard_summary", lambda: service.get_dashboard_summary(user_id)),
+            ("get_reading_trends", lambda: service.get_reading_trends(user_id, days)),
+            ("get_time_range_statistics", lambda: service.get_time_range_statistics(user_id, start_date, end_date)),
+            ("get_calendar_heatmap_data", lambda: service.get_calendar_heatmap_data(user_id, year)),
+            ("get_detailed_calendar_data", lambda: service.get_detailed_calendar_data(user_id, year, month)),
+        ]
+        if book_id is not None:
+            calls.append(("get_book_map_data", lambda: service.get_book_map_data(user_id, book_id)))
+        
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            for label, call in calls:
+                current["label"], current["count"] = label, 0
+                await call()
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    
+    return captured
+
+
+def summarize_plan(plan_json: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """从 EXPLAIN (FORMAT JSON) 结果中提取耗时、缓冲区和各表的扫描方式"""
+    root = plan_json[0]
+    scans: List[str] = []
+    heap_fetches = 0
+    
+    def walk(node: Dict[str, Any]) -> None:
+        nonlocal heap_fetches
+        node_type = node.get("Node Type", "")
+        if "Scan" in node_type and node.get("Relation Name"):
+            target = node["Relation Name"]
+            if node.get("Index Name"):
+                target += f"({node['Index Name']})"
+            scans.append(f"{node_type}: {target}")
+        heap_fetches += node.get("Heap Fetches", 0)
+        for child in node.get("Plans", []):
+            walk(child)
+    
+    walk(root["Plan"])
+    top = root["Plan"]
+    return {
+        "execution_ms": round(root.get("Execution Time", 0.0), 3),
+        "planning_ms": round(root.get("Planning Time", 0.0), 3),
+        "shared_hit": top.get("Shared Hit Blocks", 0),
+        "shared_read": top.get("Shared Read Blocks", 0),
+        "heap_fetches": heap_fetches,
+        "scans": scans,
+    }
+
+
+def _seq_scans(summary: Dict[str, Any]) -> set:
+    return {
+        scan for scan in summary["scans"]
+        if scan.startswith("Seq Scan") and any(table in scan for table in WATCHED_TABLES)
+    }
+
+
+def _index_only_scans(summary: Dict[str, Any]) -> int:
+    return sum(1 for scan in summary["scans"] if scan.startswith("Index Only Scan"))
+
+
+def find_regressions(
+    summary: Dict[str, Any],
+    baseline: Dict[str, Any],
+    ratio: float,
+    min_ms: float,
+    min_buffers: int,
+) -> List[str]:
+    """与基线比较，返回退化原因列表"""
+    reasons = []
+    now_ms, base_ms = summary["execution_ms"], baseline["execution_ms"]
+    if now_ms > base_ms * ratio and now_ms - base_ms >= min_ms:
+        reasons.append(f"耗时 {base_ms}ms -> {now_ms}ms")
+    
+    now_buffers = summary["shared_hit"] + summary["shared_read"]
+    base_buffers = baseline["shared_hit"] + baseline["shared_read"]
+    if now_buffers > base_buffers * ratio and now_buffers - base_buffers >= min_buffers:
+        reasons.append(f"缓冲区 {base_buffers} -> {now_buffers}")
+    
+    new_seq_scans = _seq_scans(summary) - _seq_scans(baseline)
+    if new_seq_scans:
+        reasons.append(f"新增顺序扫描 {sorted(new_seq_scans)}")
+    
+    if _index_only_scans(summary) < _index_only_scans(baseline):
+        reasons.append(f"仅索引扫描 {_index_only_scans(baseline)} -> {_index_only_scans(summary)}")
+    return reasons
+
+
+async def explain_queries(queries: List[Tuple[str, str, Any]], verbose: bool) -> Dict[str, Dict[str, Any]]:
+    """对每条SQL执行 EXPLAIN (ANALYZE, BUFFERS)，在回滚的事务中执行"""
+    results: Dict[str, Dict[str, Any]] = {}
+    async with engine.connect() as conn:
+        if conn.dialect.name != "postgresql":
+            raise SystemExit("❌ 仅支持PostgreSQL")
+        for label, statement, parameters in queries:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+            )
+            plan_json = result.scalar()
+            if isinstance(plan_json, str):
+                plan_json = json.loads(plan_json)
+            summary = summarize_plan(plan_json)
+            summary["sql"] = " ".join(statement.split())
+            results[label] = summary
+            if verbose:
+                text_plan = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                print(f"\n--- {label}\n" + "\n".join(row[0] for row in text_plan))
+        await conn.rollback()
+    return results
+
+
+def print_report(results: Dict[str, Dict[str, Any]], regressions: Dict[str, List[str]]) -> None:
+    print(f"{'查询':<34} {'耗时ms':>10} {'命中':>8} {'读取':>8} {'堆访问':>8}  扫描方式")
+    print("-" * 110)
+    for label, summary in results.items():
+        marker = "❌" if label in regressions else "  "
+        print(f"{marker}{label:<32} {summary['execution_ms']:>10} {summary['shared_hit']:>8} "
+              f"{summary['shared_read']:>8} {summary['heap_fetches']:>8}  {'; '.join(summary['scans'])}")
+    if regressions:
+        print(f"\n❌ 发现 {len(regressions)} 条查询计划退化:")
+        for label, reasons in regressions.items():
+            for reason in reasons:
+                print(f"  - {label}: {reason}")
+    else:
+        print("\n✅ 未发现计划退化")
+
+
+async def main(args: argparse.Namespace) -> int:
+    now = datetime.now()
+    queries = await capture_statistics_queries(
+        args.user_id, args.year or now.year, args.month or now.month, args.days
+    )
+    if not queries:
+        print("❌ 没有截获到统计查询")
+        return 1
+    
+    results = await explain_queries(queries, args.verbose)
+    
+    regressions: Dict[str, List[str]] = {}
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        for label, summary in results.items():
+            if label not in baseline:
+                continue
+            reasons = find_regressions(summary, baseline[label], args.ratio, args.min_ms, args.min_buffers)
+            if reasons:
+                regressions[label] = reasons
+    
+    print_report(results, regressions)
+    
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 基线已保存到 {args.save_baseline}")
+    
+    await engine.dispose()
+    return 1 if regressions else 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="对统计查询执行 EXPLAIN (ANALYZE, BUFFERS) 并检查计划退化")
+    parser.add_argument("--user-id", type=int, required=True, help="用于生成查询的用户ID")
+    parser.add_argument("--year", type=int, help="日历/热力图查询的年份，默认今年")
+    parser.add_argument("--month", type=int, help="详细日历查询的月份，默认本月")
+    parser.add_argument("--days", type=int, default=30, help="趋势和时间范围查询的天数")
+    parser.add_argument("--baseline", help="与之比较的基线JSON文件")
+    parser.add_argument("--save-baseline", help="把本次结果保存为基线JSON文件")
+    parser.add_argument("--ratio", type=float, default=1.5, help="耗时/缓冲区超过基线多少倍视为退化")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="耗时至少增加多少毫秒才视为退化")
+    parser.add_argument("--min-buffers", type=int, default=100, help="缓冲区至少增加多少块才视为退化")
+    parser.add_argument("--verbose", action="store_true", help="打印每条查询的文本执行计划")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -22,7 +22,7 @@ async def query_books():
         
         # 查询阅读记录统计
         result = await db.execute(text('''
-            SELECT b.title, COUNT(rs.id) as session_count, 
+            SELECT b.title, COUNT(rs.book_id) as session_count, 
                    SUM(rs.duration) as total_duration,
                    MIN(rs.page) as min_page, MAX(rs.page) as max_page
             FROM books b 
@@ -4,7 +4,7 @@ ReadingInsights项目设置脚本
 
 该脚本用于：
 1. 检查环境配置
-2. 初始化数据库
+2. 初始化数据库（执行 alembic upgrade head）
 3. 创建初始数据
 """
 
@@ -17,15 +17,26 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
 from backend.app.config import settings
-from backend.app.database import engine, Base
+from backend.app.database import engine
 
 
 async def create_tables():
-    """创建数据库表"""
-    print("正在创建数据库表...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """
+    通过Alembic迁移创建数据库表
+    
+    不能直接用 Base.metadata.create_all：PostgreSQL上reading_sessions是分区表，
+    默认分区和初始分区、pg_trgm扩展都由迁移创建，create_all建出的表无法写入。
+    """
+    print("正在执行数据库迁移...")
+    config = Config(str(project_root / "alembic.ini"))
+    config.set_main_option("script_location", str(project_root / "backend" / "alembic"))
+    # env.py内部会启动自己的事件循环，放到线程中执行
+    await asyncio.to_thread(command.upgrade, config, "head")
     print("数据库表创建完成！")
 
 
@@ -33,7 +44,7 @@ async def check_database_connection():
     """检查数据库连接"""
     try:
         async with engine.begin() as conn:
-            await conn.execute("SELECT 1")
+            await conn.execute(text("SELECT 1"))
         print("✓ 数据库连接正常")
         return True
     except Exception as e: